@@ -0,0 +1,88 @@
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+
+from atb_tracker.middleware import BrowserOnlyMiddlewareMixin
+from users.models import Member
+from users.utils import get_tokens_for_user
+
+
+def full_stack(middleware):
+    """``middleware`` with each browser-only layer replaced by the Django class it extends"""
+    stack = []
+    for path in middleware:
+        cls = import_string(path)
+        if issubclass(cls, BrowserOnlyMiddlewareMixin):
+            base = cls.__mro__[2]
+            path = f'{base.__module__}.{base.__qualname__}'
+        stack.append(path)
+    return stack
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request middleware overhead of the full and the path-aware (sessionless API) stacks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Member to authenticate the requests as')
+        parser.add_argument('--path', default='/api/users/profile/', help='API path to request')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per timed run')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per stack (best run is reported)')
+
+    def handle(self, *args, **options):
+        try:
+            token = get_tokens_for_user(Member.objects.get(email=options['email']))['access']
+        except Member.DoesNotExist:
+            raise CommandError(f"Member {options['email']} does not exist")
+
+        stacks = [
+            ('no middleware', []),
+            ('full stack', full_stack(settings.MIDDLEWARE)),
+            ('path-aware stack', list(settings.MIDDLEWARE)),
+        ]
+        handlers = []
+        for label, middleware in stacks:
+            with override_settings(MIDDLEWARE=middleware):
+                handlers.append((label, WSGIHandler()))
+        # Thousands of requests from one member would otherwise run into the read limit
+        unthrottled = override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}})
+
+        environ = {'PATH_INFO': options['path'], 'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        setup_testing_defaults(environ)
+        host = next((host for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost').lstrip('.')
+        environ['HTTP_HOST'] = host
+
+        results = {}
+        with unthrottled:
+            for label, handler in handlers:
+                results[label] = self.measure(label, handler, environ, options)
+
+        bare = results['no middleware']
+        for label, seconds in results.items():
+            per_request = seconds / options['requests'] * 1e6
+            overhead = (seconds - bare) / options['requests'] * 1e6
+            self.stdout.write(f'  {label:<18} {per_request:8.1f} us/request  middleware {overhead:7.1f} us')
+        saved = (results['full stack'] - results['path-aware stack']) / options['requests'] * 1e6
+        self.stdout.write(self.style.SUCCESS(f'Path-aware stack saves {saved:.1f} us per API request'))
+
+    def measure(self, label, handler, environ, options):
+        status = self.request(handler, environ)
+        if not status.startswith('200'):
+            raise CommandError(f"{options['path']} answered {status} with the {label}")
+        return min(self.timed_run(handler, environ, options['requests']) for _ in range(options['repeat']))
+
+    def request(self, handler, environ):
+        statuses = []
+        for _ in handler(dict(environ), lambda status, headers, exc_info=None: statuses.append(status)):
+            pass
+        return statuses[0]
+
+    def timed_run(self, handler, environ, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            self.request(handler, environ)
+        return time.perf_counter() - started
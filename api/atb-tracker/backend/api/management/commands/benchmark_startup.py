@@ -0,0 +1,99 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from users.models import Member
+from users.utils import get_tokens_for_user
+
+# Runs in a fresh interpreter: load the WSGI app, then send it two requests
+CHILD_CODE = '''
+import json, os, time
+from wsgiref.util import setup_testing_defaults
+from atb_tracker.wsgi import application
+loaded = time.time()
+
+def request():
+    environ = {'PATH_INFO': os.environ['BENCH_PATH'], 'HTTP_HOST': os.environ['BENCH_HOST']}
+    if os.environ.get('BENCH_TOKEN'):
+        environ['HTTP_AUTHORIZATION'] = 'Bearer ' + os.environ['BENCH_TOKEN']
+    setup_testing_defaults(environ)
+    statuses = []
+    started = time.time()
+    body = b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+    return int(statuses[0].split()[0]), started, time.time()
+
+first_status, first_start, first_end = request()
+second_status, second_start, second_end = request()
+print(json.dumps({
+    'loaded': loaded, 'first_status': first_status, 'first_start': first_start, 'first_end': first_end,
+    'second_status': second_status, 'second_start': second_start, 'second_end': second_end,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measure time to first response of fresh server processes, with and without warmup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh processes per mode')
+        parser.add_argument('--path', default=None,
+                            help='Path of the first request (default /api/projects/ with --email, else /api/ready/)')
+        parser.add_argument('--email', help='Member to authenticate the requests as')
+        parser.add_argument('--max-ms', type=float, default=None,
+                            help='Fail when the median time to first response with warmup exceeds this')
+
+    def handle(self, *args, **options):
+        token = ''
+        if options['email']:
+            try:
+                token = get_tokens_for_user(Member.objects.get(email=options['email']))['access']
+            except Member.DoesNotExist:
+                raise CommandError(f"Member {options['email']} does not exist")
+        path = options['path'] or ('/api/projects/' if token else '/api/ready/')
+        host = next((host for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost').lstrip('.')
+
+        medians = {}
+        for warmup in (False, True):
+            runs = [self.run_once(path, host, token, warmup) for _ in range(options['runs'])]
+            label = 'warmup on ' if warmup else 'warmup off'
+            median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            medians[warmup] = median
+            self.stdout.write(
+                f'{label}  app loaded {median["loaded"]:7.1f} ms  first response {median["first_response"]:7.1f} ms'
+                f'  (first request {median["first_request"]:6.1f} ms, second {median["second_request"]:6.1f} ms)'
+            )
+
+        limit = options['max_ms']
+        time_to_first = medians[True]['first_response']
+        if limit is not None and time_to_first > limit:
+            raise CommandError(f'Time to first response {time_to_first:.1f} ms exceeds {limit:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Time to first response with warmup: {time_to_first:.1f} ms (median of {options["runs"]})'))
+
+    def run_once(self, path, host, token, warmup):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'atb_tracker.settings'),
+            'WARMUP_ON_START': 'true' if warmup else 'false',
+            'BENCH_PATH': path, 'BENCH_HOST': host, 'BENCH_TOKEN': token,
+        }
+        spawned = time.time()
+        result = subprocess.run([sys.executable, '-c', CHILD_CODE], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f'Benchmark process failed:\n{result.stderr[-2000:]}')
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        for key in ('first_status', 'second_status'):
+            if timings[key] != 200:
+                raise CommandError(f'{path} answered {timings[key]}')
+        return {
+            'loaded': (timings['loaded'] - spawned) * 1000,
+            'first_response': (timings['first_end'] - spawned) * 1000,
+            'first_request': (timings['first_end'] - timings['first_start']) * 1000,
+            'second_request': (timings['second_end'] - timings['second_start']) * 1000,
+        }
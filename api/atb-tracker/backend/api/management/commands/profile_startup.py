@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a server process imports before it can answer: the WSGI app, its warmup and the URLconf
+STARTUP_CODE = 'import atb_tracker.wsgi'
+
+
+def parse_importtime(stderr):
+    """(module, self microseconds, cumulative microseconds) rows of ``-X importtime`` output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        head, cumulative_us, name = line.split('|')
+        rows.append((name.strip(), int(head.rsplit(':', 1)[1]), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Break down the import time of a fresh server process per module or per package (python -X importtime)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Rows to show')
+        parser.add_argument('--by', choices=['package', 'module'], default='package',
+                            help='Sum self time per top-level package, or list modules by cumulative time')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'atb_tracker.settings')}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        rows = parse_importtime(result.stderr)
+        if result.returncode or not rows:
+            raise CommandError(f'Start-up failed:\n{result.stderr[-2000:]}')
+
+        total = sum(self_us for _, self_us, _ in rows)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(rows)} modules imported in {total / 1000:.1f} ms ({STARTUP_CODE!r})'
+        ))
+        if options['by'] == 'package':
+            packages = defaultdict(lambda: [0, 0])
+            for name, self_us, _ in rows:
+                package = packages[name.split('.')[0]]
+                package[0] += self_us
+                package[1] += 1
+            ranked = sorted(packages.items(), key=lambda item: item[1][0], reverse=True)
+            for name, (self_us, count) in ranked[:options['top']]:
+                self.stdout.write(
+                    f'  {name:<40} {self_us / 1000:8.1f} ms  {self_us / total:6.1%}  {count:>4} modules'
+                )
+        else:
+            ranked = sorted(rows, key=lambda row: row[2], reverse=True)
+            for name, self_us, cumulative_us in ranked[:options['top']]:
+                self.stdout.write(
+                    f'  {name:<50} {cumulative_us / 1000:8.1f} ms cumulative  {self_us / 1000:7.1f} ms self'
+                )
@@ -0,0 +1,6 @@
+from django.contrib import admin
+from .models import ArchiveBatch, DailyRollup
+
+# Register your models here.
+admin.site.register(ArchiveBatch)
+admin.site.register(DailyRollup)
@@ -0,0 +1,180 @@
+"""
+Cold-data archival for time entries and pomodoro sessions.
+
+Rows older than ``ARCHIVE_AFTER_DAYS`` are moved, one user and month at a time,
+into an ``ArchiveBatch`` (zlib-compressed, column-oriented JSON) plus
+``DailyRollup`` totals, and deleted from the hot table in the same transaction.
+The deletes go through the ORM, so the usual post_delete receivers invalidate
+cached reads; archived time entries stay in the project and client counters.
+
+The heatmap and the gaps report read the hot table only, so they leave out
+archived entries; exports, billing summaries, the team report and focus
+analytics include them.
+"""
+import json
+import zlib
+from collections import defaultdict
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, router, transaction
+
+from pomodoro.models import PomodoroSession
+from projects.counters import keeping_counts
+from projects.models import TimeEntry
+from user_settings.utils import user_timezone
+
+from .models import ArchiveBatch, DailyRollup
+
+TIME_ENTRY_COLUMNS = [
+    'id', 'project_id', 'description', 'date', 'start_time', 'end_time', 'duration', 'billable', 'type',
+    'started_at', 'ended_at', 'created_at', 'updated_at',
+]
+POMODORO_COLUMNS = [
+    'id', 'start_time', 'end_time', 'duration', 'break_duration', 'cycles', 'notes', 'created_at', 'updated_at',
+]
+DELETE_CHUNK = 1000
+
+_encoder = DjangoJSONEncoder()
+
+
+def next_month(month):
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1, day=1)
+
+
+def json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return _encoder.default(value)
+
+
+def encode_rows(columns, rows):
+    """Compress ``rows`` (tuples in ``columns`` order) column by column"""
+    data = {column: [json_value(row[i]) for row in rows] for i, column in enumerate(columns)}
+    return zlib.compress(json.dumps(data, separators=(',', ':')).encode(), 9)
+
+
+def decode_rows(payload):
+    """Inverse of ``encode_rows``: a list of dicts with JSON-encoded values"""
+    data = json.loads(zlib.decompress(bytes(payload)))
+    columns = list(data)
+    return [dict(zip(columns, values)) for values in zip(*data.values())]
+
+
+def _delete(queryset, ids):
+    # Only the rows that were read and archived, in case others arrived since
+    manager = queryset.model._base_manager.using(queryset.db)
+    with keeping_counts():
+        for i in range(0, len(ids), DELETE_CHUNK):
+            manager.filter(pk__in=ids[i:i + DELETE_CHUNK]).delete()
+
+
+def _archive_time_entry_month(user, month, cutoff):
+    queryset = TimeEntry.objects.filter(user=user, date__gte=month, date__lt=min(next_month(month), cutoff))
+    rows = list(queryset.order_by('date', 'start_time', 'id').values_list(*TIME_ENTRY_COLUMNS))
+    if not rows:
+        return 0
+    date_idx, project_idx = TIME_ENTRY_COLUMNS.index('date'), TIME_ENTRY_COLUMNS.index('project_id')
+    duration_idx, billable_idx = TIME_ENTRY_COLUMNS.index('duration'), TIME_ENTRY_COLUMNS.index('billable')
+
+    totals = defaultdict(lambda: [0, 0, 0])
+    for row in rows:
+        total = totals[(row[date_idx], row[project_idx])]
+        total[0] += row[duration_idx]
+        total[1] += row[duration_idx] if row[billable_idx] else 0
+        total[2] += 1
+
+    ArchiveBatch.objects.create(
+        user=user, kind='timeentry', start_date=rows[0][date_idx], end_date=rows[-1][date_idx],
+        row_count=len(rows), payload=encode_rows(TIME_ENTRY_COLUMNS, rows),
+    )
+    DailyRollup.objects.bulk_create([
+        DailyRollup(user=user, kind='timeentry', date=day, project_id=project_id,
+                    minutes=minutes, billable_minutes=billable, count=count)
+        for (day, project_id), (minutes, billable, count) in totals.items()
+    ])
+    _delete(queryset, [row[0] for row in rows])
+    return len(rows)
+
+
+def _archive_pomodoro_month(user, month, cutoff, tz):
+    month_start = datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+    month_end = min(datetime.combine(next_month(month), time.min, tzinfo=dt_timezone.utc), cutoff)
+    queryset = PomodoroSession.objects.filter(user=user, start_time__gte=month_start, start_time__lt=month_end)
+    rows = list(queryset.order_by('start_time', 'id').values_list(*POMODORO_COLUMNS))
+    if not rows:
+        return 0
+    start_idx = POMODORO_COLUMNS.index('start_time')
+    duration_idx = POMODORO_COLUMNS.index('duration')
+    break_idx, cycles_idx = POMODORO_COLUMNS.index('break_duration'), POMODORO_COLUMNS.index('cycles')
+
+    # Rolled up on the user's local day, like the focus analytics
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+    for row in rows:
+        total = totals[row[start_idx].astimezone(tz).date()]
+        total[0] += row[duration_idx] or 0
+        total[1] += row[break_idx] or 0
+        total[2] += row[cycles_idx] or 0
+        total[3] += 1
+
+    ArchiveBatch.objects.create(
+        user=user, kind='pomodoro', start_date=rows[0][start_idx].date(), end_date=rows[-1][start_idx].date(),
+        row_count=len(rows), payload=encode_rows(POMODORO_COLUMNS, rows),
+    )
+    DailyRollup.objects.bulk_create([
+        DailyRollup(user=user, kind='pomodoro', date=day, minutes=minutes,
+                    break_minutes=breaks, cycles=cycles, count=count)
+        for day, (minutes, breaks, cycles, count) in totals.items()
+    ])
+    _delete(queryset, [row[0] for row in rows])
+    return len(rows)
+
+
+def archive_user(user, cutoff, log=None):
+    """Archive ``user``'s rows dated before ``cutoff``; returns (time entries, pomodoro sessions) moved"""
+    entries = sessions = 0
+    using = router.db_for_write(TimeEntry)
+    for month in TimeEntry.objects.filter(user=user, date__lt=cutoff).dates('date', 'month'):
+        with transaction.atomic(using=using):
+            entries += _archive_time_entry_month(user, month, cutoff)
+
+    cutoff_dt = datetime.combine(cutoff, time.min, tzinfo=dt_timezone.utc)
+    tz = user_timezone(user)
+    for month in PomodoroSession.objects.filter(user=user, start_time__lt=cutoff_dt).datetimes('start_time', 'month'):
+        with transaction.atomic(using=using):
+            sessions += _archive_pomodoro_month(user, month.date(), cutoff_dt, tz)
+    if log and (entries or sessions):
+        log(f'{user.email}: archived {entries} time entries and {sessions} pomodoro sessions')
+    return entries, sessions
+
+
+def table_size(table, using=DEFAULT_DB_ALIAS):
+    """On-disk size of ``table`` in bytes including indexes, or None if the backend cannot tell"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT pg_total_relation_size(to_regclass(%s))", [table])
+            return cursor.fetchone()[0]
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name = %s OR name IN"
+                    " (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+                    [table, table],
+                )
+            except DatabaseError:
+                # dbstat is an optional SQLite build feature
+                return None
+            return cursor.fetchone()[0]
+    return None
+
+
+def reclaim_space(tables, using=DEFAULT_DB_ALIAS):
+    """Let the database reuse (PostgreSQL) or release (SQLite) space freed by archiving"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for table in tables:
+                cursor.execute(f"VACUUM (ANALYZE) {table}")
+        elif connection.vendor == 'sqlite':
+            cursor.execute("VACUUM")
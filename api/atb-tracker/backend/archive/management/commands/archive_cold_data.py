@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from archive.archiver import archive_user, reclaim_space, table_size
+from atb_tracker.sharding import shard_aliases, sharding_enabled, use_shard
+from users.models import Member
+
+HOT_TABLES = ['projects_timeentry', 'pomodoro_pomodorosession']
+
+
+class Command(BaseCommand):
+    help = 'Move time entries and pomodoro sessions older than ARCHIVE_AFTER_DAYS into the compressed archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                            help='Archive rows dated before this many days ago')
+        parser.add_argument('--user', help='Only archive this user (email)')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='VACUUM afterwards so the freed space is reused or released')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now().date() - timedelta(days=options['older_than_days'])
+        cutoff_dt = timezone.now() - timedelta(days=options['older_than_days'])
+        entries = sessions = 0
+        for alias in shard_aliases():
+            # Members are mirrored onto their shard, so the join finds who has old rows there
+            users = Member.objects.using(alias).filter(
+                Q(time_entries__date__lt=cutoff) | Q(pomodoro_sessions__start_time__lt=cutoff_dt)
+            ).distinct().order_by('id')
+            if options['user']:
+                users = users.filter(email=options['user'])
+
+            sizes_before = {table: table_size(table, alias) for table in HOT_TABLES}
+            with use_shard(alias):
+                for user in users.iterator():
+                    user_entries, user_sessions = archive_user(user, cutoff, log=self.stdout.write)
+                    entries += user_entries
+                    sessions += user_sessions
+
+            if options['vacuum']:
+                reclaim_space(HOT_TABLES, alias)
+            for table in HOT_TABLES:
+                before, after = sizes_before[table], table_size(table, alias)
+                if before is not None and after is not None:
+                    prefix = f'{alias}: ' if sharding_enabled() else ''
+                    self.stdout.write(f'{prefix}{table}: {before / 1024:.0f} KiB -> {after / 1024:.0f} KiB')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {entries} time entries and {sessions} pomodoro sessions dated before {cutoff}'
+        ))
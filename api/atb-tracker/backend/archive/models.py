@@ -0,0 +1,45 @@
+from django.db import models
+from users.models import Member
+from projects.models import Project
+
+KIND_CHOICES = [('timeentry', 'Time entry'), ('pomodoro', 'Pomodoro session')]
+
+
+class ArchiveBatch(models.Model):
+    """Rows moved out of a hot table, stored as zlib-compressed column-oriented JSON"""
+    user = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='archive_batches')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    row_count = models.IntegerField()
+    payload = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'kind', 'start_date', 'end_date'], name='archive_batch_range_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} archive {self.start_date} - {self.end_date} ({self.row_count} rows)"
+
+
+class DailyRollup(models.Model):
+    """Per-day totals of archived rows, kept queryable for reports"""
+    user = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='daily_rollups')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    date = models.DateField()
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_rollups')
+    minutes = models.IntegerField(default=0)
+    billable_minutes = models.IntegerField(default=0)
+    break_minutes = models.IntegerField(default=0)
+    cycles = models.IntegerField(default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'kind', 'date'], name='archive_rollup_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} rollup {self.date} ({self.minutes} min)"
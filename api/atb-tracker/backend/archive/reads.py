@@ -0,0 +1,67 @@
+"""
+Reads that span both storage tiers.
+
+Hot rows come from the live tables and archived rows from ``ArchiveBatch``
+payloads overlapping the requested dates; both are returned in the same
+JSON-ready shape with an ``archived`` flag.
+"""
+from django.db.models import Sum
+
+from pomodoro.models import PomodoroSession
+from projects.models import TimeEntry
+
+from .archiver import POMODORO_COLUMNS, TIME_ENTRY_COLUMNS, json_value, decode_rows
+from .models import ArchiveBatch, DailyRollup
+
+
+def _archived(user, kind, start, end, day_of):
+    batches = ArchiveBatch.objects.filter(
+        user=user, kind=kind, start_date__lte=end, end_date__gte=start
+    ).order_by('start_date', 'id').values_list('payload', flat=True)
+    first, last = start.isoformat(), end.isoformat()
+    return [
+        {**row, 'archived': True}
+        for payload in batches
+        for row in decode_rows(payload)
+        if first <= day_of(row) <= last
+    ]
+
+
+def _hot(queryset, columns):
+    return [
+        {**{column: json_value(value) for column, value in zip(columns, row)}, 'archived': False}
+        for row in queryset.values_list(*columns)
+    ]
+
+
+def time_entries_between(user, start, end):
+    """All of ``user``'s time entries dated ``start``..``end`` from both tiers"""
+    hot = _hot(
+        TimeEntry.objects.filter(user=user, date__gte=start, date__lte=end).order_by('date', 'start_time', 'id'),
+        TIME_ENTRY_COLUMNS,
+    )
+    archived = _archived(user, 'timeentry', start, end, lambda row: row['date'])
+    return sorted(archived + hot, key=lambda row: (row['date'], row['start_time'], row['id']))
+
+
+def pomodoro_sessions_between(user, start, end):
+    """All of ``user``'s pomodoro sessions started on UTC days ``start``..``end`` from both tiers"""
+    hot = _hot(
+        PomodoroSession.objects.filter(
+            user=user, start_time__date__gte=start, start_time__date__lte=end
+        ).order_by('start_time', 'id'),
+        POMODORO_COLUMNS,
+    )
+    archived = _archived(user, 'pomodoro', start, end, lambda row: row['start_time'][:10])
+    return sorted(archived + hot, key=lambda row: (row['start_time'], row['id']))
+
+
+def archived_time_rollups(user_ids, start, end):
+    """(user_id, date, minutes, billable_minutes) rows of archived time entries per user and day"""
+    return (
+        DailyRollup.objects
+        .filter(kind='timeentry', user_id__in=user_ids, date__gte=start, date__lte=end)
+        .values_list('user_id', 'date')
+        .annotate(minutes=Sum('minutes'), billable=Sum('billable_minutes'))
+        .order_by()
+    )
@@ -0,0 +1,117 @@
+from datetime import date, datetime, time, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from pomodoro.models import PomodoroSession
+from projects.models import Client, Project, TimeEntry
+from users.models import Member
+from users.utils import get_tokens_for_user
+
+from .archiver import archive_user, decode_rows
+from .models import ArchiveBatch, DailyRollup
+
+
+class ArchiveTests(TestCase):
+    """archive_user moves old rows into batches and rollups; reads spanning both tiers count each row once"""
+
+    cutoff = date(2021, 1, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user(
+            'archive@example.com', 'archive-password', first_name='Arch', rate=Decimal('120.00'), cost=Decimal('45.00'),
+        )
+        client = Client.objects.create(name='Old client', currency='EUR', user=cls.user)
+        cls.project = Project.objects.create(name='Old project', client=client, user=cls.user)
+        rows = [
+            (date(2020, 1, 6), time(9, 0), 60, True),
+            (date(2020, 1, 6), time(11, 0), 30, False),
+            (date(2020, 1, 7), time(9, 0), 45, True),
+            (date(2020, 2, 3), time(9, 0), 90, True),
+            (date(2026, 3, 2), time(9, 0), 15, True),
+        ]
+        for day, start_time, duration, billable in rows:
+            TimeEntry.objects.create(
+                project=cls.project, description=f'Work on {day}', date=day, start_time=start_time,
+                end_time=start_time, duration=duration, billable=billable, user=cls.user,
+            )
+        started = datetime(2020, 1, 6, 8, 0, tzinfo=dt_timezone.utc)
+        PomodoroSession.objects.create(
+            start_time=started, end_time=started.replace(minute=25), duration=25, break_duration=5, cycles=1,
+            user=cls.user,
+        )
+
+    def setUp(self):
+        # Throttle buckets and per-user cached reads outlive each test's transaction
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def counters(self):
+        project = Project.objects.select_related('client').get(pk=self.project.pk)
+        return project.total_minutes, project.billable_minutes, project.client.total_minutes
+
+    def test_archiving_moves_rows_into_batches_and_rollups(self):
+        counters = self.counters()
+
+        self.assertEqual(archive_user(self.user, self.cutoff), (4, 1))
+
+        self.assertEqual(list(TimeEntry.objects.filter(user=self.user).values_list('date', flat=True)),
+                         [date(2026, 3, 2)])
+        self.assertFalse(PomodoroSession.objects.filter(user=self.user).exists())
+        batches = ArchiveBatch.objects.filter(user=self.user, kind='timeentry').order_by('start_date')
+        self.assertEqual(
+            [(batch.start_date, batch.end_date, batch.row_count) for batch in batches],
+            [(date(2020, 1, 6), date(2020, 1, 7), 3), (date(2020, 2, 3), date(2020, 2, 3), 1)],
+        )
+        self.assertEqual([row['duration'] for row in decode_rows(batches[0].payload)], [60, 30, 45])
+        rollups = DailyRollup.objects.filter(user=self.user, kind='timeentry').order_by('date')
+        self.assertEqual(
+            [(rollup.date, rollup.minutes, rollup.billable_minutes, rollup.count) for rollup in rollups],
+            [(date(2020, 1, 6), 90, 60, 2), (date(2020, 1, 7), 45, 45, 1), (date(2020, 2, 3), 90, 90, 1)],
+        )
+        pomodoro = DailyRollup.objects.get(user=self.user, kind='pomodoro')
+        self.assertEqual((pomodoro.minutes, pomodoro.break_minutes, pomodoro.cycles), (25, 5, 1))
+        # Archived entries still count towards their project and client
+        self.assertEqual(self.counters(), counters)
+
+    def test_archiving_twice_moves_nothing(self):
+        archive_user(self.user, self.cutoff)
+        self.assertEqual(archive_user(self.user, self.cutoff), (0, 0))
+        self.assertEqual(ArchiveBatch.objects.filter(user=self.user).count(), 3)
+
+    def test_cutoff_inside_a_month(self):
+        self.assertEqual(archive_user(self.user, date(2020, 1, 7)), (2, 1))
+        self.assertEqual(TimeEntry.objects.filter(user=self.user).count(), 3)
+
+    def test_export_reads_both_tiers_once(self):
+        url = '/api/projects/time-entries/export/?start=2020-01-01&end=2026-12-31'
+        before = self.client.get(url).json()
+
+        archive_user(self.user, self.cutoff)
+        after = self.client.get(url).json()
+
+        self.assertEqual([row['archived'] for row in after], [True] * 4 + [False])
+        strip = lambda rows: [{key: value for key, value in row.items() if key != 'archived'} for row in rows]
+        self.assertEqual(strip(after), strip(before))
+
+    def test_export_of_archived_days_only(self):
+        archive_user(self.user, self.cutoff)
+        rows = self.client.get('/api/projects/time-entries/export/?start=2020-01-07&end=2020-02-03').json()
+        self.assertEqual([row['date'] for row in rows], ['2020-01-07', '2020-02-03'])
+
+    def test_billing_summary_reads_both_tiers_once(self):
+        url = '/api/projects/billing/summary/?start=2020-01-01&end=2026-12-31'
+        before = self.client.get(url).json()
+
+        archive_user(self.user, self.cutoff)
+        after = self.client.get(url).json()
+
+        self.assertEqual(after, before)
+        (eur,) = after['currencies']
+        self.assertEqual((eur['currency'], eur['minutes'], eur['billable_minutes']), ('EUR', 240, 210))
+        self.assertEqual(eur['revenue'], '420.00')
+        self.assertEqual(eur['cost'], '180.00')
@@ -0,0 +1,180 @@
+"""
+Batch requests: several API calls in one HTTP round trip.
+
+``POST /api/batch/`` takes ``{"requests": [{"method", "path", "body", "headers"}, ...]}``
+and answers ``{"responses": [{"status", "headers", "body"}, ...]}`` in the same order.
+The batch is authenticated once; every sub-request is resolved with the URL
+resolver and handed straight to its view with that user forced, skipping the
+middleware stack (which is a pass-through for API paths anyway, see
+``atb_tracker.middleware``). Views still run their own permission checks and
+throttles, so a batch spends the same rate-limit tokens as the separate calls.
+
+Sub-requests run in order. With ``"parallel": true`` they run concurrently on a
+small thread pool, each thread on its own database connection; such a batch may
+only hold GETs, since nothing would order a write before the reads that follow it.
+Each item runs in a copy of the batch thread's context, so the active shard
+(``atb_tracker.sharding``) routes its queries as it would the batch's own.
+"""
+import contextvars
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+# Sub-request headers a client may set; everything else comes from the batch request
+FORWARDED_HEADERS = ('If-Match', 'If-None-Match', 'If-Modified-Since', 'Accept-Language')
+RETURNED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Location', 'Retry-After')
+# Taken from the batch request so throttles, hosts and schemes see the real client
+INHERITED_META = (
+    'REMOTE_ADDR', 'HTTP_X_FORWARDED_FOR', 'HTTP_HOST', 'SERVER_NAME', 'SERVER_PORT',
+    'SERVER_PROTOCOL', 'SCRIPT_NAME', 'HTTP_USER_AGENT', 'HTTP_ORIGIN',
+)
+
+
+class BatchItemError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def _error(status_code, message):
+    return {'status': status_code, 'headers': {}, 'body': {'error': message}}
+
+
+def build_subrequest(request, item):
+    """Build the Django request for one batch item; raises BatchItemError when it is malformed"""
+    if not isinstance(item, dict):
+        raise BatchItemError(status.HTTP_400_BAD_REQUEST, 'Each request must be an object')
+    method = str(item.get('method', 'GET')).upper()
+    if method not in BATCH_METHODS:
+        raise BatchItemError(status.HTTP_405_METHOD_NOT_ALLOWED, f'Method {method} is not allowed in a batch')
+    url = urlsplit(str(item.get('path', '')))
+    if not url.path.startswith(tuple(settings.SESSIONLESS_PATH_PREFIXES)):
+        raise BatchItemError(status.HTTP_400_BAD_REQUEST, 'Only API paths can be batched')
+
+    body = item.get('body')
+    data = b'' if body is None else json.dumps(body).encode()
+    environ = {key: request.META[key] for key in INHERITED_META if key in request.META}
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(data)),
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.input': BytesIO(data),
+        'wsgi.url_scheme': request.scheme,
+    })
+    headers = item.get('headers') or {}
+    if not isinstance(headers, dict):
+        raise BatchItemError(status.HTTP_400_BAD_REQUEST, 'headers must be an object')
+    for name, value in headers.items():
+        if name.title() in FORWARDED_HEADERS:
+            environ['HTTP_' + name.upper().replace('-', '_')] = str(value)
+
+    subrequest = WSGIRequest(environ)
+    # Picked up by DRF's Request in place of the authentication classes
+    subrequest._force_auth_user = request.user
+    subrequest._force_auth_token = request.auth
+    # Forced authentication skips CustomJWTAuthentication; share the batch's user context
+    if hasattr(request, 'user_context'):
+        subrequest.user_context = request.user_context
+    return subrequest
+
+
+def _body(response):
+    content = b''.join(response.streaming_content) if response.streaming else response.content
+    if not content:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(content)
+    return content.decode(response.charset or 'utf-8', errors='replace')
+
+
+def dispatch(request, item):
+    """Run one batch item through its view and return ``{"status", "headers", "body"}``"""
+    try:
+        subrequest = build_subrequest(request, item)
+        match = resolve(subrequest.path_info)
+    except BatchItemError as exc:
+        return _error(exc.status_code, exc.message)
+    except Resolver404:
+        return _error(status.HTTP_404_NOT_FOUND, 'Not found')
+    if getattr(match.func, 'cls', None) is BatchView:
+        return _error(status.HTTP_400_BAD_REQUEST, 'Batches cannot be nested')
+
+    subrequest.resolver_match = match
+    try:
+        response = match.func(subrequest, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return {
+            'status': response.status_code,
+            'headers': {name: response[name] for name in RETURNED_HEADERS if response.has_header(name)},
+            'body': _body(response),
+        }
+    except Exception:
+        logger.exception('Batch sub-request %s %s failed', subrequest.method, subrequest.get_full_path())
+        return _error(status.HTTP_500_INTERNAL_SERVER_ERROR, 'Internal server error')
+
+
+def _is_read(item):
+    return isinstance(item, dict) and str(item.get('method', 'GET')).upper() == 'GET'
+
+
+def _dispatch_in_thread(request, item):
+    try:
+        return dispatch(request, item)
+    finally:
+        # Worker threads open their own connections; do not leave them behind
+        connections.close_all()
+
+
+class BatchView(APIView):
+    """Run up to ``BATCH_MAX_REQUESTS`` API calls in one request (see the module docstring)"""
+    permission_classes = [IsAuthenticated]
+    # Every sub-request is throttled by its own view
+    throttle_classes = []
+
+    def post(self, request):
+        items = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({"error": "requests must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.BATCH_MAX_REQUESTS:
+            return Response({"error": f"A batch is limited to {settings.BATCH_MAX_REQUESTS} requests"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        parallel = bool(request.data.get('parallel'))
+        if parallel and not all(_is_read(item) for item in items):
+            return Response({"error": "parallel batches may only contain GET requests"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Threads cannot see an open transaction's uncommitted writes
+        if parallel and len(items) > 1 and not any(
+            conn.in_atomic_block for conn in connections.all(initialized_only=True)
+        ):
+            workers = min(len(items), settings.BATCH_MAX_WORKERS)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Context variables do not cross into pool threads; copy them here, per item
+                futures = [
+                    executor.submit(contextvars.copy_context().run, _dispatch_in_thread, request, item)
+                    for item in items
+                ]
+                responses = [future.result() for future in futures]
+        else:
+            responses = [dispatch(request, item) for item in items]
+        return Response({'responses': responses})
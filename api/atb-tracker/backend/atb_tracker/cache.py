@@ -0,0 +1,41 @@
+"""
+Per-user cache namespaces with versioned invalidation.
+
+Cached values are stored under keys that embed a per-user version number.
+Invalidating a namespace bumps the version, so stale entries are never read
+again and simply expire.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(namespace, user_id):
+    return f'{namespace}:version:{user_id}'
+
+
+def user_cache_version(namespace, user_id):
+    """Return the current version of ``namespace`` for ``user_id``"""
+    key = _version_key(namespace, user_id)
+    version = cache.get(key)
+    if version is None:
+        # A fresh, time-based version cannot collide with entries cached before eviction
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def user_cache_key(namespace, user_id, *parts):
+    """Build a cache key for ``user_id`` that changes whenever the namespace is invalidated"""
+    version = user_cache_version(namespace, user_id)
+    suffix = ':'.join(str(part) for part in parts)
+    return f'{namespace}:{user_id}:{version}:{suffix}'
+
+
+def invalidate_user_cache(namespace, user_id):
+    """Invalidate every entry cached in ``namespace`` for ``user_id``"""
+    key = _version_key(namespace, user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
@@ -0,0 +1,164 @@
+"""
+HTTP conditional requests (ETag / Last-Modified) for list and detail views.
+
+Validators come from ``updated_at`` instead of the rendered body. A list's version
+is ``MAX(updated_at)`` plus the row count of the scoped queryset (the count notices
+deletions, which leave no timestamp behind); a detail's is the object's own
+``updated_at``. Each is a single aggregate query, so a matching ``If-None-Match``
+is answered with 304 before anything is loaded or serialized.
+
+Representations that embed other rows rely on those rows' writes moving their
+``updated_at``: projects embed their client (with its counters) and tags, so
+``projects.signals`` and ``projects.counters`` touch the affected projects when a
+client or tag is edited or deleted, a project is re-tagged, or a client total moves.
+
+ETags look like ``"<version>-<variant>"``: the variant covers the query string
+(sparse fieldsets, filters) and the negotiated media type, so each representation
+gets its own strong tag. ``If-Match`` on PUT/PATCH/DELETE only compares the version
+part, which gives optimistic concurrency whichever representation the client saw.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+UNSAFE_UPDATE_METHODS = ('PUT', 'PATCH', 'DELETE')
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource has changed since it was fetched; reload it and try again.'
+    default_code = 'precondition_failed'
+
+
+def _digest(*parts, length=16):
+    return hashlib.blake2b('|'.join(str(part) for part in parts).encode(), digest_size=length // 2).hexdigest()
+
+
+def _opaque(etag):
+    # CompressionMiddleware weakens our tags when it re-encodes the body; the
+    # representation before content coding is the same, so W/ is ignored here
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+class ConditionalRequestMixin:
+    """
+    Generic view mixin adding ETag/Last-Modified validators to ``list`` and ``retrieve``
+    and ``If-Match`` checks to updates and deletes.
+
+    Views whose object is not addressed by the URL (the caller's own profile)
+    override ``object_version``.
+    """
+    version_field = 'updated_at'
+
+    def list_version(self, queryset):
+        """(last modified, version token) of ``queryset``"""
+        stats = queryset.prefetch_related(None).order_by().aggregate(
+            last=Max(self.version_field), count=Count('pk'),
+        )
+        return stats['last'], f"{stats['count']}:{stats['last'] and stats['last'].isoformat()}"
+
+    def object_version(self):
+        """(last modified, version token) of the addressed object, or None when it does not exist"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg not in self.kwargs:
+            return None
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).order_by()
+        try:
+            rows = list(
+                queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+                .values_list(self.version_field, flat=True)[:1]
+            )
+        except (TypeError, ValueError, ValidationError):
+            return None
+        if not rows:
+            return None
+        last = rows[0]
+        return last, last and last.isoformat()
+
+    def _version_tag(self, kind, token):
+        return _digest(self.__class__.__name__, kind, self.request.user.pk, token)
+
+    def _etag(self, version_tag):
+        variant = _digest(
+            self.request.META.get('QUERY_STRING', ''), getattr(self.request, 'accepted_media_type', ''), length=8,
+        )
+        return f'"{version_tag}-{variant}"'
+
+    def _stamp(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        # Clients keep the body but revalidate it on every use
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def _not_modified(self, etag, last_modified, check_modified_since):
+        request = self.request
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            tags = parse_etags(if_none_match)
+            matched = tags == ['*'] or etag in {_opaque(tag) for tag in tags}
+        elif check_modified_since and last_modified is not None:
+            since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+            matched = since is not None and int(last_modified.timestamp()) <= since
+        else:
+            matched = False
+        if matched:
+            return self._stamp(HttpResponseNotModified(), etag, last_modified)
+        return None
+
+    def list(self, request, *args, **kwargs):
+        last_modified, token = self.list_version(self.filter_queryset(self.get_queryset()))
+        etag = self._etag(self._version_tag('list', token))
+        # If-Modified-Since is not honoured for lists: deleting an older row
+        # changes the list without moving MAX(updated_at)
+        not_modified = self._not_modified(etag, last_modified, check_modified_since=False)
+        if not_modified is not None:
+            return not_modified
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            self._stamp(response, etag, last_modified)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        version = self.object_version()
+        if version is None:
+            return super().retrieve(request, *args, **kwargs)
+        last_modified, token = version
+        etag = self._etag(self._version_tag('object', token))
+        not_modified = self._not_modified(etag, last_modified, check_modified_since=True)
+        if not_modified is not None:
+            return not_modified
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            self._stamp(response, etag, last_modified)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if_match = request.META.get('HTTP_IF_MATCH')
+        if request.method not in UNSAFE_UPDATE_METHODS or not if_match:
+            return
+        version = self.object_version()
+        if version is None:
+            # Missing objects get the view's usual 404
+            return
+        tags = parse_etags(if_match)
+        current = self._version_tag('object', version[1])
+        if tags != ['*'] and current not in {_opaque(tag).strip('"').split('-')[0] for tag in tags}:
+            raise PreconditionFailed()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # Hand back the new validator so the next update can be conditional too
+        if request.method in ('PUT', 'PATCH') and response.status_code == status.HTTP_200_OK:
+            version = self.object_version()
+            if version is not None:
+                self._stamp(response, self._etag(self._version_tag('object', version[1])), version[0])
+        return response
@@ -0,0 +1,106 @@
+from rest_framework import fields as drf_fields
+from rest_framework import relations
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def _iso_datetime(value):
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _iso(value):
+    return value.isoformat()
+
+
+def _field_converter(field):
+    """
+    Return a callable reproducing ``field.to_representation`` for a raw column value.
+
+    Exact field types with a known ISO representation get a precompiled converter;
+    anything else falls back to the field's own ``to_representation``.
+    """
+    field_type = type(field)
+
+    if field_type is drf_fields.DateTimeField:
+        if getattr(field, 'format', api_settings.DATETIME_FORMAT) != drf_fields.ISO_8601:
+            return field.to_representation
+        tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if tz is None:
+            return _iso_datetime
+        return lambda value: _iso_datetime(value.astimezone(tz))
+    if field_type is drf_fields.DateField:
+        if getattr(field, 'format', api_settings.DATE_FORMAT) != drf_fields.ISO_8601:
+            return field.to_representation
+        return _iso
+    if field_type is drf_fields.TimeField:
+        if getattr(field, 'format', api_settings.TIME_FORMAT) != drf_fields.ISO_8601:
+            return field.to_representation
+        return _iso
+    if field_type is drf_fields.IntegerField:
+        return int
+    if field_type is drf_fields.BooleanField:
+        return bool
+    if field_type is drf_fields.CharField:
+        return str
+    if field_type is relations.PrimaryKeyRelatedField and field.pk_field is None:
+        # values_list() already yields the foreign key column
+        return None
+    return field.to_representation
+
+
+def compile_row_converter(serializer):
+    """
+    Build ``(columns, convert)`` for the readable fields of ``serializer``.
+
+    ``columns`` are passed to ``values_list()`` and ``convert`` turns each row into
+    the same dict the serializer would produce. Returns None when a field cannot
+    be read straight from a column (method fields, nested serializers, dotted sources).
+    """
+    names = []
+    columns = []
+    converters = []
+    for field in serializer._readable_fields:
+        if isinstance(field, (drf_fields.SerializerMethodField, relations.ManyRelatedField)):
+            return None
+        if not hasattr(field, 'to_representation') or hasattr(field, 'fields'):
+            return None
+        if field.source == '*' or '.' in field.source:
+            return None
+        names.append(field.field_name)
+        columns.append(field.source)
+        converters.append(_field_converter(field))
+
+    plan = tuple(zip(names, converters))
+
+    def convert(row):
+        return {
+            name: value if value is None or converter is None else converter(value)
+            for (name, converter), value in zip(plan, row)
+        }
+
+    return columns, convert
+
+
+class ValuesListFastPathMixin:
+    """
+    List mixin that renders GET responses from ``values_list()`` rows.
+
+    Rows skip model instantiation and the per-field serializer machinery, but the
+    output matches the serializer's representation. Paginated views and serializers
+    with computed or nested fields use the regular serializer path.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+
+        plan = compile_row_converter(self.get_serializer())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        columns, convert = plan
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response([convert(row) for row in queryset.values_list(*columns)])
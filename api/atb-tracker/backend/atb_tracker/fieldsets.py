@@ -0,0 +1,102 @@
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def parse_list_param(request, name):
+    """Return the comma separated values of a query parameter, or None if absent"""
+    if request is None or request.method != 'GET':
+        return None
+    raw = request.query_params.get(name)
+    if raw is None:
+        return None
+    return [value.strip() for value in raw.split(',') if value.strip()]
+
+
+def requested_fieldset(request):
+    """Return the (fields, expand) pair requested through ``?fields=`` / ``?expand=``"""
+    fields = parse_list_param(request, 'fields')
+    expand = parse_list_param(request, 'expand') or []
+    if fields is not None:
+        # Expanding a relation implies selecting it
+        fields = list(dict.fromkeys(fields + expand))
+    return fields, set(expand)
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Serializer mixin that trims the representation to ``?fields=`` on GET requests.
+
+    Relations listed in ``sparse_relations`` are rendered nested only when they are
+    also named in ``?expand=``; otherwise they collapse to primary keys. Without a
+    ``fields`` parameter the full representation is returned unchanged.
+    """
+
+    # Map of relation field name -> 'select' (foreign key) or 'prefetch' (many-to-many)
+    sparse_relations = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = requested_fieldset(self.context.get('request'))
+        if fields is None:
+            return
+
+        allowed = set(fields)
+        for name in list(self.fields):
+            if name not in allowed:
+                self.fields.pop(name)
+
+        for name, kind in self.sparse_relations.items():
+            if name in self.fields and name not in expand:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True, many=(kind == 'prefetch')
+                )
+
+
+def sparse_queryset(queryset, serializer_class, request):
+    """
+    Shape ``queryset`` for the fieldset requested on ``request``.
+
+    Selected columns are loaded with ``.only()``, and relations are joined or
+    prefetched only when they are part of the response.
+    """
+    relations = getattr(serializer_class, 'sparse_relations', {})
+    fields, expand = requested_fieldset(request)
+
+    if fields is None:
+        # Full representation: load nested relations up front instead of per row
+        for name, kind in relations.items():
+            if kind == 'select':
+                queryset = queryset.select_related(name)
+            else:
+                queryset = queryset.prefetch_related(name)
+        return queryset
+
+    model = queryset.model
+    concrete = {field.name for field in model._meta.concrete_fields}
+    columns = [name for name in fields if name in concrete]
+    queryset = queryset.only(model._meta.pk.name, *columns)
+
+    for name, kind in relations.items():
+        if name not in fields:
+            continue
+        if kind == 'select':
+            if name in expand:
+                queryset = queryset.select_related(name)
+        elif name in expand:
+            queryset = queryset.prefetch_related(name)
+        else:
+            related_model = model._meta.get_field(name).related_model
+            queryset = queryset.prefetch_related(
+                Prefetch(name, queryset=related_model.objects.only(related_model._meta.pk.name))
+            )
+    return queryset
+
+
+class SparseFieldsetViewMixin:
+    """View mixin that narrows the queryset to the requested fieldset on GET requests"""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        return sparse_queryset(queryset, self.get_serializer_class(), self.request)
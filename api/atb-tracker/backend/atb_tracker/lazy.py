@@ -0,0 +1,26 @@
+"""
+Deferred imports for heavy modules that only a few endpoints use.
+
+``np = lazy_module('numpy')`` keeps numpy out of process start-up; it is
+imported the first time an attribute is looked up, by the first request that
+actually needs it.
+"""
+import importlib
+
+
+class LazyModule:
+    def __init__(self, name):
+        self.__dict__['_lazy_name'] = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._lazy_name)
+        # Later lookups hit the instance dict directly
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f'<lazy module {self._lazy_name!r}>'
+
+
+def lazy_module(name):
+    return LazyModule(name)
@@ -0,0 +1,132 @@
+import re
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from .sharding import activate_shard, deactivate_shard
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+re_accepts_brotli = re.compile(r'\bbr\b')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses with Brotli when the client accepts it, gzip otherwise.
+
+    Bodies smaller than ``COMPRESSION_MIN_SIZE`` bytes are sent as-is, and paths
+    under ``COMPRESSION_EXCLUDE_PREFIXES`` (token-bearing auth responses) are never
+    compressed. Streaming responses are compressed chunk by chunk.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        if request.path.startswith(tuple(settings.COMPRESSION_EXCLUDE_PREFIXES)):
+            return response
+
+        ae = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is None or not re_accepts_brotli.search(ae):
+            return super().process_response(request, response)
+
+        if response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if response.streaming:
+            if response.is_async:
+                original_iterator = response.streaming_content
+
+                async def brotli_wrapper():
+                    compressor = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+                    async for chunk in original_iterator:
+                        data = compressor.process(chunk) + compressor.flush()
+                        if data:
+                            yield data
+                    yield compressor.finish()
+
+                response.streaming_content = brotli_wrapper()
+            else:
+                response.streaming_content = self.compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed_content = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+    def compress_sequence(self, sequence):
+        compressor = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+        for chunk in sequence:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+class ShardMiddleware:
+    """Start every request on ``default`` and forget the shard the request was routed to"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = activate_shard(None)
+        try:
+            return self.get_response(request)
+        finally:
+            deactivate_shard(token)
+
+
+def is_sessionless(request):
+    return request.path_info.startswith(settings.SESSIONLESS_PATH_PREFIXES)
+
+
+class BrowserOnlyMiddlewareMixin:
+    """
+    Skip a browser-session layer for paths under ``SESSIONLESS_PATH_PREFIXES``.
+
+    The API authenticates with JWTs only, so sessions, CSRF, messages and session
+    authentication are dead weight there; ``/admin/`` and other pages keep them.
+    Subclassing the Django classes keeps the admin's middleware checks satisfied.
+    """
+
+    def __call__(self, request):
+        if is_sessionless(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class BrowserSessionMiddleware(BrowserOnlyMiddlewareMixin, SessionMiddleware):
+    pass
+
+
+class BrowserCsrfViewMiddleware(BrowserOnlyMiddlewareMixin, CsrfViewMiddleware):
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_sessionless(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class BrowserAuthenticationMiddleware(BrowserOnlyMiddlewareMixin, AuthenticationMiddleware):
+    pass
+
+
+class BrowserMessageMiddleware(BrowserOnlyMiddlewareMixin, MessageMiddleware):
+    pass
@@ -0,0 +1,107 @@
+import codecs
+
+from django.conf import settings
+from rest_framework import renderers, parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils import encoders, json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - MessagePack is optional
+    msgpack = None
+
+
+# DRF's encoder defines the wire format for Decimal (Member.rate/cost), dates,
+# times, timedeltas and querysets; both fast encoders defer to it for those types.
+_drf_encoder = encoders.JSONEncoder()
+
+
+def _default(value):
+    return _drf_encoder.default(value)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer backed by orjson.
+
+    Produces the same document as DRF's stdlib renderer for everything but
+    floats: datetimes, Decimals, dates and times go through DRF's encoder so
+    their format is unchanged, but orjson writes exponents without a sign or
+    padding (``1e20`` rather than ``1e+20``, ``1e-7`` rather than ``1e-07``) and
+    NaN/Infinity as ``null``. Both parse to the same values. Indented output,
+    ASCII-only output and data orjson cannot encode (integers wider than 64
+    bits) fall back to the stdlib implementation.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            # orjson is stricter than the stdlib (e.g. integers beyond 64 bits)
+            return super().render(data, accepted_media_type, renderer_context)
+        # Keep the output a strict javascript subset, as DRF does
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(parsers.JSONParser):
+    """JSONParser backed by orjson, falling back to the stdlib for inputs orjson rejects"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass
+        # orjson is stricter than the stdlib (e.g. integers beyond 64 bits)
+        try:
+            parse_constant = json.strict_constant if self.strict else None
+            return json.loads(body.decode(encoding), parse_constant=parse_constant)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Renders responses as MessagePack for clients that send ``Accept: application/msgpack``"""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+
+
+class MessagePackParser(parsers.BaseParser):
+    """Parses MessagePack request bodies"""
+
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except Exception as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
+import importlib.util
 import os
 import dj_database_url
 from corsheaders.defaults import default_headers
@@ -52,19 +53,32 @@ INSTALLED_APPS = [
     'users',
     'user_settings',
     'auth_app',
+    'archive',
+    'jobs',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'atb_tracker.middleware.ShardMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'atb_tracker.middleware.CompressionMiddleware',
+    'atb_tracker.middleware.BrowserSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'atb_tracker.middleware.BrowserCsrfViewMiddleware',
+    'atb_tracker.middleware.BrowserAuthenticationMiddleware',
+    'atb_tracker.middleware.BrowserMessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+# The JWT-only API skips the session, CSRF, session-auth and message middleware; /admin/ keeps them
+SESSIONLESS_PATH_PREFIXES = ('/api/',)
+# CSRF protection is BrowserCsrfViewMiddleware, which the deploy check does not recognise
+SILENCED_SYSTEM_CHECKS = ['security.W003']
+
+# Response compression (Brotli when installed, gzip otherwise)
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_EXCLUDE_PREFIXES = ['/api/auth/', '/api/users/login/', '/api/users/token/']
+BROTLI_QUALITY = 4
 
 CORS_ALLOW_ALL_ORIGINS = False
 CORS_ALLOWED_ORIGINS = [
@@ -74,6 +88,8 @@ CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS = list(default_headers) + [
     'authorization',
 ]
+# Lets the frontend read how long to back off after a 429
+CORS_EXPOSE_HEADERS = ['Retry-After']
 
 ROOT_URLCONF = 'atb_tracker.urls'
 
@@ -94,16 +110,57 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'atb_tracker.wsgi.application'
 
+# Fill URL, serializer and connection caches when the app loads instead of on the first request
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', 'True').lower() in ('1', 'true', 'yes')
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Seconds a connection is kept open between requests (0 closes it after each request)
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
 DATABASES = {
     'default': dj_database_url.config(
         default=os.environ.get('DATABASE_URL'),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
     )
 }
 
+# User shards: "shard1=postgres://...,shard2=postgres://..." adds databases that
+# users.UserShard can place users on; data of unplaced users stays on default
+SHARD_DATABASES = []
+for _shard in filter(None, os.environ.get('SHARD_DATABASE_URLS', '').split(',')):
+    _alias, _url = (part.strip() for part in _shard.split('=', 1))
+    DATABASES[_alias] = dj_database_url.parse(_url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True)
+    SHARD_DATABASES.append(_alias)
+DATABASE_ROUTERS = ['atb_tracker.sharding.ShardRouter']
+# SQLite (local runs): take the write lock when a transaction starts, so concurrent job
+# threads and processes wait for each other instead of failing with "database is locked"
+for _database in DATABASES.values():
+    if _database.get('ENGINE') == 'django.db.backends.sqlite3':
+        _database.setdefault('OPTIONS', {}).setdefault('transaction_mode', 'IMMEDIATE')
+# Where new users are placed: "least-loaded" shard, or a fixed alias such as "default"
+SHARD_PLACEMENT = os.environ.get('SHARD_PLACEMENT', 'least-loaded')
+
+
+# Cache
+# Set REDIS_URL to share cached data and invalidations between worker processes
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -153,7 +210,64 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom User Model
 AUTH_USER_MODEL = 'users.Member'
 
-# JWT Settings
+# Billing
+BILLING_DEFAULT_CURRENCY = 'USD'
+
+# Reject time entries that overlap another entry of the same user
+TIME_ENTRIES_ALLOW_OVERLAP = os.environ.get('TIME_ENTRIES_ALLOW_OVERLAP', 'False').lower() == 'true'
+
+# Monthly PostgreSQL partitioning of projects_timeentry (see partition_time_entries)
+TIME_ENTRY_PARTITIONING = os.environ.get('TIME_ENTRY_PARTITIONING', 'False').lower() == 'true'
+TIME_ENTRY_PARTITION_MONTHS_AHEAD = 3
+
+# Time entries and pomodoro sessions older than this are moved to the archive tier
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 365))
+
+# Focus analytics look for streaks this many days before today, on top of the requested window
+POMODORO_STREAK_LOOKBACK_DAYS = int(os.environ.get('POMODORO_STREAK_LOOKBACK_DAYS', 365))
+
+# Dashboard bootstrap responses are invalidated on writes; this bounds writes that bypass signals
+DASHBOARD_CACHE_SECONDS = int(os.environ.get('DASHBOARD_CACHE_SECONDS', 300))
+
+# Cached per-user context (profile, settings, timezone); invalidated when the member or profile is saved
+USER_CONTEXT_CACHE_SECONDS = int(os.environ.get('USER_CONTEXT_CACHE_SECONDS', 3600))
+
+# iCalendar feed (users.ical): days of history, how long rendered days are cached (writes
+# invalidate them), and the poll interval suggested to calendar apps
+CALENDAR_FEED_DAYS = int(os.environ.get('CALENDAR_FEED_DAYS', 90))
+CALENDAR_FEED_CACHE_SECONDS = int(os.environ.get('CALENDAR_FEED_CACHE_SECONDS', 24 * 60 * 60))
+CALENDAR_FEED_REFRESH_MINUTES = int(os.environ.get('CALENDAR_FEED_REFRESH_MINUTES', 15))
+
+# POST /api/batch/: sub-requests per batch, and threads for running consecutive GETs concurrently
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 20))
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 4))
+
+# Login password checks: threads hashing at once (0 hashes on the request thread), and
+# how many more logins may wait for one before the rest are answered 503
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 32))
+
+# Background jobs (manage.py runworker): idle polling, retries with exponential backoff,
+# and how long a running job may go without a worker heartbeat before it is requeued
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE_SECONDS = 10
+JOB_RETRY_MAX_SECONDS = 60 * 60
+JOB_STALE_SECONDS = 5 * 60
+
+# Team utilization: capacity assumed for members without parseable work_hours
+TEAM_DEFAULT_DAILY_HOURS = 8
+
+# MessagePack is offered through content negotiation when msgpack is installed
+MSGPACK_ENABLED = importlib.util.find_spec('msgpack') is not None
+
+# Token-bucket rate limits per scope as "<tokens>/<period>" (s, m, h or d, e.g. "60/min" or "10/5m").
+# Members are limited per user, anonymous clients per IP; an empty value turns a scope off
+THROTTLE_RATES = {
+    scope: os.environ.get(f'THROTTLE_{scope.upper()}_RATE', default) or None
+    for scope, default in [('login', '10/min'), ('reads', '300/min'), ('writes', '60/min'), ('exports', '10/min')]
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'users.authentication.CustomJWTAuthentication',
@@ -161,9 +275,25 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'atb_tracker.renderers.FastJSONRenderer',
+        *(['atb_tracker.renderers.MessagePackRenderer'] if MSGPACK_ENABLED else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'atb_tracker.renderers.FastJSONParser',
+        *(['atb_tracker.renderers.MessagePackParser'] if MSGPACK_ENABLED else []),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'atb_tracker.throttling.TokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': THROTTLE_RATES,
 }
 
+# JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -219,6 +349,11 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
+        "jobs": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
         "rest_framework_simplejwt": {
             "handlers": ["console"],
             "level": "INFO",
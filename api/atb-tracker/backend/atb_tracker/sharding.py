@@ -0,0 +1,92 @@
+"""
+User sharding across several databases.
+
+Per-user data (the ``SHARDED_APPS``) lives on one of the aliases in
+``shard_aliases()``; ``users.UserShard`` on ``default`` records which one. Members,
+auth and the directory itself stay on ``default``, with a copy of each member's row
+on their shard so foreign keys hold there.
+
+``CustomJWTAuthentication`` activates the user's shard for the rest of the request
+and ``ShardMiddleware`` clears it afterwards; outside a request ``use_shard`` does
+the same. With no ``SHARD_DATABASE_URLS`` configured everything stays on ``default``.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+SHARDED_APPS = {'projects', 'pomodoro', 'archive', 'user_settings'}
+# Needed on every shard for the mirrored member rows and their foreign keys
+MIRRORED_APPS = {'users', 'auth', 'contenttypes'}
+# Shard n hands out ids from n * SHARD_ID_STRIDE so rows keep their ids when moved
+SHARD_ID_STRIDE = 10 ** 12
+
+_current_shard = ContextVar('atb_current_shard', default=None)
+
+
+class ShardMoving(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Your data is being moved to another database; please retry shortly.'
+    default_code = 'shard_moving'
+    wait = 5
+
+
+def shard_aliases():
+    return [DEFAULT_DB_ALIAS, *settings.SHARD_DATABASES]
+
+
+def sharding_enabled():
+    return bool(settings.SHARD_DATABASES)
+
+
+def current_shard():
+    return _current_shard.get()
+
+
+def activate_shard(alias):
+    return _current_shard.set(alias)
+
+
+def deactivate_shard(token):
+    _current_shard.reset(token)
+
+
+@contextmanager
+def use_shard(alias):
+    """Route sharded models to ``alias`` inside the block"""
+    token = activate_shard(alias)
+    try:
+        yield alias
+    finally:
+        deactivate_shard(token)
+
+
+class ShardRouter:
+    """Send sharded models to the active shard and everything else to ``default``"""
+
+    def _route(self, model):
+        if model._meta.app_label in SHARDED_APPS:
+            return _current_shard.get()
+        return DEFAULT_DB_ALIAS
+
+    def db_for_read(self, model, **hints):
+        return self._route(model)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Members are mirrored onto every shard, so cross-alias user relations are fine
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS:
+            return True
+        if db in settings.SHARD_DATABASES:
+            if app_label == 'users' and model_name == 'usershard':
+                return False
+            return app_label in SHARDED_APPS or app_label in MIRRORED_APPS
+        return None
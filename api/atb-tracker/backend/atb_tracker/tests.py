@@ -0,0 +1,222 @@
+import threading
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from projects.models import Project
+from users.models import Member
+from users.utils import get_tokens_for_user
+
+from .batch import dispatch
+from .throttling import parse_rate
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {**settings.THROTTLE_RATES, **rates},
+    })
+
+
+class ThrottlingTests(TestCase):
+    """Clients over a scope's rate get 429 with Retry-After; the login scope covers every sign-in view"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('throttled@example.com', 'throttled-password', first_name='Throttled')
+        cls.other = Member.objects.create_user('unthrottled@example.com', 'throttled-password', first_name='Other')
+
+    def setUp(self):
+        # Buckets live in the cache, which outlives each test's transaction
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def api(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(user)['access'])
+        return client
+
+    def assertThrottled(self, response, period=60):
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response['Retry-After']) <= 2 * period, response['Retry-After'])
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('60/min'), (60, 60.0))
+        self.assertEqual(parse_rate('10/5m'), (10, 300.0))
+        self.assertEqual(parse_rate('1000/day'), (1000, 86400.0))
+        with self.assertRaises(ValueError):
+            parse_rate('ten per minute')
+
+    @throttle_rates(reads='2/min')
+    def test_reads_over_the_rate_get_429(self):
+        client = self.api(self.user)
+        for _ in range(2):
+            self.assertEqual(client.get('/api/projects/').status_code, 200)
+        self.assertThrottled(client.get('/api/projects/'))
+        # Buckets are per member
+        self.assertEqual(self.api(self.other).get('/api/projects/').status_code, 200)
+
+    @throttle_rates(reads='2/min', writes='1/min')
+    def test_scopes_have_separate_buckets(self):
+        client = self.api(self.user)
+        self.assertEqual(client.post('/api/projects/', {'name': 'Throttled'}, format='json').status_code, 201)
+        self.assertThrottled(client.post('/api/projects/', {'name': 'Again'}, format='json'))
+        self.assertEqual(client.get('/api/projects/').status_code, 200)
+
+    @throttle_rates(exports='1/5m')
+    def test_retry_after_follows_the_period(self):
+        client = self.api(self.user)
+        url = '/api/projects/billing/summary/'
+        self.assertEqual(client.get(url).status_code, 200)
+        response = client.get(url)
+        self.assertThrottled(response, period=300)
+        self.assertGreater(int(response['Retry-After']), 60)
+
+    @throttle_rates(login='2/min')
+    def test_login_scope_covers_password_login(self):
+        client = self.api()
+        credentials = {'email': 'throttled@example.com', 'password': 'wrong-password'}
+        for _ in range(2):
+            self.assertNotEqual(client.post('/api/users/login/', credentials, format='json').status_code, 429)
+        self.assertThrottled(client.post('/api/users/login/', credentials, format='json'))
+        # Even with the right password
+        credentials['password'] = 'throttled-password'
+        self.assertThrottled(client.post('/api/auth/login/', credentials, format='json'))
+
+    @throttle_rates(login='2/min')
+    def test_login_scope_covers_google_sign_in(self):
+        client = self.api()
+        for _ in range(2):
+            self.assertNotEqual(client.post('/api/auth/google/', {}, format='json').status_code, 429)
+        self.assertThrottled(client.post('/api/auth/google/', {}, format='json'))
+        # One bucket per client for all sign-in views
+        self.assertThrottled(client.post('/api/users/login/', {}, format='json'))
+
+    @throttle_rates(login=None)
+    def test_scope_without_rate_is_unlimited(self):
+        client = self.api()
+        for _ in range(15):
+            self.assertNotEqual(client.post('/api/users/login/', {}, format='json').status_code, 429)
+
+
+class BatchTests(TestCase):
+    """POST /api/batch/ runs each sub-request through its view as the batch's user"""
+
+    url = '/api/batch/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('batch@example.com', 'batch-password', first_name='Batch')
+        cls.project = Project.objects.create(name='Batched', user=cls.user)
+        other = Member.objects.create_user('batch-other@example.com', 'batch-password', first_name='Other')
+        cls.foreign = Project.objects.create(name='Not mine', user=other)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def batch(self, *items, **options):
+        response = self.client.post(self.url, {'requests': list(items), **options}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['responses']
+
+    def test_sub_requests_run_in_order(self):
+        created, listed = self.batch(
+            {'method': 'POST', 'path': '/api/projects/', 'body': {'name': 'From a batch'}},
+            {'path': '/api/projects/?fields=name'},
+        )
+        self.assertEqual(created['status'], 201)
+        self.assertEqual(created['body']['name'], 'From a batch')
+        self.assertEqual(listed['status'], 200)
+        self.assertEqual(sorted(row['name'] for row in listed['body']), ['Batched', 'From a batch'])
+        self.assertIn('ETag', listed['headers'])
+
+    def test_sub_requests_act_as_the_batch_user(self):
+        mine, foreign = self.batch(
+            {'path': f'/api/projects/{self.project.pk}/'}, {'path': f'/api/projects/{self.foreign.pk}/'},
+        )
+        self.assertEqual(mine['status'], 200)
+        self.assertEqual(foreign['status'], 404)
+
+    def test_anonymous_batches_are_refused(self):
+        response = APIClient().post(self.url, {'requests': [{'path': '/api/projects/'}]}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_forwarded_conditional_headers(self):
+        (first,) = self.batch({'path': f'/api/projects/{self.project.pk}/'})
+        (repeat,) = self.batch({
+            'path': f'/api/projects/{self.project.pk}/', 'headers': {'If-None-Match': first['headers']['ETag']},
+        })
+        self.assertEqual(repeat['status'], 304)
+        self.assertIsNone(repeat['body'])
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_batch_size_is_capped(self):
+        response = self.client.post(self.url, {'requests': [{'path': '/api/projects/'}] * 3}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.batch(*[{'path': '/api/projects/'}] * 2)), 2)
+
+    def test_malformed_batches_are_refused(self):
+        for data in ({}, {'requests': []}, {'requests': 'GET /api/projects/'}):
+            self.assertEqual(self.client.post(self.url, data, format='json').status_code, 400)
+
+    def test_bad_items_fail_alone(self):
+        responses = self.batch(
+            {'method': 'TRACE', 'path': '/api/projects/'},
+            {'path': '/admin/'},
+            {'path': '/api/nowhere/'},
+            {'method': 'POST', 'path': '/api/batch/', 'body': {'requests': []}},
+            'GET /api/projects/',
+            {'path': '/api/projects/'},
+        )
+        self.assertEqual([item['status'] for item in responses], [405, 400, 404, 400, 400, 200])
+
+    @throttle_rates(reads='2/min')
+    def test_sub_requests_are_throttled_by_their_views(self):
+        responses = self.batch(*[{'path': '/api/projects/'}] * 3)
+        self.assertEqual([item['status'] for item in responses], [200, 200, 429])
+        self.assertIn('Retry-After', responses[2]['headers'])
+
+
+class BatchParallelTests(TransactionTestCase):
+    """With "parallel", the GETs of a batch share a thread pool; batches with writes are refused"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = Member.objects.create_user('parallel@example.com', 'parallel-password', first_name='Parallel')
+        Project.objects.create(name='Read in parallel', user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def test_reads_run_in_the_pool(self):
+        threads = []
+
+        def record(request, item):
+            threads.append(threading.current_thread() is threading.main_thread())
+            return dispatch(request, item)
+
+        with patch('atb_tracker.batch.dispatch', side_effect=record):
+            response = self.client.post('/api/batch/', {'parallel': True, 'requests': [
+                {'path': '/api/projects/?fields=name'},
+                {'path': '/api/projects/clients/'},
+                {'method': 'get', 'path': '/api/projects/tags/'},
+            ]}, format='json')
+
+        responses = response.json()['responses']
+        self.assertEqual([item['status'] for item in responses], [200, 200, 200])
+        self.assertEqual(responses[0]['body'], [{'name': 'Read in parallel'}])
+        self.assertEqual(threads, [False] * 3)
+
+    def test_writes_are_refused(self):
+        for method in ('POST', 'PATCH', 'DELETE'):
+            response = self.client.post('/api/batch/', {'parallel': True, 'requests': [
+                {'path': '/api/projects/'},
+                {'method': method, 'path': '/api/projects/', 'body': {'name': 'Not written'}},
+            ]}, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Project.objects.filter(name='Not written').exists())
@@ -0,0 +1,109 @@
+"""
+Token-bucket rate limiting for the API.
+
+Every client has one bucket per scope holding ``tokens`` tokens that refill
+evenly over ``period`` (``"60/min"``, ``"10/5m"``). Members are limited per user,
+anonymous clients per IP address. The scope is the view's ``throttle_scope``
+(``login``, ``exports``) or else ``reads`` for safe methods and ``writes`` for the
+rest, with rates from ``DEFAULT_THROTTLE_RATES``.
+
+Buckets live in the default cache (Redis when ``REDIS_URL`` is set, so all workers
+share them) as two fixed-window counters: tokens taken in the current window and
+in the previous one, the latter weighted by how much of it still falls within the
+last ``period``. That continuous refill is the token bucket. A check costs the same
+few cache calls however busy the client is, the counter only moves through the
+cache's atomic ``incr``/``decr``, and refused requests hand their token back.
+"""
+import re
+import time
+
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIOD_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+re_rate = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([smhd])[a-z]*\s*$')
+
+
+def parse_rate(rate):
+    """``"10/5m"`` -> (10, 300.0)"""
+    match = re_rate.match(rate)
+    if match is None:
+        raise ValueError(f'Invalid throttle rate {rate!r}; expected "<tokens>/<period>" such as "60/min"')
+    tokens, count, unit = match.groups()
+    return int(tokens), float(int(count or 1) * PERIOD_SECONDS[unit])
+
+
+def throttle_scope(scope):
+    """Set the throttle scope of an ``@api_view`` function view (apply above ``@api_view``)"""
+    def decorator(view):
+        view.cls.throttle_scope = scope
+        return view
+    return decorator
+
+
+def _take(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def retry_after(tokens, period, elapsed, previous, taken):
+    """Seconds until a bucket with ``taken`` + weighted ``previous`` tokens used has one to spare"""
+    free = tokens - taken - 1
+    if free >= 0 and previous:
+        # Enough of the previous window slides out before this one ends
+        wait = period * (1 - free / previous) - elapsed
+        if wait < period - elapsed:
+            return max(wait, 0.0)
+    # Otherwise this window's tokens have to age out as the "previous" window
+    carried = max(1 - (tokens - 1) / taken, 0.0) if taken else 0.0
+    return period - elapsed + period * carried
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Default throttle for every API view; see the module docstring"""
+
+    def __init__(self):
+        self._wait = None
+
+    def get_scope(self, request, view):
+        return getattr(view, 'throttle_scope', None) or ('reads' if request.method in SAFE_METHODS else 'writes')
+
+    def get_client(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if not rate:
+            return True
+        tokens, period = parse_rate(rate)
+
+        now = time.time()
+        window = int(now // period)
+        elapsed = now - window * period
+        bucket = f'throttle:{scope}:{self.get_client(request)}'
+        current_key = f'{bucket}:{window}'
+        previous = cache.get(f'{bucket}:{window - 1}', 0)
+        # Kept for two periods: it is read back as the previous window
+        taken = _take(current_key, int(period * 2) + 1)
+        if previous * (1 - elapsed / period) + taken <= tokens:
+            return True
+
+        try:
+            cache.decr(current_key)
+        except ValueError:
+            pass
+        self._wait = retry_after(tokens, period, elapsed, previous, taken - 1)
+        return False
+
+    def wait(self):
+        return self._wait
@@ -19,6 +19,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
+from atb_tracker.batch import BatchView
+from atb_tracker.warmup import readiness
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -27,6 +29,9 @@ urlpatterns = [
     path('api/pomodoros/', include('pomodoro.urls')),
     path('api/user-settings/', include('user_settings.urls')),
     path('api/auth/', include('auth_app.urls')),
+    path('api/jobs/', include('jobs.urls')),
+    path('api/batch/', BatchView.as_view(), name='batch'),
+    path('api/ready/', readiness, name='readiness'),
     path('', lambda request: JsonResponse({"message": "ATB Tracker API is running."})),
 ]
 
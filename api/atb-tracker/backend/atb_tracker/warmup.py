@@ -0,0 +1,125 @@
+"""
+Process warmup and readiness.
+
+A fresh process fills several lazy caches on its first request: URL pattern
+regexes and the reverse map, DRF's imported settings classes (renderers,
+parsers, JWT authentication), model metadata and serializer field maps, and
+database connections. ``warmup()`` fills them at start-up instead, so the first
+request costs the same as the rest. It is called from ``wsgi.py``/``asgi.py``
+when ``WARMUP_ON_START`` is set, and ``/api/ready/`` reports 503 until it has run.
+"""
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import JsonResponse
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+_state = {'ready': False, 'timings': {}, 'fork_hook': False}
+
+
+def _walk(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield pattern
+            yield from _walk(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern
+
+
+def warm_urls():
+    """Compile every route regex and build the reverse lookup map"""
+    resolver = get_resolver()
+    views = []
+    for pattern in _walk(resolver.url_patterns):
+        pattern.pattern.regex
+        view = getattr(pattern, 'callback', None)
+        view_class = getattr(view, 'cls', None) or getattr(view, 'view_class', None)
+        if view_class is not None:
+            views.append(view_class)
+    resolver.reverse_dict
+    return views
+
+
+def warm_rest_framework():
+    """Import the classes named in REST_FRAMEWORK and SIMPLE_JWT settings and load the JWT signer"""
+    for name in api_settings.import_strings:
+        getattr(api_settings, name, None)
+    from rest_framework_simplejwt.settings import api_settings as jwt_settings
+    from rest_framework_simplejwt.state import token_backend
+    for name in jwt_settings.import_strings:
+        getattr(jwt_settings, name, None)
+    token_backend.decode(token_backend.encode({'warmup': True}), verify=False)
+
+
+def warm_serializers(views):
+    """Build the field map of every view's serializer (model metadata, field mappings)"""
+    warmed = set()
+    for view_class in views:
+        serializer_class = getattr(view_class, 'serializer_class', None)
+        if serializer_class is None or serializer_class in warmed:
+            continue
+        warmed.add(serializer_class)
+        try:
+            serializer_class(context={}).fields
+            if getattr(view_class, 'queryset', None) is not None:
+                # Compiles the SQL once, loading lookups and backend operations
+                str(view_class.queryset.query)
+        except Exception:
+            logger.debug('Could not warm %s', serializer_class.__name__, exc_info=True)
+    return len(warmed)
+
+
+def _drop_inherited_connections():
+    # A pre-forked worker must not talk over its parent's sockets; it opens its own
+    for connection in connections.all(initialized_only=True):
+        connection.connection = None
+
+
+def warm_databases():
+    """Open a connection to every database; they persist for CONN_MAX_AGE seconds"""
+    for alias in settings.DATABASES:
+        connections[alias].ensure_connection()
+    if hasattr(os, 'register_at_fork') and not _state['fork_hook']:
+        os.register_at_fork(after_in_child=_drop_inherited_connections)
+        _state['fork_hook'] = True
+
+
+def warmup():
+    """Run every warmup step and mark the process ready; returns milliseconds per step"""
+    timings = {}
+
+    def timed(name, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    views = timed('urls', warm_urls)
+    timed('rest_framework', warm_rest_framework)
+    timed('serializers', warm_serializers, views)
+    try:
+        timed('databases', warm_databases)
+    except DatabaseError:
+        # Readiness keeps failing until the database is reachable
+        logger.exception('Warmup could not connect to the database')
+    _state['timings'] = timings
+    _state['ready'] = True
+    logger.info('Warmup finished: %s', ', '.join(f'{name} {ms} ms' for name, ms in timings.items()))
+    return timings
+
+
+def readiness(request):
+    """Readiness probe: 200 once warmed up and the default database answers"""
+    if settings.WARMUP_ON_START and not _state['ready']:
+        return JsonResponse({'status': 'starting'}, status=503)
+    try:
+        connections['default'].ensure_connection()
+    except DatabaseError:
+        return JsonResponse({'status': 'database unavailable'}, status=503)
+    return JsonResponse({'status': 'ready', 'warmup_ms': _state['timings']})
@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'atb_tracker.settings')
 
 application = get_wsgi_application()
+
+if settings.WARMUP_ON_START:
+    from atb_tracker.warmup import warmup
+    warmup()
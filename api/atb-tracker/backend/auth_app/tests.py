@@ -1,3 +1,49 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from users.models import Member
+
+
+class GoogleAuthTests(TestCase):
+    """POST /api/auth/google/ signs in the member with the Firebase uid or the email, ignoring case"""
+
+    url = '/api/auth/google/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('Linked.User@Example.com', 'google-password', first_name='Linked')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def sign_in(self, firebase_uid, email, name='Google User'):
+        response = self.client.post(self.url, {'firebase_uid': firebase_uid, 'email': email, 'name': name}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['user']
+
+    def test_email_account_is_linked(self):
+        user = self.sign_in('firebase-1', 'linked.user@example.com')
+        self.assertEqual(user['id'], self.user.pk)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.firebase_uid, 'firebase-1')
+        self.assertEqual(Member.objects.count(), 1)
+
+    def test_uid_wins_over_email(self):
+        other = Member.objects.create_user('other@example.com', 'google-password', firebase_uid='firebase-2')
+        # The Google account's email now matches the other member
+        self.assertEqual(self.sign_in('firebase-2', 'LINKED.USER@example.com')['id'], other.pk)
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.firebase_uid)
+
+    def test_new_account_is_created(self):
+        user = self.sign_in('firebase-3', 'new.user@example.com', name='New User')
+        member = Member.objects.get(pk=user['id'])
+        self.assertEqual((member.first_name, member.last_name, member.provider, member.firebase_uid),
+                         ('New', 'User', 'google', 'firebase-3'))
+        self.assertEqual(self.sign_in('firebase-3', 'New.User@example.com')['id'], member.pk)
+
+    def test_missing_fields(self):
+        response = self.client.post(self.url, {'email': 'linked.user@example.com'}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -8,9 +8,54 @@ from datetime import timedelta
 import secrets
 import json
 
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from atb_tracker.throttling import throttle_scope
 from users.models import Member
-from users.utils import get_tokens_for_user
+from users.utils import get_tokens_for_user, get_user_from_payload, validate_token
+
+
+def _find_google_member(firebase_uid, email):
+    # One query over the firebase_uid and lower(email) indexes; the uid match wins
+    members = list(Member.objects.alias(email_lower=Lower('email')).filter(
+        Q(firebase_uid=firebase_uid) | Q(email_lower=email.lower())
+    ))
+    members.sort(key=lambda member: (member.firebase_uid != firebase_uid, member.email != email))
+    return members[0] if members else None
 
+
+def google_member(firebase_uid, email, name, picture, email_verified):
+    """The member signing in with Google: found, linked to the Firebase account, or created"""
+    user = _find_google_member(firebase_uid, email)
+    if user is None:
+        # Split name into first_name and last_name
+        name_parts = name.split(' ', 1)
+        try:
+            with transaction.atomic():
+                return Member.objects.create(
+                    first_name=name_parts[0],
+                    last_name=name_parts[1] if len(name_parts) > 1 else '',
+                    email=email,
+                    firebase_uid=firebase_uid,
+                    picture=picture,
+                    provider='google',
+                    email_verified=email_verified
+                )
+        except IntegrityError:
+            # A concurrent first sign-in created the member; use that row
+            user = _find_google_member(firebase_uid, email)
+            if user is None:
+                raise
+    if not user.firebase_uid:
+        # Link the email account to the Firebase account
+        user.firebase_uid = firebase_uid
+        user.save(update_fields=['firebase_uid', 'updated_at'])
+    return user
+
+
+@throttle_scope('login')
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def google_auth(request):
@@ -40,33 +85,7 @@ def google_auth(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Check if user exists by firebase_uid or email
-        user = None
-        try:
-            user = Member.objects.get(firebase_uid=firebase_uid)
-        except Member.DoesNotExist:
-            try:
-                user = Member.objects.get(email=email)
-                # Update firebase_uid if not set
-                if not user.firebase_uid:
-                    user.firebase_uid = firebase_uid
-                    user.save()
-            except Member.DoesNotExist:
-                # Split name into first_name and last_name
-                name_parts = name.split(' ', 1)
-                first_name = name_parts[0]
-                last_name = name_parts[1] if len(name_parts) > 1 else ''
-                
-                # Create new user
-                user = Member.objects.create(
-                    first_name=first_name,
-                    last_name=last_name,
-                    email=email,
-                    firebase_uid=firebase_uid,
-                    picture=picture,
-                    provider='google',
-                    email_verified=email_verified
-                )
+        user = google_member(firebase_uid, email, name, picture, email_verified)
 
         # Generate JWT tokens
         tokens = get_tokens_for_user(user)
@@ -111,12 +130,10 @@ def verify_token(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Use the JWT token verification from users.utils
-        from users.utils import validate_token, get_user_from_token
-        
+        # Decoded once; the member is then one primary key lookup
         is_valid, payload = validate_token(token)
         if is_valid:
-            user = get_user_from_token(token)
+            user = get_user_from_payload(payload)
             if user:
                 user_data = {
                     'id': user.id,
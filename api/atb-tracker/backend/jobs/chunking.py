@@ -0,0 +1,32 @@
+"""Bulk updates and deletes split into one short transaction per batch of rows"""
+from django.db import transaction
+
+
+def update_in_chunks(queryset, batch_size=1000, progress=None, /, **values):
+    """``queryset.update(**values)`` in primary key order, ``batch_size`` rows at a time"""
+    # Positional-only, so that fields named like the parameters (``progress``) can be updated
+    model, using = queryset.model, queryset.db
+    updated = last_pk = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return updated
+        with transaction.atomic(using=using):
+            updated += model._base_manager.using(using).filter(pk__in=ids).update(**values)
+        last_pk = ids[-1]
+        if progress:
+            progress(updated)
+
+
+def delete_in_chunks(queryset, batch_size=1000, progress=None):
+    """``queryset.delete()`` ``batch_size`` rows at a time; returns the rows deleted, cascades included"""
+    model, using = queryset.model, queryset.db
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic(using=using):
+            deleted += model._base_manager.using(using).filter(pk__in=ids).delete()[0]
+        if progress:
+            progress(deleted)
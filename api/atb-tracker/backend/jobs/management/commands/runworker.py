@@ -0,0 +1,63 @@
+import multiprocessing
+import signal
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.worker import Worker
+
+
+def _run_process(threads, poll_interval, burst, verbosity):
+    # Spawned children start without Django configured; forked ones inherit it
+    django.setup()
+    worker = Worker(threads, poll_interval, burst, log=print if verbosity > 1 else None)
+    signal.signal(signal.SIGTERM, lambda *args: worker.stop.set())
+    signal.signal(signal.SIGINT, lambda *args: worker.stop.set())
+    worker.run()
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the jobs table until stopped (SIGTERM/SIGINT finish the running jobs first)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes')
+        parser.add_argument('--threads', type=int, default=4, help='Job threads per process')
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Seconds an idle thread waits before polling again (default JOB_POLL_INTERVAL)')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        threads, processes = max(options['threads'], 1), max(options['processes'], 1)
+        self.stdout.write(f'Starting {processes} worker processes with {threads} threads each')
+        if processes == 1:
+            worker = Worker(threads, options['poll_interval'], options['burst'],
+                            log=self.stdout.write if options['verbosity'] > 1 else None)
+            signal.signal(signal.SIGTERM, lambda *args: worker.stop.set())
+            signal.signal(signal.SIGINT, lambda *args: worker.stop.set())
+            processed = worker.run()
+            self.stdout.write(self.style.SUCCESS(f'Worker stopped after {processed} jobs'))
+            return
+
+        # Children must not share the parent's database sockets
+        connections.close_all()
+        children = [
+            multiprocessing.Process(
+                target=_run_process,
+                args=(threads, options['poll_interval'], options['burst'], options['verbosity']),
+            )
+            for _ in range(processes)
+        ]
+        for child in children:
+            child.start()
+
+        def forward(signum, frame):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        for child in children:
+            child.join()
+        self.stdout.write(self.style.SUCCESS(f'{processes} worker processes stopped'))
@@ -0,0 +1,60 @@
+from django.db import models
+from django.utils import timezone
+from users.models import Member
+
+
+class Job(models.Model):
+    """A unit of background work, claimed and run by ``manage.py runworker``"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    # Kept when the user goes away, e.g. by the account deletion job itself
+    user = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    priority = models.IntegerField(default=0, help_text="Higher runs first")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    def set_progress(self, done, total=None, message=None):
+        """Record progress for pollers; also serves as the job's heartbeat"""
+        self.progress_done = done
+        if total is not None:
+            self.progress_total = total
+        if message is not None:
+            self.message = message[:255]
+        self.heartbeat_at = timezone.now()
+        Job.objects.filter(pk=self.pk).update(
+            progress_done=self.progress_done, progress_total=self.progress_total,
+            message=self.message, heartbeat_at=self.heartbeat_at,
+        )
+
+    class Meta:
+        db_table = 'jobs_job'
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_after', 'id'], name='jobs_job_claim_idx'),
+            models.Index(fields=['user', '-created_at'], name='jobs_job_user_idx'),
+        ]
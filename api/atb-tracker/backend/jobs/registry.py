@@ -0,0 +1,44 @@
+"""
+Job handler registry and enqueueing.
+
+Handlers are functions taking the running ``Job`` and its ``args`` as keyword
+arguments. They are registered with ``@job_handler`` in an app's ``tasks.py`` and
+may report progress with ``job.set_progress``; whatever they return (JSON
+serializable) is stored as the job's result.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job
+
+_handlers = {}
+
+
+def job_handler(name, priority=0, max_attempts=None):
+    """Register the decorated function as the handler for jobs called ``name``"""
+    def register(func):
+        _handlers[name] = (func, priority, max_attempts)
+        return func
+    return register
+
+
+def get_handler(name):
+    try:
+        return _handlers[name][0]
+    except KeyError:
+        raise LookupError(f'No job handler registered as {name!r}') from None
+
+
+def enqueue(name, user=None, priority=None, max_attempts=None, run_after=None, **args):
+    """Queue a ``name`` job with keyword ``args``; returns the ``Job``"""
+    if name not in _handlers:
+        raise LookupError(f'No job handler registered as {name!r}')
+    _, default_priority, default_attempts = _handlers[name]
+    return Job.objects.create(
+        name=name,
+        user=user,
+        args=args,
+        priority=default_priority if priority is None else priority,
+        max_attempts=max_attempts or default_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=run_after or timezone.now(),
+    )
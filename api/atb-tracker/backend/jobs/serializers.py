@@ -0,0 +1,21 @@
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'status', 'priority', 'attempts', 'max_attempts', 'progress', 'message',
+            'result', 'error', 'run_after', 'created_at', 'started_at', 'finished_at',
+        ]
+
+    def get_progress(self, obj):
+        percent = None
+        if obj.progress_total:
+            percent = round(min(obj.progress_done / obj.progress_total, 1) * 100, 1)
+        elif obj.status == Job.SUCCEEDED:
+            percent = 100.0
+        return {'done': obj.progress_done, 'total': obj.progress_total, 'percent': percent}
@@ -0,0 +1,189 @@
+import threading
+from datetime import date, time, timedelta
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from projects.models import Project, TimeEntry
+from users.models import Member
+from users.utils import get_tokens_for_user
+
+from .models import Job
+from .registry import enqueue, job_handler
+from .worker import claim, requeue_stale, retry_delay, run_job
+
+
+@job_handler('jobs.tests.succeed')
+def succeed(job, value):
+    job.set_progress(1, 1)
+    return {'value': value}
+
+
+@job_handler('jobs.tests.fail', max_attempts=2)
+def fail(job):
+    raise RuntimeError('Handler failed')
+
+
+class JobWorkerTests(TestCase):
+    """claim picks the next due job once; run_job records results and retries failures with backoff"""
+
+    def test_claim_order(self):
+        low = enqueue('jobs.tests.succeed', value=1)
+        later = enqueue('jobs.tests.succeed', value=2, run_after=timezone.now() + timedelta(minutes=5))
+        high = enqueue('jobs.tests.succeed', value=3, priority=5)
+
+        self.assertEqual([claim('worker:0').pk, claim('worker:0').pk], [high.pk, low.pk])
+        self.assertIsNone(claim('worker:0'))
+        later.refresh_from_db()
+        self.assertEqual(later.status, Job.QUEUED)
+
+    def test_claim_marks_job_running(self):
+        enqueue('jobs.tests.succeed', value=1)
+        job = claim('worker:1')
+        self.assertEqual((job.status, job.locked_by, job.attempts), (Job.RUNNING, 'worker:1', 1))
+        self.assertIsNotNone(job.heartbeat_at)
+        # Claimed jobs are not handed out again
+        self.assertIsNone(claim('worker:2'))
+
+    def test_success_stores_result(self):
+        enqueue('jobs.tests.succeed', value=42)
+        self.assertTrue(run_job(claim('worker:0')))
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.result, job.progress_done), (Job.SUCCEEDED, {'value': 42}, 1))
+        self.assertIsNotNone(job.finished_at)
+
+    @override_settings(JOB_RETRY_BASE_SECONDS=10, JOB_RETRY_MAX_SECONDS=60)
+    def test_failure_is_retried_with_backoff(self):
+        enqueue('jobs.tests.fail')
+        before = timezone.now()
+        with self.assertLogs('jobs.worker', 'ERROR'):
+            self.assertFalse(run_job(claim('worker:0')))
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.QUEUED, 1, ''))
+        self.assertIn('Handler failed', job.error)
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=5))
+        self.assertLessEqual(job.run_after, timezone.now() + timedelta(seconds=10))
+        # Not due yet
+        self.assertIsNone(claim('worker:0'))
+
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs('jobs.worker', 'ERROR'):
+            self.assertFalse(run_job(claim('worker:0')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    @override_settings(JOB_RETRY_BASE_SECONDS=10, JOB_RETRY_MAX_SECONDS=60)
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        for attempts, ceiling in ((1, 10), (2, 20), (3, 40), (4, 60), (20, 60)):
+            delay = retry_delay(attempts)
+            self.assertTrue(ceiling / 2 <= delay <= ceiling, (attempts, delay))
+
+    def test_unknown_handler_fails(self):
+        job = Job.objects.create(name='jobs.tests.missing', max_attempts=1)
+        with self.assertLogs('jobs.worker', 'ERROR'):
+            self.assertFalse(run_job(claim('worker:0')))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('No job handler registered', job.error)
+
+    @override_settings(JOB_STALE_SECONDS=60)
+    def test_stale_jobs_are_requeued(self):
+        stale_at = timezone.now() - timedelta(minutes=5)
+        stale = Job.objects.create(
+            name='jobs.tests.succeed', status=Job.RUNNING, locked_by='gone:0', attempts=1, heartbeat_at=stale_at,
+        )
+        exhausted = Job.objects.create(
+            name='jobs.tests.succeed', status=Job.RUNNING, locked_by='gone:1', attempts=5, max_attempts=5,
+            heartbeat_at=stale_at,
+        )
+        alive = Job.objects.create(
+            name='jobs.tests.succeed', status=Job.RUNNING, locked_by='here:0', attempts=1,
+            heartbeat_at=timezone.now(),
+        )
+
+        self.assertEqual(requeue_stale(), 2)
+
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[stale.pk], statuses[exhausted.pk], statuses[alive.pk]], [Job.QUEUED, Job.FAILED, Job.RUNNING]
+        )
+        self.assertEqual(claim('worker:0').pk, stale.pk)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'SKIP LOCKED needs row locks')
+class JobClaimLockingTests(TransactionTestCase):
+    """A job row locked by one worker's claim is skipped by the others instead of waited for"""
+
+    def test_locked_job_is_skipped(self):
+        first = enqueue('jobs.tests.succeed', value=1, priority=1)
+        second = enqueue('jobs.tests.succeed', value=2)
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    Job.objects.select_for_update().get(pk=first.pk)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            self.assertEqual(claim('worker:0').pk, second.pk)
+        finally:
+            release.set()
+            holder.join()
+        self.assertEqual(claim('worker:0').pk, first.pk)
+
+
+class DeleteAccountJobTests(TestCase):
+    """DELETE /api/user-settings/delete-account/ queues a job that removes the member and their data"""
+
+    url = '/api/user-settings/delete-account/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('leaving@example.com', 'leaving-password', first_name='Leaving')
+        project = Project.objects.create(name='Leaving', user=cls.user)
+        for day in range(1, 4):
+            TimeEntry.objects.create(
+                project=project, description='Leaving', date=date(2026, 3, day),
+                start_time=time(9, 0), end_time=time(10, 0), duration=60, user=cls.user,
+            )
+        cls.other = Member.objects.create_user('staying@example.com', 'staying-password', first_name='Staying')
+        Project.objects.create(name='Staying', user=cls.other)
+
+    def setUp(self):
+        # Throttle buckets and per-user cached reads outlive each test's transaction
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def test_request_queues_one_job(self):
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 202)
+        job = response.json()['job']
+        self.assertEqual((job['name'], job['status']), ('users.delete_account', Job.QUEUED))
+        self.assertEqual(self.client.delete(self.url).json()['job']['id'], job['id'])
+        self.assertTrue(Member.objects.filter(pk=self.user.pk).exists())
+
+    def test_job_deletes_member_and_data(self):
+        job_id = self.client.delete(self.url).json()['job']['id']
+
+        self.assertTrue(run_job(claim('worker:0')))
+
+        job = Job.objects.get(pk=job_id)
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertIsNone(job.user_id)
+        self.assertEqual(job.result, {'deleted_rows': 4})
+        self.assertEqual(job.progress_done, job.progress_total)
+        self.assertFalse(Member.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(TimeEntry.objects.filter(user_id=self.user.pk).exists())
+        self.assertTrue(Project.objects.filter(user=self.other).exists())
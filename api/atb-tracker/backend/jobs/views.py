@@ -0,0 +1,22 @@
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from users.authentication import UserDataIsolationMixin
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobListView(UserDataIsolationMixin, generics.ListAPIView):
+    """The authenticated user's jobs, newest first"""
+    queryset = Job.objects.order_by('-created_at', '-id')
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return super().get_queryset()[:100]
+
+
+class JobDetailView(UserDataIsolationMixin, generics.RetrieveAPIView):
+    """Status, progress and result of one job; poll until ``status`` is succeeded or failed"""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
@@ -0,0 +1,165 @@
+"""
+Job worker: claiming, running, retrying and heartbeats.
+
+Jobs are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so concurrent workers
+never wait on each other's rows, followed by a compare-and-set UPDATE that also
+keeps backends without row locks (SQLite) from running a job twice. Failed jobs are
+retried with exponential backoff and jitter until ``max_attempts``. Each worker
+process refreshes the heartbeat of its running jobs, and jobs of workers that
+stopped sending one for ``JOB_STALE_SECONDS`` are requeued.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from atb_tracker.sharding import use_shard
+from users.shards import shard_for
+
+from .models import Job
+from .registry import get_handler
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts):
+    """Seconds to wait before attempt ``attempts + 1``"""
+    delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim(worker_id):
+    """Mark the next runnable job as running for ``worker_id``; None when the queue is empty"""
+    # Without row locks (SQLite) a read transaction upgraded to a write fails instead of
+    # waiting, so the select and the compare-and-set run as separate statements there
+    locking = connection.features.has_select_for_update
+    while True:
+        with transaction.atomic() if locking else nullcontext():
+            pk = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(status=Job.QUEUED, run_after__lte=timezone.now())
+                .order_by('-priority', 'run_after', 'id')
+                .values_list('pk', flat=True)
+                .first()
+            )
+            if pk is None:
+                return None
+            now = timezone.now()
+            claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+                status=Job.RUNNING, locked_by=worker_id, attempts=F('attempts') + 1,
+                started_at=now, heartbeat_at=now, finished_at=None,
+            )
+        if claimed:
+            return Job.objects.get(pk=pk)
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome; returns True on success"""
+    try:
+        handler = get_handler(job.name)
+        # Per-user jobs see the user's shard, like that user's requests
+        with use_shard(shard_for(job.user_id) if job.user_id else None):
+            result = handler(job, **job.args)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Job %s #%s failed (attempt %s of %s)', job.name, job.pk, job.attempts, job.max_attempts)
+        if job.attempts < job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.QUEUED, locked_by='', error=error,
+                run_after=timezone.now() + timedelta(seconds=retry_delay(job.attempts)),
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.FAILED, locked_by='', error=error, finished_at=timezone.now(),
+            )
+        return False
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.SUCCEEDED, locked_by='', error='', result=result, finished_at=timezone.now(),
+    )
+    return True
+
+
+def requeue_stale():
+    """Put running jobs whose worker stopped sending heartbeats back on the queue"""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_by='', error='Worker stopped responding', finished_at=timezone.now(),
+    )
+    requeued = stale.update(status=Job.QUEUED, locked_by='', run_after=timezone.now())
+    return requeued + failed
+
+
+class Worker:
+    """One process running ``threads`` job loops plus a heartbeat thread"""
+
+    def __init__(self, threads=4, poll_interval=None, burst=False, log=None):
+        self.threads = threads
+        self.poll_interval = settings.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.burst = burst
+        self.log = log or (lambda message: None)
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stop = threading.Event()
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    def run(self):
+        loops = [
+            threading.Thread(target=self._loop, args=(f'{self.name}:{i}',), name=f'job-worker-{i}')
+            for i in range(self.threads)
+        ]
+        heartbeat = threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True)
+        heartbeat.start()
+        for thread in loops:
+            thread.start()
+        for thread in loops:
+            thread.join()
+        self.stop.set()
+        return self.processed
+
+    def _loop(self, worker_id):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                try:
+                    job = claim(worker_id)
+                except DatabaseError:
+                    logger.exception('Claiming a job failed')
+                    self.stop.wait(self.poll_interval)
+                    continue
+                if job is None:
+                    if self.burst:
+                        return
+                    self.stop.wait(self.poll_interval)
+                    continue
+                self.log(f'{worker_id} running {job.name} #{job.pk} (attempt {job.attempts})')
+                ok = run_job(job)
+                self.log(f'{worker_id} {"finished" if ok else "failed"} {job.name} #{job.pk}')
+                with self._lock:
+                    self.processed += 1
+        finally:
+            connections.close_all()
+
+    def _heartbeat(self):
+        interval = max(settings.JOB_STALE_SECONDS / 5, 1)
+        while not self.stop.wait(interval):
+            try:
+                Job.objects.filter(status=Job.RUNNING, locked_by__startswith=f'{self.name}:').update(
+                    heartbeat_at=timezone.now()
+                )
+                requeued = requeue_stale()
+                if requeued:
+                    self.log(f'Requeued {requeued} jobs from unresponsive workers')
+            except Exception:
+                logger.exception('Job heartbeat failed')
+            finally:
+                close_old_connections()
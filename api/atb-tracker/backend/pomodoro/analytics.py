@@ -0,0 +1,191 @@
+"""
+Pomodoro focus analytics: daily focus, streaks and cycle statistics.
+
+Sessions are bucketed into local days in SQL and combined with archived daily
+rollups. Streaks are found with the gaps-and-islands technique: consecutive days
+share the same value of
+``day_number - ROW_NUMBER() OVER (ORDER BY day)``.
+
+Both queries read only the days they report on: the daily figures cover the
+requested window, and streaks are found over that window plus the
+``POMODORO_STREAK_LOOKBACK_DAYS`` before today. A longer current streak is
+reported from the start of the lookback.
+
+PostgreSQL converts each session to the profile timezone with ``AT TIME ZONE``.
+SQLite has no timezone data, so each row is shifted by the offset in force at
+its instant, from the zone's transitions within the scanned range.
+"""
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+from django.utils import timezone
+
+from atb_tracker.cache import user_cache_key
+from .models import PomodoroSession
+
+CACHE_NAMESPACE = 'pomodoro-analytics'
+CACHE_TIMEOUT = 60 * 60
+
+
+def _offset_periods(tz, lower, upper):
+    """
+    [(until, offset)] of ``tz`` over ``lower``..``upper``: each UTC offset holds
+    until the next one starts; the last ``until`` is None
+    """
+    periods = []
+    offset = lower.astimezone(tz).utcoffset()
+    # Step in UTC: arithmetic on datetimes in ``tz`` is wall-clock arithmetic
+    moment, upper = lower.astimezone(dt_timezone.utc), upper.astimezone(dt_timezone.utc)
+    while moment < upper:
+        following = min(moment + timedelta(days=1), upper)
+        if following.astimezone(tz).utcoffset() != offset:
+            # Transitions fall on whole seconds; bisect down to the first second of the new offset
+            low, high = 0, int((following - moment).total_seconds())
+            while high - low > 1:
+                middle = (low + high) // 2
+                if (moment + timedelta(seconds=middle)).astimezone(tz).utcoffset() == offset:
+                    low = middle
+                else:
+                    high = middle
+            moment += timedelta(seconds=high)
+            periods.append((moment, offset))
+            offset = moment.astimezone(tz).utcoffset()
+            continue
+        moment = following
+    periods.append((None, offset))
+    return periods
+
+
+def _day_sql(connection, tz, lower, upper):
+    """SQL (and params) of the local day of sessions started in ``lower``..``upper``"""
+    if connection.vendor == 'postgresql':
+        return "(start_time AT TIME ZONE %s)::date", [str(tz)]
+    # SQLite stores UTC timestamps; shift each by the offset in force when it started
+    periods = _offset_periods(tz, lower, upper)
+    modifiers = [f'{int(offset.total_seconds() // 60):+d} minutes' for _, offset in periods]
+    if len(periods) == 1:
+        # No transition in the range (UTC, or a zone without DST)
+        return "date(start_time, %s)", modifiers
+    cases, params = [], []
+    for (until, _), modifier in zip(periods[:-1], modifiers):
+        cases.append("WHEN start_time < %s THEN date(start_time, %s)")
+        params += [connection.ops.adapt_datetimefield_value(until), modifier]
+    return f"CASE {' '.join(cases)} ELSE date(start_time, %s) END", params + modifiers[-1:]
+
+
+def _day_number_sql(connection):
+    """SQL of the integer day number of a ``day`` column"""
+    if connection.vendor == 'postgresql':
+        return "(day - DATE '1970-01-01')"
+    return "CAST(julianday(day) AS INTEGER)"
+
+
+def _days_cte(connection, user, first, last, tz):
+    """
+    SQL and params of a ``days`` CTE: focus, breaks, cycles and sessions per
+    local day over ``first``..``last``, from live sessions and archived rollups
+    """
+    lower = datetime.combine(first, time.min, tzinfo=tz)
+    upper = datetime.combine(last + timedelta(days=1), time.min, tzinfo=tz)
+    day_sql, day_params = _day_sql(connection, tz, lower, upper)
+    # Archived sessions are already rolled up per local day
+    sql = (
+        f"WITH days AS ("
+        f" SELECT day, SUM(focus) AS focus_minutes, SUM(break_minutes) AS break_minutes,"
+        f" SUM(cycles) AS cycles, SUM(sessions) AS sessions FROM ("
+        f" SELECT {day_sql} AS day, duration AS focus, break_duration AS break_minutes, cycles, 1 AS sessions"
+        f" FROM pomodoro_pomodorosession WHERE user_id = %s AND start_time >= %s AND start_time < %s"
+        f" UNION ALL"
+        f" SELECT date, minutes, break_minutes, cycles, count"
+        f" FROM archive_dailyrollup WHERE user_id = %s AND kind = 'pomodoro' AND date >= %s AND date <= %s"
+        f") merged GROUP BY day"
+        f")"
+    )
+    ops = connection.ops
+    params = day_params + [
+        user.id, ops.adapt_datetimefield_value(lower), ops.adapt_datetimefield_value(upper),
+        user.id, ops.adapt_datefield_value(first), ops.adapt_datefield_value(last),
+    ]
+    return sql, params
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def focus_analytics(user, start, end, tz):
+    """Compute focus analytics for ``user`` with per-day figures over ``start``..``end``"""
+    connection = connections[router.db_for_read(PomodoroSession)]
+    today = timezone.now().astimezone(tz).date()
+    streak_cte, streak_params = _days_cte(
+        connection, user, min(start, today - timedelta(days=settings.POMODORO_STREAK_LOOKBACK_DAYS)),
+        max(end, today), tz,
+    )
+    daily_cte, daily_params = _days_cte(connection, user, start, end, tz)
+
+    streak_sql = (
+        f"{streak_cte}, islands AS ("
+        f" SELECT day, {_day_number_sql(connection)} - ROW_NUMBER() OVER (ORDER BY day) AS island FROM days"
+        f"), streaks AS ("
+        f" SELECT MIN(day) AS first_day, MAX(day) AS last_day, COUNT(*) AS length FROM islands GROUP BY island"
+        f")"
+        # Only one streak can end today or yesterday, so it is the current one
+        f" SELECT MAX(length),"
+        f" MAX(CASE WHEN last_day >= %s THEN length END),"
+        f" MAX(CASE WHEN last_day >= %s THEN first_day END)"
+        f" FROM streaks"
+    )
+    daily_sql = (
+        f"{daily_cte} SELECT day, focus_minutes, break_minutes, cycles, sessions FROM days"
+        f" WHERE day >= %s AND day <= %s ORDER BY day"
+    )
+
+    with connection.cursor() as cursor:
+        yesterday = today - timedelta(days=1)
+        cursor.execute(streak_sql, streak_params + [yesterday, yesterday])
+        longest_streak, current_streak, current_start = cursor.fetchone()
+
+        cursor.execute(daily_sql, daily_params + [start, end])
+        daily = cursor.fetchall()
+
+    focus = sum(row[1] or 0 for row in daily)
+    breaks = sum(row[2] or 0 for row in daily)
+    cycles = sum(row[3] or 0 for row in daily)
+    sessions = sum(row[4] for row in daily)
+    return {
+        'timezone': str(tz),
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'current_streak': current_streak or 0,
+        'current_streak_start': _as_date(current_start).isoformat() if current_start else None,
+        'longest_streak': longest_streak or 0,
+        'totals': {
+            'focus_minutes': focus,
+            'break_minutes': breaks,
+            'sessions': sessions,
+            'average_cycles': round(cycles / sessions, 2) if sessions else 0,
+            'break_to_focus_ratio': round(breaks / focus, 4) if focus else 0,
+        },
+        'days': [
+            {
+                'date': _as_date(day).isoformat(),
+                'focus_minutes': focus_minutes or 0,
+                'break_minutes': break_minutes or 0,
+                'cycles': day_cycles or 0,
+                'sessions': day_sessions,
+            }
+            for day, focus_minutes, break_minutes, day_cycles, day_sessions in daily
+        ],
+    }
+
+
+def cached_focus_analytics(user, start, end, tz):
+    """``focus_analytics`` cached per user until one of their sessions is written"""
+    key = user_cache_key(CACHE_NAMESPACE, user.id, start, end, tz, timezone.now().astimezone(tz).date())
+    result = cache.get(key)
+    if result is None:
+        result = focus_analytics(user, start, end, tz)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
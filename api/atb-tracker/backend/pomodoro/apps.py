@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class PomodoroConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'pomodoro' 
\ No newline at end of file
+    name = 'pomodoro'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pomodoro', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pomodorosession',
+            index=models.Index(fields=['user', 'updated_at'], name='pomodoro_ps_user_upd_idx'),
+        ),
+    ]
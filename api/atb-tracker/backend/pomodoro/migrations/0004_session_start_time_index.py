@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pomodoro', '0003_session_updated_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pomodorosession',
+            index=models.Index(fields=['user', 'start_time'], name='pomodoro_ps_user_start_idx'),
+        ),
+    ]
@@ -12,5 +12,11 @@ class PomodoroSession(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     user = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='pomodoro_sessions')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='pomodoro_ps_user_upd_idx'),
+            models.Index(fields=['user', 'start_time'], name='pomodoro_ps_user_start_idx'),
+        ]
+
     def __str__(self):
         return f"Pomodoro: {self.start_time} - {self.end_time} ({self.duration} min, {self.cycles} cycles)" 
\ No newline at end of file
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import PomodoroSession
+from atb_tracker.fieldsets import SparseFieldsetSerializerMixin
 
-class PomodoroSessionSerializer(serializers.ModelSerializer):
+class PomodoroSessionSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = PomodoroSession
         fields = ['id', 'start_time', 'end_time', 'duration', 'break_duration', 'cycles', 'notes', 'created_at', 'updated_at']
\ No newline at end of file
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from atb_tracker.cache import invalidate_user_cache
+from .analytics import CACHE_NAMESPACE
+from .models import PomodoroSession
+
+
+@receiver(post_save, sender=PomodoroSession)
+@receiver(post_delete, sender=PomodoroSession)
+def invalidate_focus_analytics(sender, instance, **kwargs):
+    invalidate_user_cache(CACHE_NAMESPACE, instance.user_id)
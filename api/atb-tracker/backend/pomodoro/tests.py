@@ -1,3 +1,121 @@
+import json
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from atb_tracker.fastpath import compile_row_converter
+from users.models import Member
+from users.utils import get_tokens_for_user
+
+from .analytics import focus_analytics
+from .models import PomodoroSession
+from .serializers import PomodoroSessionSerializer
+
+
+class PomodoroFastPathTests(TestCase):
+    """The values_list() fast path of GET /api/pomodoros/ renders what the serializer would"""
+
+    url = '/api/pomodoros/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('pomodoro-fastpath@example.com', 'fastpath-password', first_name='Fast')
+        starts = [
+            datetime(2026, 3, 2, 9, 0, tzinfo=dt_timezone.utc),
+            # Stored as UTC, rendered the same whatever zone it was written in
+            datetime(2026, 3, 8, 1, 30, 15, 250000, tzinfo=ZoneInfo('America/New_York')),
+            datetime(2025, 12, 31, 23, 59, 59, 999999, tzinfo=dt_timezone.utc),
+        ]
+        notes = ['Deep work', None, '']
+        for start, note in zip(starts, notes):
+            PomodoroSession.objects.create(
+                start_time=start, end_time=start + timedelta(minutes=25), duration=25, break_duration=5,
+                cycles=2, notes=note, user=cls.user,
+            )
+        other = Member.objects.create_user('pomodoro-fastpath-other@example.com', 'fastpath-password', first_name='Other')
+        PomodoroSession.objects.create(
+            start_time=starts[0], end_time=starts[0] + timedelta(minutes=25), duration=25, user=other,
+        )
+
+    def setUp(self):
+        # Throttle buckets and per-user cached reads outlive each test's transaction
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def expected(self, fields=None):
+        data = PomodoroSessionSerializer(PomodoroSession.objects.filter(user=self.user).order_by('id'), many=True).data
+        rows = json.loads(JSONRenderer().render(data))
+        if fields is not None:
+            rows = [{name: row[name] for name in fields} for row in rows]
+        return rows
+
+    def listed(self, query=''):
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, 200)
+        return sorted(response.json(), key=lambda row: row['id'])
+
+    def test_serializer_is_eligible(self):
+        self.assertIsNotNone(compile_row_converter(PomodoroSessionSerializer()))
+
+    def test_full_representation_matches_serializer(self):
+        self.assertEqual(self.listed(), self.expected())
+
+    def test_sparse_fieldset_matches_serializer(self):
+        fields = ['id', 'start_time', 'notes', 'cycles']
+        self.assertEqual(self.listed('?fields=' + ','.join(fields)), self.expected(fields))
+
+
+class FocusAnalyticsTests(TestCase):
+    """Focus analytics bucket sessions into the local day they started on, across DST changes"""
+
+    tz = ZoneInfo('America/New_York')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('focus@example.com', 'focus-password', first_name='Focus')
+        cls.starts = [
+            # 23:30 EST on March 7th, then the last second of EST and the first of EDT
+            datetime(2026, 3, 8, 4, 30, tzinfo=dt_timezone.utc),
+            datetime(2026, 3, 8, 6, 59, 59, tzinfo=dt_timezone.utc),
+            datetime(2026, 3, 8, 7, 0, tzinfo=dt_timezone.utc),
+            datetime(2026, 3, 9, 3, 30, tzinfo=dt_timezone.utc),
+            # 01:30 EDT and 01:30 EST on November 1st
+            datetime(2026, 11, 1, 5, 30, tzinfo=dt_timezone.utc),
+            datetime(2026, 11, 1, 6, 30, tzinfo=dt_timezone.utc),
+        ]
+        for start in cls.starts:
+            PomodoroSession.objects.create(
+                start_time=start, end_time=start + timedelta(minutes=25), duration=25, user=cls.user,
+            )
+
+    def test_days_follow_the_offset_in_force(self):
+        result = focus_analytics(self.user, date(2026, 3, 1), date(2026, 11, 30), self.tz)
+        expected = Counter(start.astimezone(self.tz).date().isoformat() for start in self.starts)
+        self.assertEqual({day['date']: day['sessions'] for day in result['days']}, dict(expected))
+
+    def test_days_outside_the_window_are_left_out(self):
+        result = focus_analytics(self.user, date(2026, 3, 8), date(2026, 3, 8), self.tz)
+        self.assertEqual([(day['date'], day['sessions']) for day in result['days']], [('2026-03-08', 3)])
+        self.assertEqual(result['totals']['sessions'], 3)
+
+    def test_zones_without_transitions(self):
+        for name in ('UTC', 'Asia/Kolkata'):
+            with self.subTest(zone=name):
+                tz = ZoneInfo(name)
+                result = focus_analytics(self.user, date(2026, 3, 1), date(2026, 11, 30), tz)
+                expected = Counter(start.astimezone(tz).date().isoformat() for start in self.starts)
+                self.assertEqual({day['date']: day['sessions'] for day in result['days']}, dict(expected))
 
-# Create your tests here. 
\ No newline at end of file
+    def test_endpoint_in_the_default_timezone(self):
+        cache.clear()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+        response = client.get('/api/pomodoros/analytics/?start=2026-03-01&end=2026-03-31')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['totals']['sessions'], 4)
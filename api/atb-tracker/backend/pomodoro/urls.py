@@ -1,7 +1,9 @@
 from django.urls import path
-from .views import PomodoroSessionListCreateView, PomodoroSessionRetrieveUpdateDestroyView
+from .views import PomodoroSessionListCreateView, PomodoroSessionRetrieveUpdateDestroyView, PomodoroAnalyticsView, PomodoroExportView
 
 urlpatterns = [
     path('', PomodoroSessionListCreateView.as_view(), name='pomodoro-list-create'),
+    path('analytics/', PomodoroAnalyticsView.as_view(), name='pomodoro-analytics'),
+    path('export/', PomodoroExportView.as_view(), name='pomodoro-export'),
     path('<int:pk>/', PomodoroSessionRetrieveUpdateDestroyView.as_view(), name='pomodoro-detail'),
 ] 
\ No newline at end of file
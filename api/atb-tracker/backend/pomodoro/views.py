@@ -1,15 +1,70 @@
-from rest_framework import generics
+from datetime import timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import PomodoroSession
 from .serializers import PomodoroSessionSerializer
 from users.authentication import UserDataIsolationMixin
+from atb_tracker.conditional import ConditionalRequestMixin
+from atb_tracker.fieldsets import SparseFieldsetViewMixin
+from atb_tracker.fastpath import ValuesListFastPathMixin
+from .analytics import cached_focus_analytics
+from archive.reads import pomodoro_sessions_between
 
-class PomodoroSessionListCreateView(UserDataIsolationMixin, generics.ListCreateAPIView):
+class PomodoroSessionListCreateView(UserDataIsolationMixin, ConditionalRequestMixin, SparseFieldsetViewMixin, ValuesListFastPathMixin, generics.ListCreateAPIView):
     queryset = PomodoroSession.objects.all()
     serializer_class = PomodoroSessionSerializer
     permission_classes = [IsAuthenticated]
 
-class PomodoroSessionRetrieveUpdateDestroyView(UserDataIsolationMixin, generics.RetrieveUpdateDestroyAPIView):
+class PomodoroSessionRetrieveUpdateDestroyView(UserDataIsolationMixin, ConditionalRequestMixin, SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = PomodoroSession.objects.all()
     serializer_class = PomodoroSessionSerializer
-    permission_classes = [IsAuthenticated] 
\ No newline at end of file
+    permission_classes = [IsAuthenticated]
+
+class PomodoroAnalyticsView(APIView):
+    """
+    Focus streaks, daily focus minutes and cycle statistics for the authenticated user
+    """
+    permission_classes = [IsAuthenticated]
+    max_days = 366
+
+    def get(self, request):
+        tz = request.user_context.tz
+        try:
+            end = parse_date(request.GET['end']) if request.GET.get('end') else timezone.now().astimezone(tz).date()
+            start = parse_date(request.GET['start']) if request.GET.get('start') else end - timedelta(days=29)
+        except ValueError:
+            start = end = None
+        if start is None or end is None or start > end:
+            return Response({"error": "start and end must be YYYY-MM-DD dates with start <= end"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= self.max_days:
+            return Response({"error": f"Analytics are limited to {self.max_days} days"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(cached_focus_analytics(request.user, start, end, tz))
+
+
+class PomodoroExportView(APIView):
+    """
+    Every pomodoro session started on start..end (UTC days), including sessions moved to the archive
+    """
+    permission_classes = [IsAuthenticated]
+    max_days = 3660
+    throttle_scope = 'exports'
+
+    def get(self, request):
+        try:
+            start = parse_date(request.GET['start']) if request.GET.get('start') else None
+            end = parse_date(request.GET['end']) if request.GET.get('end') else None
+        except ValueError:
+            start = end = None
+        if start is None or end is None or start > end:
+            return Response({"error": "start and end must be YYYY-MM-DD dates with start <= end"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= self.max_days:
+            return Response({"error": f"Exports are limited to {self.max_days} days"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(pomodoro_sessions_between(request.user, start, end))
@@ -1,6 +1,30 @@
+from datetime import date
+
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def install_search_fallback(sender, using, **kwargs):
+    from django.db import connections
+    from .search import install_fts5_search
+    install_fts5_search(connections[using])
+
+
+def create_future_partitions(sender, using, **kwargs):
+    from django.conf import settings
+    from django.db import connections
+    from .partitioning import add_months, create_partitions, is_partitioned, month_start
+    connection = connections[using]
+    if settings.TIME_ENTRY_PARTITIONING and is_partitioned(connection):
+        this_month = month_start(date.today())
+        create_partitions(connection, this_month, add_months(this_month, settings.TIME_ENTRY_PARTITION_MONTHS_AHEAD))
 
 
 class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'projects'
\ No newline at end of file
+    name = 'projects'
+
+    def ready(self):
+        from . import counters, signals  # noqa: F401
+        post_migrate.connect(install_search_fallback, sender=self)
+        post_migrate.connect(create_future_partitions, sender=self)
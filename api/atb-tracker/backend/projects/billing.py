@@ -0,0 +1,137 @@
+"""
+Billable revenue, cost and margin aggregation.
+
+Revenue is billable minutes x the member's hourly ``rate``; cost is all logged
+minutes x the member's hourly ``cost``. Rows are grouped by client currency,
+period, client and project in a single aggregate query over time entries.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, NullIf, TruncDay, TruncMonth, TruncWeek
+
+PERIODS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+CENTS = Decimal('0.01')
+MINUTES_PER_HOUR = Decimal(60)
+
+_money_minutes = DecimalField(max_digits=20, decimal_places=2)
+
+
+def billing_rows(queryset, period='month', minutes_field='duration', billable_field=None):
+    """
+    Aggregate a TimeEntry queryset into one row per (currency, period, client, project).
+
+    Querysets of pre-aggregated rows (archived daily rollups) pass their minutes
+    column as ``minutes_field`` and their billable minutes column as ``billable_field``.
+    """
+    trunc = PERIODS[period]
+    if billable_field:
+        billable_minutes = Coalesce(Sum(billable_field), 0)
+        rate_minutes = Sum(ExpressionWrapper(F(billable_field) * F('user__rate'), output_field=_money_minutes))
+    else:
+        billable_minutes = Coalesce(Sum(minutes_field, filter=Q(billable=True)), 0)
+        rate_minutes = Sum(
+            ExpressionWrapper(F(minutes_field) * F('user__rate'), output_field=_money_minutes),
+            filter=Q(billable=True),
+        )
+    rows = (
+        queryset
+        .annotate(
+            period=trunc('date'),
+            currency=Coalesce(
+                NullIf('project__client__currency', Value('')),
+                Value(settings.BILLING_DEFAULT_CURRENCY),
+            ),
+        )
+        .values(
+            'currency', 'period',
+            'project__client_id', 'project__client__name',
+            'project_id', 'project__name',
+        )
+        .annotate(
+            # Aliases differ from rollup column names, which annotations may not shadow
+            total_minutes=Sum(minutes_field),
+            total_billable_minutes=billable_minutes,
+            rate_minutes=rate_minutes,
+            cost_minutes=Sum(ExpressionWrapper(F(minutes_field) * F('user__cost'), output_field=_money_minutes)),
+        )
+        .order_by('currency', 'period', 'project__client__name', 'project__name')
+    )
+    return [
+        {
+            'currency': row['currency'],
+            'period': row['period'],
+            'client_id': row['project__client_id'],
+            'client_name': row['project__client__name'],
+            'project_id': row['project_id'],
+            'project_name': row['project__name'],
+            'minutes': row['total_minutes'],
+            'billable_minutes': row['total_billable_minutes'],
+            'revenue': _hours_amount(row['rate_minutes']),
+            'cost': _hours_amount(row['cost_minutes']),
+        }
+        for row in rows
+    ]
+
+
+def merge_billing_rows(*row_lists):
+    """Combine billing rows of several sources, summing rows with the same key"""
+    merged = {}
+    for rows in row_lists:
+        for row in rows:
+            key = (row['currency'], row['period'], row['client_id'], row['project_id'])
+            if key not in merged:
+                merged[key] = dict(row)
+                continue
+            for field in ('minutes', 'billable_minutes', 'revenue', 'cost'):
+                merged[key][field] += row[field]
+    return sorted(
+        merged.values(),
+        key=lambda row: (row['currency'], row['period'], row['client_name'] or '', row['project_name']),
+    )
+
+
+def _hours_amount(rate_minutes):
+    if rate_minutes is None:
+        return Decimal('0.00')
+    return (Decimal(rate_minutes) / MINUTES_PER_HOUR).quantize(CENTS)
+
+
+def summarize(rows):
+    """Group billing rows by currency with per-currency totals, ready for JSON output"""
+    currencies = {}
+    for row in rows:
+        group = currencies.setdefault(row['currency'], {
+            'currency': row['currency'],
+            'minutes': 0,
+            'billable_minutes': 0,
+            'revenue': Decimal('0.00'),
+            'cost': Decimal('0.00'),
+            'rows': [],
+        })
+        group['minutes'] += row['minutes']
+        group['billable_minutes'] += row['billable_minutes']
+        group['revenue'] += row['revenue']
+        group['cost'] += row['cost']
+        group['rows'].append({
+            **row,
+            'period': row['period'].isoformat() if row['period'] else None,
+            'revenue': str(row['revenue']),
+            'cost': str(row['cost']),
+            'margin': str(row['revenue'] - row['cost']),
+        })
+
+    result = []
+    for currency in sorted(currencies):
+        group = currencies[currency]
+        group['margin'] = str(group['revenue'] - group['cost'])
+        group['revenue'] = str(group['revenue'])
+        group['cost'] = str(group['cost'])
+        result.append(group)
+    return result
@@ -0,0 +1,260 @@
+"""
+Denormalized counters on projects and clients.
+
+``Project`` keeps ``task_count``, ``completed_task_count``, ``total_minutes``,
+``billable_minutes`` and ``last_activity_at``; ``Client`` keeps ``project_count``
+and ``total_minutes``. Every Task, TimeEntry and Project write adjusts them with
+F() expressions in the write's own transaction (``CountedModelMixin.save()`` is
+atomic and deletes always are), so concurrent writers never lose an update. The
+difference is taken against the values the instance was loaded with, so an
+update costs no extra read.
+
+Archived time entries keep counting: the archiver deletes the rows it moves
+inside ``keeping_counts()``, which leaves the counters alone, and
+``recompute_counters`` adds the archive rollups back in. Writes
+that bypass the ORM are repaired with ``manage.py recompute_counters``.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Client, Project, Task, TimeEntry
+
+COMPLETED = 'completed'
+
+# Set while deleted time entries are moved elsewhere rather than dropped
+_keep_counts = ContextVar('keep_counts', default=False)
+
+
+def _is_completed(status):
+    # 1 or 0, to be added to the counters
+    return int(bool(status) and status.lower() == COMPLETED)
+
+
+def _progress(tasks, completed):
+    # Evaluated in the UPDATE itself, against the counts before the change
+    return Case(
+        When(Q(auto_progress=True) & Q(task_count__gt=-tasks),
+             then=(F('completed_task_count') + completed) * 100 / (F('task_count') + tasks)),
+        When(auto_progress=True, then=Value(0)),
+        default=F('progress'),
+    )
+
+
+def touch_client_projects(clients, using=None, exclude=None):
+    """Move ``updated_at`` of the projects of ``clients``: they embed the client and its counters"""
+    projects = Project.objects.using(using).filter(client__in=clients)
+    if exclude is not None:
+        projects = projects.exclude(pk=exclude)
+    projects.update(updated_at=timezone.now())
+
+
+def adjust_project(project_id, using=None, tasks=0, completed=0, minutes=0, billable=0, activity=None):
+    """Apply counter deltas to a project and the total of its client"""
+    changes = {}
+    if tasks:
+        changes['task_count'] = F('task_count') + tasks
+    if completed:
+        changes['completed_task_count'] = F('completed_task_count') + completed
+    if tasks or completed:
+        changes['progress'] = _progress(tasks, completed)
+    if minutes:
+        changes['total_minutes'] = F('total_minutes') + minutes
+    if billable:
+        changes['billable_minutes'] = F('billable_minutes') + billable
+    if activity is not None:
+        changes['last_activity_at'] = activity
+    if not changes:
+        return
+    # Counters are part of the project's representation, so its ETag must move
+    changes['updated_at'] = timezone.now()
+    Project.objects.using(using).filter(pk=project_id).update(**changes)
+    if minutes:
+        Client.objects.using(using).filter(projects=project_id).update(total_minutes=F('total_minutes') + minutes)
+        touch_client_projects(Client.objects.using(using).filter(projects=project_id), using, exclude=project_id)
+
+
+def add_time_entries(entries, using=None):
+    """Count time entries created without ``save()`` (``bulk_create``)"""
+    totals = {}
+    for entry in entries:
+        minutes, billable = totals.get(entry.project_id, (0, 0))
+        totals[entry.project_id] = (minutes + entry.duration, billable + (entry.duration if entry.billable else 0))
+    now = timezone.now()
+    for project_id, (minutes, billable) in totals.items():
+        adjust_project(project_id, using, minutes=minutes, billable=billable, activity=now)
+
+
+@contextmanager
+def keeping_counts():
+    """Time entries deleted inside the block stay in their project's and client's counters"""
+    token = _keep_counts.set(True)
+    try:
+        yield
+    finally:
+        _keep_counts.reset(token)
+
+
+def _deleted_directly(origin, model):
+    # Rows cascaded from a project or member delete go with their counters
+    return getattr(origin, 'model', type(origin)) is model
+
+
+def _stored_state(instance, using):
+    return type(instance)._base_manager.using(using).filter(pk=instance.pk).values_list(
+        *instance.counted_fields,
+    ).first()
+
+
+def _saved_state(instance, using):
+    # Fields deferred on load stay deferred after save(); read them back
+    instance._counted = instance.counted_state() or _stored_state(instance, using)
+    return instance._counted
+
+
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=TimeEntry)
+@receiver(pre_save, sender=Project)
+def load_counted_state(sender, instance, raw, using, **kwargs):
+    # Instances built by hand or loaded with deferred fields: read what is stored
+    if not raw and not instance._state.adding and getattr(instance, '_counted', None) is None:
+        instance._counted = _stored_state(instance, using)
+
+
+@receiver(post_save, sender=Task)
+def count_task(sender, instance, created, raw, using, **kwargs):
+    if raw:
+        return
+    old = None if created else instance._counted
+    new = _saved_state(instance, using)
+    if old is not None and old[0] != new[0]:
+        adjust_project(old[0], using, tasks=-1, completed=-_is_completed(old[1]))
+        old = None
+    if old is None:
+        adjust_project(new[0], using, tasks=1, completed=_is_completed(new[1]), activity=instance.updated_at)
+    else:
+        adjust_project(new[0], using, completed=_is_completed(new[1]) - _is_completed(old[1]),
+                       activity=instance.updated_at)
+
+
+@receiver(post_delete, sender=Task)
+def uncount_task(sender, instance, using, origin=None, **kwargs):
+    if _deleted_directly(origin, Task):
+        project_id, status = instance._counted or instance.counted_state()
+        adjust_project(project_id, using, tasks=-1, completed=-_is_completed(status))
+
+
+@receiver(post_save, sender=TimeEntry)
+def count_time_entry(sender, instance, created, raw, using, **kwargs):
+    if raw:
+        return
+    old = None if created else instance._counted
+    project_id, duration, billable = _saved_state(instance, using)
+    minutes, billable_minutes = duration, duration if billable else 0
+    if old is not None:
+        old_project, old_duration, old_billable = old
+        if old_project != project_id:
+            adjust_project(old_project, using, minutes=-old_duration, billable=-old_duration if old_billable else 0)
+        else:
+            minutes -= old_duration
+            billable_minutes -= old_duration if old_billable else 0
+    adjust_project(project_id, using, minutes=minutes, billable=billable_minutes, activity=instance.updated_at)
+
+
+@receiver(post_delete, sender=TimeEntry)
+def uncount_time_entry(sender, instance, using, origin=None, **kwargs):
+    if _deleted_directly(origin, TimeEntry) and not _keep_counts.get():
+        project_id, duration, billable = instance._counted or instance.counted_state()
+        adjust_project(project_id, using, minutes=-duration, billable=-duration if billable else 0)
+
+
+@receiver(post_save, sender=Project)
+def count_client_project(sender, instance, created, raw, using, **kwargs):
+    if raw:
+        return
+    old_client = None if created or instance._counted is None else instance._counted[0]
+    (client_id,) = _saved_state(instance, using)
+    if old_client == client_id:
+        return
+    minutes = Subquery(Project.objects.using(using).filter(pk=instance.pk).values('total_minutes'))
+    if old_client is not None:
+        Client.objects.using(using).filter(pk=old_client).update(
+            project_count=F('project_count') - 1, total_minutes=F('total_minutes') - minutes,
+        )
+    if client_id is not None:
+        Client.objects.using(using).filter(pk=client_id).update(
+            project_count=F('project_count') + 1, total_minutes=F('total_minutes') + minutes,
+        )
+    touch_client_projects([pk for pk in (old_client, client_id) if pk is not None], using, exclude=instance.pk)
+
+
+@receiver(pre_delete, sender=Project)
+def uncount_client_project(sender, instance, using, origin=None, **kwargs):
+    # pre_delete: the project's stored total is still there to subtract
+    if _deleted_directly(origin, Project) and instance.client_id is not None:
+        minutes = Subquery(Project.objects.using(using).filter(pk=instance.pk).values('total_minutes'))
+        Client.objects.using(using).filter(pk=instance.client_id).update(
+            project_count=F('project_count') - 1, total_minutes=F('total_minutes') - minutes,
+        )
+        touch_client_projects([instance.client_id], using, exclude=instance.pk)
+
+
+def _total(queryset, aggregate):
+    return Coalesce(Subquery(queryset.annotate(value=aggregate).values('value')), 0)
+
+
+def project_counter_values(task_model, entry_model, rollup_model):
+    """Expressions recomputing every project counter, for ``update()`` or ``alias()`` on projects"""
+    tasks = task_model.objects.filter(project=OuterRef('pk')).order_by().values('project')
+    entries = entry_model.objects.filter(project=OuterRef('pk')).order_by().values('project')
+    rollups = rollup_model.objects.filter(project=OuterRef('pk'), kind='timeentry').order_by().values('project')
+    last_task = Subquery(tasks.annotate(value=Max('updated_at')).values('value'))
+    last_entry = Subquery(entries.annotate(value=Max('updated_at')).values('value'))
+    return {
+        'task_count': _total(tasks, Count('pk')),
+        'completed_task_count': _total(tasks.filter(status__iexact=COMPLETED), Count('pk')),
+        'total_minutes': _total(entries, Sum('duration')) + _total(rollups, Sum('minutes')),
+        'billable_minutes': (
+            _total(entries.filter(billable=True), Sum('duration')) + _total(rollups, Sum('billable_minutes'))
+        ),
+        # GREATEST is NULL on SQLite as soon as one side is
+        'last_activity_at': Greatest(Coalesce(last_task, last_entry), Coalesce(last_entry, last_task)),
+    }
+
+
+def client_counter_values(project_model):
+    """Expressions recomputing every client counter from the project counters"""
+    projects = project_model.objects.filter(client=OuterRef('pk')).order_by().values('client')
+    return {
+        'project_count': _total(projects, Count('pk')),
+        'total_minutes': _total(projects, Sum('total_minutes')),
+    }
+
+
+AUTO_PROGRESS = Case(
+    When(task_count__gt=0, then=F('completed_task_count') * 100 / F('task_count')),
+    default=Value(0),
+)
+
+
+def drifted(queryset, values):
+    """The rows of ``queryset`` whose stored counters differ from ``values``"""
+    expected = {f'expected_{name}': expression for name, expression in values.items()}
+    stale = Q()
+    for name in values:
+        expected_name = f'expected_{name}'
+        differs = ~Q(**{name: F(expected_name)})
+        if queryset.model._meta.get_field(name).null:
+            # NULL compares as unknown: two NULLs are equal, one NULL differs
+            differs = (
+                (Q(**{f'{name}__isnull': False, f'{expected_name}__isnull': False}) & differs)
+                | Q(**{f'{name}__isnull': True, f'{expected_name}__isnull': False})
+                | Q(**{f'{name}__isnull': False, f'{expected_name}__isnull': True})
+            )
+        stale |= differs
+    return queryset.alias(**expected).filter(stale)
@@ -0,0 +1,101 @@
+"""
+Day-of-week x hour-of-day heatmap of tracked time.
+
+Each entry's ``started_at``/``ended_at`` range, stored as UTC instants built from
+the clock times in the user's timezone (see ``projects.ranges``), is converted
+back into that timezone once, split at local hour boundaries and its minutes are
+summed into a 7 x 24 grid (Monday first).
+
+PostgreSQL splits entries with ``generate_series`` in SQL; other backends fetch
+the raw columns and split them with NumPy.
+"""
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connections
+
+from atb_tracker.lazy import lazy_module
+
+np = lazy_module('numpy')
+
+EPOCH_WEEKDAY = date(1970, 1, 1).weekday()
+
+
+def _filtered(queryset, project_id=None, client_id=None):
+    if project_id is not None:
+        queryset = queryset.filter(project_id=project_id)
+    if client_id is not None:
+        queryset = queryset.filter(project__client_id=client_id)
+    return queryset
+
+
+def heatmap(queryset, tz, project_id=None, client_id=None):
+    """Return a 7 x 24 grid of minutes for the time entries in ``queryset``"""
+    queryset = _filtered(queryset, project_id, client_id)
+    if connections[queryset.db].vendor == 'postgresql':
+        grid = _heatmap_postgres(queryset, tz)
+    else:
+        grid = _heatmap_numpy(queryset, tz)
+    return np.rint(grid).astype(int).tolist()
+
+
+def _heatmap_postgres(queryset, tz):
+    entries_sql, entries_params = queryset.values('started_at', 'ended_at').query.sql_with_params()
+    sql = (
+        "WITH entries AS (" + entries_sql + "), spans AS ("
+        " SELECT started_at AT TIME ZONE %s AS local_start, ended_at AT TIME ZONE %s AS local_end"
+        " FROM entries"
+        ")"
+        " SELECT EXTRACT(ISODOW FROM h)::int - 1, EXTRACT(HOUR FROM h)::int,"
+        " SUM(EXTRACT(EPOCH FROM LEAST(local_end, h + interval '1 hour') - GREATEST(local_start, h)) / 60)"
+        " FROM spans, generate_series(date_trunc('hour', local_start), local_end - interval '1 microsecond',"
+        " interval '1 hour') AS h"
+        " GROUP BY 1, 2"
+    )
+    grid = np.zeros((7, 24))
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, (*entries_params, str(tz), str(tz)))
+        for weekday, hour, minutes in cursor.fetchall():
+            grid[weekday, hour] = float(minutes)
+    return grid
+
+
+def _utc_offsets(hours, tz):
+    """Offset in seconds of ``tz`` at each distinct UTC hour (seconds since the epoch // 3600)"""
+    return {
+        hour: int(datetime.fromtimestamp(hour * 3600, dt_timezone.utc).astimezone(tz).utcoffset().total_seconds())
+        for hour in hours
+    }
+
+
+def _epoch_seconds(values):
+    return np.fromiter((int(value.timestamp()) for value in values), dtype=np.int64, count=len(values))
+
+
+def _heatmap_numpy(queryset, tz):
+    rows = list(queryset.values_list('started_at', 'ended_at'))
+    grid = np.zeros((7, 24))
+    if not rows:
+        return grid
+
+    starts, ends = zip(*rows)
+    start = _epoch_seconds(starts)
+    end = _epoch_seconds(ends)
+    # Local seconds since the epoch, as AT TIME ZONE gives them: offsets change on the
+    # hour, so they are looked up once per distinct UTC hour of a start or an end
+    offsets = _utc_offsets(np.unique(np.concatenate((start, end)) // 3600).tolist(), tz)
+    start = start + np.fromiter((offsets[hour] for hour in (start // 3600).tolist()), dtype=np.int64, count=len(rows))
+    end = end + np.fromiter((offsets[hour] for hour in (end // 3600).tolist()), dtype=np.int64, count=len(rows))
+    # Across a DST fall-back the local end can precede the start; such an entry adds nothing
+    end = np.maximum(end, start)
+
+    # One cell per (entry, hour touched)
+    first_hour = start // 3600
+    cells = (end - 1) // 3600 - first_hour + 1
+    entry = np.repeat(np.arange(len(rows)), cells)
+    cell_offset = np.arange(cells.sum()) - np.repeat(np.cumsum(cells) - cells, cells)
+    hour = first_hour[entry] + cell_offset
+
+    seconds = np.minimum(end[entry], (hour + 1) * 3600) - np.maximum(start[entry], hour * 3600)
+    weekday = (hour // 24 + EPOCH_WEEKDAY) % 7
+    np.add.at(grid, (weekday, hour % 24), seconds / 60)
+    return grid
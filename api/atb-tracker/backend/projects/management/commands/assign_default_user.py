@@ -1,56 +1,60 @@
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from jobs.chunking import update_in_chunks
 from projects.models import Project, Client, Task, TimeEntry, Tag
 from pomodoro.models import PomodoroSession
 from users.models import Member
 
 class Command(BaseCommand):
-    help = 'Assign default user to existing data without user ownership'
+    help = 'Assign default user to existing data without user ownership, one short transaction per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows updated per transaction')
 
     def handle(self, *args, **options):
-        with transaction.atomic():
-            # Get or create a default user
-            default_user, created = Member.objects.get_or_create(
-                email='default@example.com',
-                defaults={
-                    'name': 'Default User',
-                    'password': 'defaultpassword123'
-                }
+        size = options['batch_size']
+        # Get or create a default user
+        default_user, created = Member.objects.get_or_create(
+            email='default@example.com',
+            defaults={
+                'first_name': 'Default',
+                'last_name': 'User',
+                'password': 'defaultpassword123'
+            }
+        )
+        
+        if created:
+            self.stdout.write(
+                self.style.SUCCESS(f'Created default user: {default_user.email}')
             )
-            
-            if created:
-                self.stdout.write(
-                    self.style.SUCCESS(f'Created default user: {default_user.email}')
-                )
-            else:
-                self.stdout.write(
-                    self.style.SUCCESS(f'Using existing default user: {default_user.email}')
-                )
-
-            # Update projects
-            projects_updated = Project.objects.filter(user__isnull=True).update(user=default_user)
-            self.stdout.write(f'Updated {projects_updated} projects')
-
-            # Update clients
-            clients_updated = Client.objects.filter(user__isnull=True).update(user=default_user)
-            self.stdout.write(f'Updated {clients_updated} clients')
-
-            # Update tasks
-            tasks_updated = Task.objects.filter(user__isnull=True).update(user=default_user)
-            self.stdout.write(f'Updated {tasks_updated} tasks')
-
-            # Update time entries
-            time_entries_updated = TimeEntry.objects.filter(user__isnull=True).update(user=default_user)
-            self.stdout.write(f'Updated {time_entries_updated} time entries')
-
-            # Update tags
-            tags_updated = Tag.objects.filter(user__isnull=True).update(user=default_user)
-            self.stdout.write(f'Updated {tags_updated} tags')
-
-            # Update pomodoro sessions
-            pomodoro_updated = PomodoroSession.objects.filter(user__isnull=True).update(user=default_user)
-            self.stdout.write(f'Updated {pomodoro_updated} pomodoro sessions')
-
+        else:
             self.stdout.write(
-                self.style.SUCCESS('Successfully assigned default user to all existing data')
-            ) 
\ No newline at end of file
+                self.style.SUCCESS(f'Using existing default user: {default_user.email}')
+            )
+
+        # Update projects
+        projects_updated = update_in_chunks(Project.objects.filter(user__isnull=True), size, user=default_user)
+        self.stdout.write(f'Updated {projects_updated} projects')
+
+        # Update clients
+        clients_updated = update_in_chunks(Client.objects.filter(user__isnull=True), size, user=default_user)
+        self.stdout.write(f'Updated {clients_updated} clients')
+
+        # Update tasks
+        tasks_updated = update_in_chunks(Task.objects.filter(user__isnull=True), size, user=default_user)
+        self.stdout.write(f'Updated {tasks_updated} tasks')
+
+        # Update time entries
+        time_entries_updated = update_in_chunks(TimeEntry.objects.filter(user__isnull=True), size, user=default_user)
+        self.stdout.write(f'Updated {time_entries_updated} time entries')
+
+        # Update tags
+        tags_updated = update_in_chunks(Tag.objects.filter(user__isnull=True), size, user=default_user)
+        self.stdout.write(f'Updated {tags_updated} tags')
+
+        # Update pomodoro sessions
+        pomodoro_updated = update_in_chunks(PomodoroSession.objects.filter(user__isnull=True), size, user=default_user)
+        self.stdout.write(f'Updated {pomodoro_updated} pomodoro sessions')
+
+        self.stdout.write(
+            self.style.SUCCESS('Successfully assigned default user to all existing data')
+        ) 
\ No newline at end of file
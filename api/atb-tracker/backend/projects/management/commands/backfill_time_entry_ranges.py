@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from atb_tracker.sharding import shard_aliases
+from projects.ranges import backfill_entry_ranges
+
+
+class Command(BaseCommand):
+    help = 'Fill TimeEntry.started_at/ended_at for rows that are missing them, in id-range chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Ids covered by each UPDATE')
+
+    def handle(self, *args, **options):
+        updated = sum(
+            backfill_entry_ranges(connections[alias], options['chunk_size'], log=self.stdout.write)
+            for alias in shard_aliases()
+        )
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {updated} time entries'))
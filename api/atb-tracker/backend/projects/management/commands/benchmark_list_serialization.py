@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from atb_tracker.fastpath import compile_row_converter
+from pomodoro.models import PomodoroSession
+from pomodoro.serializers import PomodoroSessionSerializer
+from projects.models import TimeEntry
+from projects.serializers import TimeEntrySerializer
+from users.models import Member
+
+
+class Command(BaseCommand):
+    help = 'Check the values_list() list fast path against the serializers and report rows/sec for both'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Member whose time entries and pomodoro sessions are rendered')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per path (best run is reported)')
+
+    def handle(self, *args, **options):
+        try:
+            user = Member.objects.get(email=options['email'])
+        except Member.DoesNotExist:
+            raise CommandError(f"Member {options['email']} does not exist")
+
+        request = Request(APIRequestFactory().get('/'))
+        cases = [
+            ('time entries', TimeEntry.objects.filter(user=user), TimeEntrySerializer),
+            ('pomodoro sessions', PomodoroSession.objects.filter(user=user), PomodoroSessionSerializer),
+        ]
+        for label, queryset, serializer_class in cases:
+            self.run_case(label, queryset, serializer_class, request, options['repeat'])
+
+    def run_case(self, label, queryset, serializer_class, request, repeat):
+        context = {'request': request}
+
+        def serializer_path():
+            return serializer_class(queryset.all(), many=True, context=context).data
+
+        def fast_path():
+            columns, convert = compile_row_converter(serializer_class(context=context))
+            return [convert(row) for row in queryset.values_list(*columns)]
+
+        renderer = JSONRenderer()
+        if renderer.render(serializer_path()) != renderer.render(fast_path()):
+            raise CommandError(f'Fast path output differs from {serializer_class.__name__} for {label}')
+
+        rows = queryset.count()
+        self.stdout.write(self.style.SUCCESS(f'{label}: {rows} rows, output identical'))
+        for name, func in [(serializer_class.__name__, serializer_path), ('values_list fast path', fast_path)]:
+            best = min(self.time_once(func) for _ in range(repeat))
+            rate = rows / best if best else 0
+            self.stdout.write(f'  {name:<32} {best * 1000:9.2f} ms  {rate:12.0f} rows/sec')
+
+    def time_once(self, func):
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started
@@ -0,0 +1,67 @@
+import gzip
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from atb_tracker import middleware, renderers
+from projects.models import Project, TimeEntry
+from projects.serializers import ProjectSerializer, TimeEntrySerializer
+from users.models import Member
+
+
+class Command(BaseCommand):
+    help = 'Report CPU time per response and bytes on the wire for each renderer and encoding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Member whose time entries and projects are rendered')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per renderer (best run is reported)')
+
+    def handle(self, *args, **options):
+        try:
+            user = Member.objects.get(email=options['email'])
+        except Member.DoesNotExist:
+            raise CommandError(f"Member {options['email']} does not exist")
+
+        context = {'request': Request(APIRequestFactory().get('/'))}
+        cases = [
+            ('time entry list', TimeEntrySerializer(TimeEntry.objects.filter(user=user), many=True, context=context).data),
+            ('project list', ProjectSerializer(
+                Project.objects.filter(user=user).select_related('client').prefetch_related('tags'),
+                many=True, context=context,
+            ).data),
+        ]
+
+        encoders = [('stdlib json', JSONRenderer())]
+        if renderers.orjson is not None:
+            encoders.append(('orjson', renderers.FastJSONRenderer()))
+        if renderers.msgpack is not None:
+            encoders.append(('msgpack', renderers.MessagePackRenderer()))
+
+        for label, data in cases:
+            self.stdout.write(self.style.SUCCESS(f'{label}: {len(data)} rows'))
+            for name, renderer in encoders:
+                body, seconds = self.best_of(options['repeat'], renderer.render, data)
+                self.stdout.write(f'  {name:<14} render {seconds * 1000:8.2f} ms  {len(body):>10} bytes')
+                self.report_compression(body, options['repeat'])
+
+    def report_compression(self, body, repeat):
+        compressors = [('gzip', lambda raw: gzip.compress(raw, compresslevel=6))]
+        if middleware.brotli is not None:
+            quality = settings.BROTLI_QUALITY
+            compressors.append(('brotli', lambda raw: middleware.brotli.compress(raw, quality=quality)))
+        for name, compress in compressors:
+            compressed, seconds = self.best_of(repeat, compress, body)
+            self.stdout.write(f'    + {name:<10} {seconds * 1000:8.2f} ms  {len(compressed):>10} bytes')
+
+    def best_of(self, repeat, func, *args):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func(*args)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
@@ -0,0 +1,127 @@
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F, Q
+
+from projects.models import Client, Project, TimeEntry
+from projects.ranges import entry_range, overlapping
+from users.models import Member
+
+ONE_DAY = timedelta(days=1)
+
+
+def _legacy_overlap_q(day, start_time, end_time):
+    """The date/start_time/end_time predicate used before started_at/ended_at existed"""
+    crosses_midnight = end_time <= start_time
+    same_day_regular = Q(date=day, end_time__gt=F('start_time')) & Q(end_time__gt=start_time)
+    same_day_overnight = Q(date=day, end_time__lte=F('start_time'))
+    if not crosses_midnight:
+        same_day_regular &= Q(start_time__lt=end_time)
+        same_day_overnight &= Q(start_time__lt=end_time)
+    query = (
+        same_day_regular
+        | same_day_overnight
+        | Q(date=day - ONE_DAY, end_time__lte=F('start_time'), end_time__gt=start_time)
+    )
+    if crosses_midnight:
+        query |= Q(date=day + ONE_DAY, start_time__lt=end_time)
+    return query & Q(date__gte=day - ONE_DAY, date__lte=day + ONE_DAY)
+
+
+class Command(BaseCommand):
+    help = 'Compare overlap query latency on date/time columns against the started_at/ended_at range'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Synthetic entries to generate (e.g. 10000000)')
+        parser.add_argument('--users', type=int, default=100, help='Entries are spread over this many synthetic users')
+        parser.add_argument('--queries', type=int, default=200, help='Random overlap windows per variant')
+        parser.add_argument('--batch-size', type=int, default=20000)
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic data for later runs')
+
+    def handle(self, *args, **options):
+        users = self._users(options['users'])
+        existing = TimeEntry.objects.filter(user__in=users).count()
+        if existing < options['rows']:
+            self._generate(users, options['rows'] - existing, options['batch_size'])
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE projects_timeentry')
+
+        rng = random.Random(42)
+        windows = []
+        for _ in range(options['queries']):
+            day = date(2020, 1, 1) + timedelta(days=rng.randrange(365 * 3))
+            start = datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(0, 24 * 60, 15))
+            end = start + timedelta(minutes=rng.choice((30, 60, 120, 600)))
+            windows.append((rng.choice(users), day, start.time(), end.time()))
+
+        legacy, ranged = [], []
+        for user, day, start_time, end_time in windows:
+            queryset = TimeEntry.objects.filter(user=user)
+
+            began = time.perf_counter()
+            before = set(queryset.filter(_legacy_overlap_q(day, start_time, end_time)).values_list('pk', flat=True))
+            legacy.append(time.perf_counter() - began)
+
+            began = time.perf_counter()
+            after = set(overlapping(queryset, *entry_range(day, start_time, end_time)).values_list('pk', flat=True))
+            ranged.append(time.perf_counter() - began)
+
+            if before != after:
+                raise CommandError(f'Results differ for {user.email} {day} {start_time}-{end_time}')
+
+        total = TimeEntry.objects.filter(user__in=users).count()
+        self.stdout.write(f'{total} entries over {len(users)} users, {len(windows)} windows')
+        for name, timings in (('date/time columns', legacy), ('started_at/ended_at', ranged)):
+            timings.sort()
+            self.stdout.write(
+                f'{name:>20}: median {statistics.median(timings) * 1000:.3f} ms, '
+                f'p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.3f} ms'
+            )
+
+        if not options['keep']:
+            Member.objects.filter(email__startswith='bench-ranges').delete()
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def _users(self, count):
+        users = []
+        for i in range(count):
+            user, _ = Member.objects.get_or_create(email=f'bench-ranges-{i}@example.invalid', defaults={'first_name': 'Bench'})
+            users.append(user)
+        return users
+
+    def _generate(self, users, rows, batch_size):
+        rng = random.Random(7)
+        projects = {}
+        for user in users:
+            client, _ = Client.objects.get_or_create(user=user, name='Bench client')
+            projects[user.id], _ = Project.objects.get_or_create(user=user, name='Bench project', defaults={'client': client})
+
+        created = 0
+        while created < rows:
+            batch = []
+            for _ in range(min(batch_size, rows - created)):
+                user = rng.choice(users)
+                day = date(2020, 1, 1) + timedelta(days=rng.randrange(365 * 3))
+                start_minute = rng.randrange(0, 24 * 60, 5)
+                duration = rng.choice((15, 30, 45, 60, 90, 120, 240))
+                end_minute = (start_minute + duration) % (24 * 60)
+                entry = TimeEntry(
+                    user=user,
+                    project=projects[user.id],
+                    description='Benchmark entry',
+                    date=day,
+                    start_time=datetime.min.replace(hour=start_minute // 60, minute=start_minute % 60).time(),
+                    end_time=datetime.min.replace(hour=end_minute // 60, minute=end_minute % 60).time(),
+                    duration=duration,
+                )
+                # Synthetic users have no profile, so their clock times are UTC
+                entry.sync_range(dt_timezone.utc)
+                batch.append(entry)
+            TimeEntry.objects.bulk_create(batch)
+            created += len(batch)
+            self.stderr.write(f'Generated {created}/{rows} entries')
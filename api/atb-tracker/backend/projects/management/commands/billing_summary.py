@@ -0,0 +1,88 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.dateparse import parse_date
+
+from archive.models import DailyRollup
+from atb_tracker.sharding import shard_aliases, use_shard
+from projects.billing import PERIODS, billing_rows, merge_billing_rows, summarize
+from projects.models import TimeEntry
+
+
+def _init_worker():
+    # Spawned workers start without Django configured; forked ones inherit it
+    django.setup()
+
+
+def _billing_rows_for_users(alias, user_ids, start, end, period):
+    with use_shard(alias):
+        qs = TimeEntry.objects.filter(user_id__in=user_ids, date__gte=start, date__lte=end)
+        archived = DailyRollup.objects.filter(kind='timeentry', user_id__in=user_ids, date__gte=start, date__lte=end)
+        rows = merge_billing_rows(
+            billing_rows(qs, period),
+            billing_rows(archived, period, minutes_field='minutes', billable_field='billable_minutes'),
+        )
+    connections.close_all()
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Compute billable revenue, cost and margin for all users, grouped by currency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', required=True, help='First day of the billing run (YYYY-MM-DD)')
+        parser.add_argument('--end', required=True, help='Last day of the billing run (YYYY-MM-DD)')
+        parser.add_argument('--period', choices=list(PERIODS), default='month')
+        parser.add_argument('--workers', type=int, default=4, help='Worker processes (1 runs inline)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Users aggregated per worker task')
+
+    def handle(self, *args, **options):
+        start = parse_date(options['start'])
+        end = parse_date(options['end'])
+        if start is None or end is None:
+            raise CommandError('--start and --end must be YYYY-MM-DD dates')
+
+        size = options['chunk_size']
+        chunks = []
+        user_count = 0
+        for alias in shard_aliases():
+            with use_shard(alias):
+                user_ids = sorted(
+                    set(
+                        TimeEntry.objects.filter(date__gte=start, date__lte=end)
+                        .values_list('user_id', flat=True).distinct()
+                    )
+                    | set(
+                        DailyRollup.objects.filter(kind='timeentry', date__gte=start, date__lte=end)
+                        .values_list('user_id', flat=True).distinct()
+                    )
+                )
+            user_count += len(user_ids)
+            chunks += [(alias, user_ids[i:i + size]) for i in range(0, len(user_ids), size)]
+        self.stderr.write(f'Aggregating {user_count} users in {len(chunks)} chunks')
+
+        rows = []
+        if options['workers'] <= 1:
+            for alias, chunk in chunks:
+                rows.extend(_billing_rows_for_users(alias, chunk, start, end, options['period']))
+        else:
+            # Children must not share the parent's database sockets
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                futures = [
+                    pool.submit(_billing_rows_for_users, alias, chunk, start, end, options['period'])
+                    for alias, chunk in chunks
+                ]
+                for future in futures:
+                    rows.extend(future.result())
+
+        rows.sort(key=lambda row: (row['currency'], row['period'], row['client_name'] or '', row['project_name']))
+        self.stdout.write(json.dumps({
+            'period': options['period'],
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'currencies': summarize(rows),
+        }, indent=2))
@@ -0,0 +1,71 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from atb_tracker.sharding import use_shard
+from projects.models import Project
+from projects.overlap import entry_write_lock
+from projects.serializers import TimeEntrySerializer
+from users.models import Member
+from users.shards import shard_for
+
+
+class Command(BaseCommand):
+    help = 'Import time entries for a user from a CSV file, rejecting overlapping entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Owner of the imported entries')
+        parser.add_argument('path', help='CSV with project, description, date, start_time, end_time, duration, billable, type columns')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Entries validated and inserted per batch')
+
+    def handle(self, *args, **options):
+        try:
+            user = Member.objects.get(email=options['email'])
+        except Member.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        with use_shard(shard_for(user.pk)) as alias:
+            created = self._import(user, options, alias)
+        self.stdout.write(self.style.SUCCESS(f'Imported {created} time entries for {user.email}'))
+
+    def _import(self, user, options, alias):
+        projects = dict(Project.objects.filter(user=user).values_list('name', 'id'))
+        project_ids = set(projects.values())
+
+        with open(options['path'], newline='') as f:
+            rows = list(csv.DictReader(f))
+
+        def project_id(value):
+            if value.isdigit() and int(value) in project_ids:
+                return int(value)
+            if value in projects:
+                return projects[value]
+            raise CommandError(f'Unknown project {value!r} for {user.email}')
+
+        entries = [
+            {
+                'project': project_id(row['project'].strip()),
+                'description': row.get('description', ''),
+                'date': row['date'],
+                'start_time': row['start_time'],
+                'end_time': row['end_time'],
+                'duration': row.get('duration') or 0,
+                'billable': row.get('billable', '').strip().lower() in ('1', 'true', 'yes'),
+                'type': row.get('type') or 'regular',
+            }
+            for row in rows
+        ]
+
+        size = options['batch_size']
+        created = 0
+        with entry_write_lock(user, using=alias):
+            for offset in range(0, len(entries), size):
+                serializer = TimeEntrySerializer(data=entries[offset:offset + size], many=True, context={'user': user})
+                if not serializer.is_valid():
+                    errors = [
+                        f'row {offset + i + 2}: {error}'
+                        for i, error in enumerate(serializer.errors) if error
+                    ] if isinstance(serializer.errors, list) else [str(serializer.errors)]
+                    raise CommandError('Import aborted:\n' + '\n'.join(errors))
+                created += len(serializer.save(user=user))
+        return created
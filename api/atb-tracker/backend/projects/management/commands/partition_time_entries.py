@@ -0,0 +1,58 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from projects.models import TimeEntry
+from projects.partitioning import (
+    TABLE, add_months, convert_to_partitioned, create_partitions, is_partitioned, month_start,
+    partition_name, scanned_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = 'Manage monthly PostgreSQL partitions of projects_timeentry: convert, create ahead, verify pruning'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true',
+                            help='Move the existing table into a partitioned one (copies in batches)')
+        parser.add_argument('--batch-size', type=int, default=50000, help='Rows copied per statement with --convert')
+        parser.add_argument('--ahead', type=int, default=settings.TIME_ENTRY_PARTITION_MONTHS_AHEAD,
+                            help='Months of future partitions to keep created')
+        parser.add_argument('--verify', action='store_true',
+                            help='Check that a per-user, one-month ORM query scans a single partition')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Time entry partitioning needs PostgreSQL')
+        if not settings.TIME_ENTRY_PARTITIONING:
+            raise CommandError('Set TIME_ENTRY_PARTITIONING=true to manage time entry partitions')
+
+        if options['convert']:
+            try:
+                copied = convert_to_partitioned(
+                    connection, options['batch_size'], options['ahead'], log=self.stdout.write
+                )
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(f'Converted {TABLE} ({copied} rows copied)'))
+        elif not is_partitioned(connection):
+            raise CommandError(f'{TABLE} is not partitioned yet; run with --convert first')
+
+        this_month = month_start(date.today())
+        created = create_partitions(connection, this_month, add_months(this_month, options['ahead']))
+        self.stdout.write(self.style.SUCCESS(f'Created {len(created)} future partitions'))
+
+        if options['verify']:
+            self.verify_pruning(this_month)
+
+    def verify_pruning(self, month):
+        queryset = TimeEntry.objects.filter(
+            user_id=0, date__gte=month, date__lt=add_months(month, 1)
+        ).order_by('date')
+        scanned = {name for name in scanned_partitions(queryset) if name.startswith(TABLE)}
+        expected = {partition_name(month)}
+        if scanned != expected:
+            raise CommandError(f'Partition pruning failed: plan scans {", ".join(sorted(scanned))}')
+        self.stdout.write(self.style.SUCCESS(f'Partition pruning verified: only {partition_name(month)} is scanned'))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from archive.models import DailyRollup
+from jobs.chunking import update_in_chunks
+from projects.counters import AUTO_PROGRESS, client_counter_values, drifted, project_counter_values
+from projects.models import Client, Project, Task, TimeEntry
+from users.models import Member
+
+
+class Command(BaseCommand):
+    help = 'Recompute the task, minute and project counters of projects and clients where they have drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only repair this member (email)')
+        parser.add_argument('--check', action='store_true', help='Report drifted rows without repairing them')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows updated per transaction')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.all()
+        clients = Client.objects.all()
+        if options['user']:
+            user = Member.objects.filter(email__iexact=options['user']).first()
+            if user is None:
+                raise CommandError(f"No member with email {options['user']}")
+            projects = projects.filter(user=user)
+            clients = clients.filter(user=user)
+
+        project_values = project_counter_values(Task, TimeEntry, DailyRollup)
+        stale_projects = drifted(projects, project_values)
+        stale_progress = projects.filter(auto_progress=True).exclude(progress=AUTO_PROGRESS)
+        if options['check']:
+            # Client totals are derived from project totals, so they are checked as they are now
+            self.stdout.write(f'{stale_projects.count()} projects and '
+                              f'{drifted(clients, client_counter_values(Project)).count()} clients have drifted counters')
+            return
+
+        size = options['batch_size']
+        fixed_projects = update_in_chunks(stale_projects, size, **project_values, updated_at=timezone.now())
+        update_in_chunks(stale_progress, size, progress=AUTO_PROGRESS, updated_at=timezone.now())
+        # Client totals are sums of the (now repaired) project totals
+        fixed_clients = update_in_chunks(drifted(clients, client_counter_values(Project)), size,
+                                         **client_counter_values(Project))
+        self.stdout.write(self.style.SUCCESS(
+            f'Repaired counters of {fixed_projects} projects and {fixed_clients} clients'
+        ))
+
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# Generated tsvector columns keep the search index current on every write.
+# SQLite uses the FTS5 fallback installed by projects.search after migrate.
+SEARCH_VECTORS = [
+    ('projects_timeentry', "to_tsvector('english', coalesce(description, ''))"),
+    ('projects_task', "to_tsvector('english', coalesce(title, ''))"),
+    ('projects_project', "to_tsvector('english', coalesce(name, ''))"),
+    (
+        'projects_client',
+        "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(note, '')), 'B')",
+    ),
+]
+
+
+def add_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, expression in SEARCH_VECTORS:
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS ({expression}) STORED"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {table}_search_idx ON {table} USING gin (search_vector)"
+        )
+
+
+def remove_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, _ in SEARCH_VECTORS:
+        schema_editor.execute(f"ALTER TABLE {table} DROP COLUMN search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_created_at_project_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vectors, remove_search_vectors),
+    ]
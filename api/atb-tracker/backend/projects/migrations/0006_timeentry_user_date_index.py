@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_search_vectors'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeentry',
+            index=models.Index(fields=['user', 'date'], name='projects_te_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_ranges(apps, schema_editor):
+    from projects.ranges import backfill_entry_ranges
+    backfill_entry_ranges(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    # Each backfill chunk commits on its own so large tables are not locked in one transaction
+    atomic = False
+
+    dependencies = [
+        ('projects', '0006_timeentry_user_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeentry',
+            name='ended_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='started_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_ranges, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='timeentry',
+            index=models.Index(fields=['user', 'started_at', 'ended_at'], name='projects_te_user_range_idx'),
+        ),
+    ]
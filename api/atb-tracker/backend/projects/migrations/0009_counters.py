@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:33
+
+from django.db import migrations, models
+
+
+def fill_counters(apps, schema_editor):
+    from projects.counters import client_counter_values, project_counter_values
+    Project = apps.get_model('projects', 'Project')
+    Client = apps.get_model('projects', 'Client')
+    values = project_counter_values(
+        apps.get_model('projects', 'Task'), apps.get_model('projects', 'TimeEntry'),
+        apps.get_model('archive', 'DailyRollup'),
+    )
+    Project.objects.using(schema_editor.connection.alias).update(**values)
+    Client.objects.using(schema_editor.connection.alias).update(**client_counter_values(Project))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_updated_at_indexes'),
+        ('archive', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='project_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='total_minutes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='auto_progress',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='billable_minutes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='completed_task_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='task_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='total_minutes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
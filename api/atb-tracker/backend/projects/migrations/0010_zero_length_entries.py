@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+def collapse_zero_length(apps, schema_editor):
+    # Equal start and end times were stored as a full day; they are zero-length entries
+    TimeEntry = apps.get_model('projects', 'TimeEntry')
+    TimeEntry.objects.using(schema_editor.connection.alias).filter(
+        start_time=models.F('end_time'), started_at__isnull=False,
+    ).update(ended_at=models.F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_zero_length, migrations.RunPython.noop),
+    ]
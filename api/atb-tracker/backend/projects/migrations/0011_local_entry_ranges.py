@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def rebuild_local_ranges(apps, schema_editor):
+    # Ranges were built as if the clock times were UTC; rebuild them in each owner's profile timezone
+    from projects.ranges import backfill_entry_ranges, profile_timezones
+    TimeEntry = apps.get_model('projects', 'TimeEntry')
+    connection = schema_editor.connection
+    owners = [user_id for user_id, name in profile_timezones(connection).items() if name != 'UTC']
+    if owners:
+        TimeEntry.objects.using(connection.alias).filter(user_id__in=owners).update(started_at=None, ended_at=None)
+        backfill_entry_ranges(connection)
+
+
+class Migration(migrations.Migration):
+    # Each backfill chunk commits on its own so large tables are not locked in one transaction
+    atomic = False
+
+    dependencies = [
+        ('projects', '0010_zero_length_entries'),
+        ('user_settings', '0004_userprofile_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_local_ranges, migrations.RunPython.noop),
+    ]
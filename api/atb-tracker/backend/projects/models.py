@@ -1,8 +1,52 @@
-from django.db import models
+from django.db import models, router, transaction
+from user_settings.utils import user_timezone
 from users.models import Member
+from .ranges import entry_range
 
 # Create your models here.
 
+class CountedModelMixin:
+    """
+    Models whose writes adjust the counters in ``projects.counters``.
+
+    ``counted_fields`` are remembered as loaded (``from_db``) so the counter
+    receivers can apply the difference without reading the row again, and
+    ``save()`` is atomic so the row and its counters change together.
+    """
+    counted_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._counted = instance.counted_state()
+        return instance
+
+    def counted_state(self):
+        """Current values of ``counted_fields``, or None when one of them is deferred"""
+        loaded = self.__dict__
+        if any(name not in loaded for name in self.counted_fields):
+            return None
+        return tuple(loaded[name] for name in self.counted_fields)
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
+class CounterFieldsMixin:
+    """Models carrying counters: ``save()`` never writes them back, only F() updates change them"""
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
 class Tag(models.Model):
     name = models.CharField(max_length=100)
     color = models.CharField(max_length=20, blank=True, null=True)
@@ -15,13 +59,18 @@ class Tag(models.Model):
     class Meta:
         unique_together = ['name', 'user']
 
-class Client(models.Model):
+class Client(CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='clients')
     email = models.EmailField(max_length=255, blank=True, null=True)
     address = models.TextField(blank=True, null=True)
     note = models.TextField(blank=True, null=True)
     currency = models.CharField(max_length=10, blank=True, null=True, default='USD')
+    # Maintained by projects.counters
+    project_count = models.IntegerField(default=0)
+    total_minutes = models.IntegerField(default=0)
+
+    counter_fields = ('project_count', 'total_minutes')
 
     def __str__(self):
         return self.name
@@ -29,20 +78,42 @@ class Client(models.Model):
     class Meta:
         unique_together = ['name', 'user']
 
-class Project(models.Model):
+class Project(CountedModelMixin, CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=255)
     client = models.ForeignKey(Client, on_delete=models.SET_NULL, blank=True, null=True, related_name='projects')
     status = models.CharField(max_length=50, default="Planning")
     progress = models.IntegerField(default=0)
+    # Keep progress at the share of completed tasks instead of a manual value
+    auto_progress = models.BooleanField(default=False)
     tags = models.ManyToManyField(Tag, blank=True, related_name='projects')
     user = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='projects')
     created_at = models.DateTimeField(auto_now_add=True, null=True)
     updated_at = models.DateTimeField(auto_now=True, null=True)
+    # Maintained by projects.counters; archived time entries keep counting
+    task_count = models.IntegerField(default=0)
+    completed_task_count = models.IntegerField(default=0)
+    total_minutes = models.IntegerField(default=0)
+    billable_minutes = models.IntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+
+    counted_fields = ('client_id',)
+    counter_fields = ('task_count', 'completed_task_count', 'total_minutes', 'billable_minutes', 'last_activity_at')
+
+    class Meta:
+        indexes = [
+            # MAX(updated_at) per user for conditional GETs
+            models.Index(fields=['user', 'updated_at'], name='projects_proj_user_upd_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
-class Task(models.Model):
+    def save(self, *args, **kwargs):
+        if self.auto_progress:
+            self.progress = self.completed_task_count * 100 // self.task_count if self.task_count else 0
+        super().save(*args, **kwargs)
+
+class Task(CountedModelMixin, models.Model):
     STATUS_CHOICES = [
         ("Pending", "Pending"),
         ("In Progress", "In Progress"),
@@ -57,21 +128,54 @@ class Task(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     user = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='tasks')
 
+    counted_fields = ('project_id', 'status')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='projects_task_user_upd_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.status})"
 
-class TimeEntry(models.Model):
+class TimeEntry(CountedModelMixin, models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="time_entries")
     description = models.TextField()
     start_time = models.TimeField()
     end_time = models.TimeField()
     duration = models.IntegerField()  # in minutes
     date = models.DateField()
+    # Absolute range derived from date/start_time/end_time in save()
+    started_at = models.DateTimeField(null=True, blank=True, editable=False)
+    ended_at = models.DateTimeField(null=True, blank=True, editable=False)
     billable = models.BooleanField(default=False)
     type = models.CharField(max_length=10, choices=[('regular', 'Regular'), ('pomodoro', 'Pomodoro')], default='regular')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     user = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='time_entries')
 
+    counted_fields = ('project_id', 'duration', 'billable')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='projects_te_user_date_idx'),
+            models.Index(fields=['user', 'started_at', 'ended_at'], name='projects_te_user_range_idx'),
+            models.Index(fields=['user', 'updated_at'], name='projects_te_user_upd_idx'),
+        ]
+
     def __str__(self):
         return f"{self.project.name} - {self.date} ({self.duration} min, {self.type})"
+
+    def sync_range(self, tz):
+        """Recompute started_at/ended_at from the date and clock times, read in ``tz``"""
+        if self.date and self.start_time and self.end_time:
+            self.started_at, self.ended_at = entry_range(self.date, self.start_time, self.end_time, tz)
+
+    def save(self, *args, tz=None, **kwargs):
+        # Clock times are read in ``tz``, the owner's profile timezone; callers that have it
+        # (the serializers, from the request's user context) pass it, others read the profile
+        self.sync_range(tz if tz is not None else user_timezone(self.user_id))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'date', 'start_time', 'end_time'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'started_at', 'ended_at'}
+        super().save(*args, **kwargs)
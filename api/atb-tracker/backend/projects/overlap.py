@@ -0,0 +1,182 @@
+"""
+Overlap and gap detection for time entries.
+
+Entries are compared on their absolute ``started_at``/``ended_at`` range (see
+``projects.ranges``). Single entries are checked with a bounded range predicate on
+the (user, started_at, ended_at) index, batches with one query plus a sort sweep,
+and the report uses window functions over the user's entries.
+
+The check reads before the write inserts, so writes that are checked run under
+``entry_write_lock``: on PostgreSQL a transaction-scoped advisory lock per user,
+on SQLite the write lock its IMMEDIATE transactions take when they begin.
+"""
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
+
+from .models import TimeEntry
+from .ranges import MAX_ENTRY_SPAN, entry_dates, entry_range, overlapping
+
+
+# First key of the two-key PostgreSQL advisory locks taken by entry_write_lock; the user id is the second
+ENTRY_LOCK_CLASS = 0x7e1
+
+
+@contextmanager
+def entry_write_lock(user, using=None):
+    """
+    A transaction in which no other checked write of ``user``'s entries runs.
+
+    Without it two concurrent requests can both pass the overlap check before
+    either inserts. Other backends, and TIME_ENTRIES_ALLOW_OVERLAP, only get the
+    transaction.
+    """
+    using = using or router.db_for_write(TimeEntry)
+    with transaction.atomic(using=using):
+        connection = connections[using]
+        if connection.vendor == 'postgresql' and not settings.TIME_ENTRIES_ALLOW_OVERLAP:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [ENTRY_LOCK_CLASS, user.pk])
+        yield
+
+
+def timed(queryset):
+    """Entries of ``queryset`` with a positive length; zero-length ones overlap nothing"""
+    return queryset.filter(ended_at__gt=F('started_at'))
+
+
+def overlapping_entries(queryset, date, start_time, end_time, tz):
+    """Entries of ``queryset`` overlapping an entry with the given date and clock times in ``tz``"""
+    started_at, ended_at = entry_range(date, start_time, end_time, tz)
+    if started_at == ended_at:
+        return queryset.none()
+    return overlapping(timed(queryset), started_at, ended_at)
+
+
+def sweep_overlaps(spans):
+    """
+    Find overlapping spans in O(n log n).
+
+    ``spans`` are ``(start, end, key)`` tuples; returns ``(key, other_key)`` pairs,
+    one for every span that starts before an earlier span has ended.
+    """
+    conflicts = []
+    cover_end = cover_key = None
+    for start, end, key in sorted(spans, key=lambda span: span[:2]):
+        if cover_end is not None and start < cover_end:
+            conflicts.append((key, cover_key))
+        if cover_end is None or end > cover_end:
+            cover_end, cover_key = end, key
+    return conflicts
+
+
+def batch_overlaps(queryset, entries, tz):
+    """
+    Overlaps for a batch of new entries (dicts with date, start_time and end_time in ``tz``).
+
+    Returns ``(index, conflict)`` pairs where ``conflict`` is either the pk of an
+    existing entry in ``queryset`` or ``('batch', index)`` of another new entry.
+    """
+    if not entries:
+        return []
+    spans = [(*entry_range(entry['date'], entry['start_time'], entry['end_time'], tz), ('batch', i))
+             for i, entry in enumerate(entries)]
+    spans = [span for span in spans if span[0] < span[1]]
+    if not spans:
+        return []
+    first_date, last_date = entry_dates(min(span[0] for span in spans), max(span[1] for span in spans))
+    existing = timed(queryset).filter(
+        date__gte=first_date,
+        date__lte=last_date,
+        started_at__gt=min(span[0] for span in spans) - MAX_ENTRY_SPAN,
+        started_at__lt=max(span[1] for span in spans),
+    )
+    spans += [(started_at, ended_at, ('existing', pk))
+              for pk, started_at, ended_at in existing.values_list('pk', 'started_at', 'ended_at')]
+
+    result = {}
+    for key, other in sweep_overlaps(spans):
+        # Only new entries are reported; existing ones may already overlap each other
+        if key[0] == 'existing':
+            key, other = other, key
+        if key[0] == 'batch':
+            result.setdefault(key[1], other[1] if other[0] == 'existing' else other)
+    return sorted(result.items())
+
+
+def _as_datetime(value):
+    # SQLite returns text, PostgreSQL aware datetimes
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value)
+    return value if value.tzinfo else value.replace(tzinfo=dt_timezone.utc)
+
+
+def _minutes(delta):
+    return int(delta.total_seconds() // 60)
+
+
+def gaps_and_overlaps(user, start, end, tz, min_gap_minutes=1):
+    """
+    Overlapping entries and untracked gaps within a workday for ``user`` over the days ``start``..``end`` in ``tz``.
+
+    ``MAX(end) OVER`` the preceding rows is the furthest any earlier entry reaches:
+    starting before it is an overlap with the first entry reaching that far (which
+    need not be the one just before), and ``LEAD(start)`` after the running maximum
+    including the current row is the next gap.
+    """
+    sql = (
+        "WITH spans AS ("
+        " SELECT id, date, started_at AS s, ended_at AS e"
+        " FROM projects_timeentry WHERE user_id = %s AND started_at >= %s AND started_at < %s"
+        " AND ended_at > started_at AND date >= %s AND date <= %s"
+        "), ordered AS ("
+        " SELECT id, date, s, e,"
+        " MAX(e) OVER (ORDER BY s, id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) AS reach,"
+        " MAX(e) OVER (ORDER BY s, id ROWS UNBOUNDED PRECEDING) AS cover,"
+        " LEAD(id) OVER w AS next_id, LEAD(s) OVER w AS next_s, LEAD(date) OVER w AS next_date"
+        " FROM spans WINDOW w AS (ORDER BY s, id)"
+        ")"
+        " SELECT id, date, s, e,"
+        " CASE WHEN reach > s THEN (SELECT p.id FROM spans p WHERE p.e = o.reach"
+        "  AND (p.s < o.s OR (p.s = o.s AND p.id < o.id)) ORDER BY p.s, p.id LIMIT 1) END AS reach_id,"
+        " reach, cover, next_id, next_s, next_date FROM ordered o"
+        " WHERE reach > s OR (next_date = date AND next_s > cover)"
+        " ORDER BY s, id"
+    )
+    lower = datetime.combine(start, time.min, tzinfo=tz)
+    upper = datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz)
+    connection = connections[router.db_for_read(TimeEntry)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            user.id,
+            connection.ops.adapt_datetimefield_value(lower),
+            connection.ops.adapt_datetimefield_value(upper),
+            *(connection.ops.adapt_datefield_value(day) for day in entry_dates(lower, upper)),
+        ])
+        rows = cursor.fetchall()
+
+    overlaps, gaps = [], []
+    for entry_id, day, s, e, reach_id, reach, cover, next_id, next_s, next_date in rows:
+        s, e = _as_datetime(s).astimezone(tz), _as_datetime(e).astimezone(tz)
+        if reach is not None and _as_datetime(reach) > s:
+            overlaps.append({
+                'entry': entry_id,
+                'previous_entry': reach_id,
+                'start': s.isoformat(),
+                'end': e.isoformat(),
+                'minutes': _minutes(min(_as_datetime(reach), e) - s),
+            })
+        if next_s is not None and str(next_date) == str(day):
+            cover, next_s = _as_datetime(cover).astimezone(tz), _as_datetime(next_s).astimezone(tz)
+            if next_s > cover and _minutes(next_s - cover) >= min_gap_minutes:
+                gaps.append({
+                    'after_entry': entry_id,
+                    'before_entry': next_id,
+                    'start': cover.isoformat(),
+                    'end': next_s.isoformat(),
+                    'minutes': _minutes(next_s - cover),
+                })
+    return {'start': start.isoformat(), 'end': end.isoformat(), 'overlaps': overlaps, 'gaps': gaps}
@@ -0,0 +1,254 @@
+"""
+Optional PostgreSQL monthly partitioning of ``projects_timeentry`` on ``date``.
+
+The model is unchanged: the partitioned table keeps the same name, columns,
+index names and id sequence, so the ORM and existing views see no difference.
+PostgreSQL requires the primary key of a partitioned table to include the
+partition key, so it becomes ``(id, date)``; ids stay unique through the sequence.
+
+``convert_to_partitioned`` copies the table into a partitioned twin in id batches
+while writes continue, then catches up and swaps names under an EXCLUSIVE lock that still allows reads. The old
+table is kept as ``projects_timeentry_unpartitioned`` until dropped by hand.
+"""
+import json
+import re
+from datetime import date
+
+from django.db import transaction
+
+TABLE = 'projects_timeentry'
+NEW_TABLE = 'projects_timeentry_partitioned'
+OLD_TABLE = 'projects_timeentry_unpartitioned'
+SEQUENCE = 'projects_timeentry_id_seq'
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month, parent=TABLE):
+    return f'{parent}_p{month.year:04d}_{month.month:02d}'
+
+
+def default_partition(parent=TABLE):
+    return f'{parent}_default'
+
+
+def is_partitioned(connection, table=TABLE):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relkind = 'p' FROM pg_class c WHERE c.oid = to_regclass(%s)", [table]
+        )
+        row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def _copy_columns(cursor, table):
+    """Columns that can be inserted into (generated columns are recomputed)"""
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns"
+        " WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER'"
+        " ORDER BY ordinal_position",
+        [table],
+    )
+    return ', '.join(f'"{row[0]}"' for row in cursor.fetchall())
+
+
+def _existing_partitions(cursor, parent=TABLE):
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits"
+        " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+        " WHERE pg_inherits.inhparent = to_regclass(%s)",
+        [parent],
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _create_partition(cursor, parent, month, existing, columns):
+    """Create the partition for ``month``, moving matching rows out of the default partition"""
+    name = partition_name(month, parent)
+    if name in existing:
+        return None
+    bounds = f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    default = default_partition(parent)
+
+    has_default_rows = False
+    if default in existing:
+        cursor.execute(
+            f"SELECT 1 FROM {default} WHERE date >= %s AND date < %s LIMIT 1", [month, add_months(month, 1)]
+        )
+        has_default_rows = cursor.fetchone() is not None
+
+    if has_default_rows:
+        # A default partition holding rows of the new range would reject CREATE ... PARTITION OF
+        cursor.execute(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING GENERATED)")
+        cursor.execute(
+            f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {default} WHERE date >= %s AND date < %s",
+            [month, add_months(month, 1)],
+        )
+        cursor.execute(f"DELETE FROM {default} WHERE date >= %s AND date < %s", [month, add_months(month, 1)])
+        cursor.execute(f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES {bounds}")
+    else:
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES {bounds}")
+    existing.add(name)
+    return name
+
+
+def create_partitions(connection, first_month, last_month, parent=TABLE):
+    """Create monthly partitions from ``first_month`` through ``last_month``; returns the new names"""
+    created = []
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        existing = _existing_partitions(cursor, parent)
+        columns = _copy_columns(cursor, parent)
+        month = month_start(first_month)
+        while month <= last_month:
+            name = _create_partition(cursor, parent, month, existing, columns)
+            if name:
+                created.append(name)
+            month = add_months(month, 1)
+    return created
+
+
+def _rename_suffix(name, suffix):
+    # Identifiers are limited to 63 bytes
+    return f'{name[:63 - len(suffix)]}{suffix}'
+
+
+def convert_to_partitioned(connection, batch_size=50000, months_ahead=3, log=None):
+    """Move ``projects_timeentry`` into a partitioned table; returns the number of rows copied"""
+    log = log or (lambda message: None)
+    if connection.vendor != 'postgresql':
+        raise NotImplementedError('Declarative partitioning needs PostgreSQL')
+    if is_partitioned(connection):
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conrelid::regclass::text FROM pg_constraint WHERE contype = 'f' AND confrelid = to_regclass(%s)",
+            [TABLE],
+        )
+        referencing = [row[0] for row in cursor.fetchall()]
+        if referencing:
+            raise ValueError(f'{TABLE} is referenced by foreign keys from {", ".join(referencing)}')
+
+        cursor.execute(f"DROP TABLE IF EXISTS {NEW_TABLE} CASCADE")
+        cursor.execute(
+            f"CREATE TABLE {NEW_TABLE} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STORAGE)"
+            f" PARTITION BY RANGE (date)"
+        )
+        cursor.execute(f"ALTER TABLE {NEW_TABLE} ADD PRIMARY KEY (id, date)")
+        cursor.execute(f"CREATE TABLE {default_partition(NEW_TABLE)} PARTITION OF {NEW_TABLE} DEFAULT")
+
+        cursor.execute(f"SELECT MIN(date), MAX(date), MIN(id), MAX(id), now() FROM {TABLE}")
+        first_day, last_day, low, high, copy_started = cursor.fetchone()
+        today = date.today()
+        first_day = min(first_day or today, today)
+        last_day = max(last_day or today, add_months(month_start(today), months_ahead))
+
+    created = create_partitions(connection, first_day, last_day, parent=NEW_TABLE)
+    log(f'Created {len(created)} monthly partitions')
+
+    with connection.cursor() as cursor:
+        columns = _copy_columns(cursor, TABLE)
+        copied = 0
+        if low is not None:
+            for batch_start in range(low, high + 1, batch_size):
+                cursor.execute(
+                    f"INSERT INTO {NEW_TABLE} ({columns}) SELECT {columns} FROM {TABLE}"
+                    f" WHERE id >= %s AND id < %s",
+                    [batch_start, batch_start + batch_size],
+                )
+                copied += cursor.rowcount
+                log(f'Copied ids up to {min(batch_start + batch_size, high + 1) - 1} ({copied} rows)')
+
+        # Index, foreign key and sequence definitions of the live table, recreated under temporary names
+        cursor.execute(
+            "SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x"
+            " JOIN pg_class i ON i.oid = x.indexrelid"
+            " WHERE x.indrelid = to_regclass(%s) AND NOT x.indisprimary",
+            [TABLE],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint"
+            " WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        for name, definition in indexes:
+            definition = re.sub(r'^CREATE (UNIQUE )?INDEX \S+ ON (ONLY )?\S+',
+                                lambda m: f"CREATE {m.group(1) or ''}INDEX {_rename_suffix(name, '_p')} ON {NEW_TABLE}",
+                                definition)
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {NEW_TABLE} ADD CONSTRAINT {_rename_suffix(name, '_p')} {definition}")
+        log(f'Recreated {len(indexes)} indexes and {len(foreign_keys)} foreign keys')
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        # Reads continue; writers wait for the catch-up and swap. Rows changed since the
+        # copy started are recopied and rows deleted meanwhile are dropped.
+        cursor.execute(f"LOCK TABLE {TABLE} IN EXCLUSIVE MODE")
+        cursor.execute(
+            f"DELETE FROM {NEW_TABLE} n WHERE NOT EXISTS (SELECT 1 FROM {TABLE} o WHERE o.id = n.id)"
+            f" OR n.id IN (SELECT id FROM {TABLE} WHERE updated_at >= %s)",
+            [copy_started],
+        )
+        cursor.execute(
+            f"INSERT INTO {NEW_TABLE} ({columns}) SELECT {columns} FROM {TABLE} o"
+            f" WHERE o.updated_at >= %s OR o.id > %s",
+            [copy_started, high or 0],
+        )
+        log(f'Caught up {cursor.rowcount} rows written during the copy')
+
+        cursor.execute(f"SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+        old_sequence = cursor.fetchone()[0]
+        cursor.execute(f"CREATE SEQUENCE {NEW_TABLE}_id_seq OWNED BY {NEW_TABLE}.id")
+        cursor.execute(f"SELECT setval('{NEW_TABLE}_id_seq', GREATEST((SELECT MAX(id) FROM {TABLE}), 1))")
+        cursor.execute(f"ALTER TABLE {NEW_TABLE} ALTER COLUMN id SET DEFAULT nextval('{NEW_TABLE}_id_seq')")
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+        if old_sequence:
+            cursor.execute(f"ALTER SEQUENCE {old_sequence} RENAME TO {OLD_TABLE}_id_seq")
+        for name, _ in indexes:
+            cursor.execute(f"ALTER INDEX {name} RENAME TO {_rename_suffix(name, '_old')}")
+            cursor.execute(f"ALTER INDEX {_rename_suffix(name, '_p')} RENAME TO {name}")
+        for name, _ in foreign_keys:
+            cursor.execute(f"ALTER TABLE {OLD_TABLE} RENAME CONSTRAINT {name} TO {_rename_suffix(name, '_old')}")
+            cursor.execute(f"ALTER TABLE {NEW_TABLE} RENAME CONSTRAINT {_rename_suffix(name, '_p')} TO {name}")
+
+        cursor.execute(f"ALTER TABLE {OLD_TABLE} RENAME CONSTRAINT {TABLE}_pkey TO {OLD_TABLE}_pkey")
+        cursor.execute(f"ALTER TABLE {NEW_TABLE} RENAME CONSTRAINT {NEW_TABLE}_pkey TO {TABLE}_pkey")
+
+        cursor.execute(f"ALTER TABLE {NEW_TABLE} RENAME TO {TABLE}")
+        cursor.execute(f"ALTER SEQUENCE {NEW_TABLE}_id_seq RENAME TO {SEQUENCE}")
+        for partition in sorted(_existing_partitions(cursor, TABLE)):
+            if partition.startswith(NEW_TABLE):
+                cursor.execute(f"ALTER TABLE {partition} RENAME TO {partition.replace(NEW_TABLE, TABLE, 1)}")
+    log(f'{TABLE} is now partitioned; the previous table is kept as {OLD_TABLE}')
+    return copied
+
+
+def scanned_partitions(queryset):
+    """Names of the relations PostgreSQL's plan for ``queryset`` would scan"""
+    plan = queryset.explain(format='json')
+    relations = set()
+
+    def walk(node):
+        if isinstance(node, dict):
+            if 'Relation Name' in node:
+                relations.add(node['Relation Name'])
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(json.loads(plan) if isinstance(plan, str) else plan)
+    return relations
@@ -0,0 +1,196 @@
+"""
+Absolute time ranges of time entries.
+
+``TimeEntry.started_at``/``ended_at`` are derived from ``date``, ``start_time`` and
+``end_time``, which are wall-clock values in the member's profile timezone (the
+dashboard timer posts the browser's local clock, forms post what was typed). An
+end time before the start time is on the next day, so no entry spans more than
+``MAX_ENTRY_SPAN``. Equal times are a zero-length entry that overlaps nothing:
+the dashboard records completed pomodoros with placeholder clock times and only
+a duration. Range queries bound ``started_at`` from below with that span so they
+stay index range scans on ``(user, started_at, ended_at)``.
+
+The range is computed when the entry is written, with the timezone the caller
+passes to ``TimeEntry.save()``. When a member changes their profile timezone,
+``resync_entry_ranges`` recomputes all of their entries in the new zone (see
+``projects/signals.py``), so every row of one member is read in the same zone.
+"""
+from datetime import date as date_type, datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+
+# Just under a day of wall clock, plus an hour for a DST change inside it
+MAX_ENTRY_SPAN = timedelta(days=1, hours=1)
+
+# started_at/ended_at of the entry ``e`` read in the zone named by ``{tz}``
+_RANGE_SQL = (
+    " started_at = (e.date + e.start_time) AT TIME ZONE {tz},"
+    " ended_at = (e.date + e.end_time + CASE WHEN e.end_time < e.start_time THEN interval '1 day' ELSE interval '0' END)"
+    " AT TIME ZONE {tz}"
+)
+
+BACKFILL_SQL = {
+    # Joined to the (user id, timezone name) pairs of the chunk's owners
+    'postgresql': (
+        "UPDATE projects_timeentry AS e SET" + _RANGE_SQL.format(tz='z.tz') +
+        " FROM unnest(%s::bigint[], %s::text[]) AS z(user_id, tz)"
+        " WHERE e.user_id = z.user_id AND e.id >= %s AND e.id < %s AND e.started_at IS NULL"
+    ),
+}
+
+RESYNC_SQL = {
+    'postgresql': "UPDATE projects_timeentry AS e SET" + _RANGE_SQL.format(tz='%s') + " WHERE e.user_id = %s",
+}
+
+
+def _localize(day, clock, tz):
+    # As PostgreSQL's AT TIME ZONE reads them: a clock time repeated or skipped by a DST
+    # change takes the standard-time offset, the smaller of the two either side of it
+    moment = datetime.combine(day, clock, tzinfo=tz)
+    other = moment.replace(fold=1)
+    return other if other.utcoffset() < moment.utcoffset() else moment
+
+
+def entry_range(date, start_time, end_time, tz=dt_timezone.utc):
+    """Aware UTC (started_at, ended_at) for an entry's date and clock times in ``tz``"""
+    end_date = date + timedelta(days=1) if end_time < start_time else date
+    start = _localize(date, start_time, tz)
+    end = _localize(end_date, end_time, tz)
+    return start.astimezone(dt_timezone.utc), end.astimezone(dt_timezone.utc)
+
+
+def parse_range_bound(value, end=False, tz=dt_timezone.utc):
+    """
+    Parse a ``start``/``end`` query value into an aware datetime.
+
+    Dates cover the whole day in ``tz``, so an ``end`` date is exclusive of the
+    next day; naive datetimes are read in ``tz`` too. Returns None for empty or
+    unparseable values.
+    """
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+        if day is not None:
+            return datetime.combine(day + timedelta(days=1) if end else day, time.min, tzinfo=tz)
+        parsed = parse_datetime(value)
+    except ValueError:
+        return None
+    if parsed is None:
+        return None
+    if timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=tz)
+    return parsed
+
+
+def entry_dates(started_at, ended_at):
+    """
+    (first, last) ``date`` of any entry starting after ``started_at - MAX_ENTRY_SPAN`` and before ``ended_at``.
+
+    An entry's date is the local date of its start, never more than a day from
+    the UTC one. Range queries filter on it too, so a table partitioned by
+    ``date`` (``projects.partitioning``) is pruned to the partitions it can hit.
+    """
+    return (
+        (started_at - MAX_ENTRY_SPAN).astimezone(dt_timezone.utc).date() - timedelta(days=1),
+        ended_at.astimezone(dt_timezone.utc).date() + timedelta(days=1),
+    )
+
+
+def overlapping(queryset, started_at, ended_at):
+    """Entries of ``queryset`` whose range intersects ``started_at``..``ended_at``"""
+    first_date, last_date = entry_dates(started_at, ended_at)
+    return queryset.filter(
+        date__gte=first_date,
+        date__lte=last_date,
+        started_at__gt=started_at - MAX_ENTRY_SPAN,
+        started_at__lt=ended_at,
+        ended_at__gt=started_at,
+    )
+
+
+def profile_timezones(connection):
+    """{user id: timezone name} for profiles whose timezone is known, read raw so migrations can use it"""
+    zones = {}
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT user_id, timezone FROM user_settings_userprofile WHERE timezone <> ''")
+        for user_id, name in cursor.fetchall():
+            try:
+                ZoneInfo(name)
+            except (ZoneInfoNotFoundError, ValueError):
+                continue
+            zones[user_id] = name
+    return zones
+
+
+def _ranges_in_python(cursor, connection, where, params, zones):
+    # No timezone arithmetic in SQL (SQLite): compute the range of each row matching ``where`` here
+    cursor.execute(
+        f"SELECT id, user_id, date, start_time, end_time FROM projects_timeentry WHERE {where}", params,
+    )
+    default = timezone.get_default_timezone()
+    tzinfos = {}
+    updates = []
+    for entry_id, user_id, day, start_time, end_time in cursor.fetchall():
+        name = zones.get(user_id)
+        tz = (tzinfos.get(name) or tzinfos.setdefault(name, ZoneInfo(name))) if name else default
+        started_at, ended_at = entry_range(
+            day if isinstance(day, date_type) else parse_date(day),
+            start_time if isinstance(start_time, time) else parse_time(start_time),
+            end_time if isinstance(end_time, time) else parse_time(end_time),
+            tz,
+        )
+        updates.append((
+            connection.ops.adapt_datetimefield_value(started_at),
+            connection.ops.adapt_datetimefield_value(ended_at),
+            entry_id,
+        ))
+    cursor.executemany("UPDATE projects_timeentry SET started_at = %s, ended_at = %s WHERE id = %s", updates)
+    return len(updates)
+
+
+def backfill_entry_ranges(connection, chunk_size=10000, log=None):
+    """
+    Fill ``started_at``/``ended_at`` for rows missing them, one id range per statement.
+
+    Each row is read in its owner's profile timezone. PostgreSQL converts in the
+    UPDATE; other backends compute the chunk's ranges in Python.
+    """
+    sql = BACKFILL_SQL.get(connection.vendor)
+    default = timezone.get_default_timezone_name()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT MIN(id), MAX(id) FROM projects_timeentry WHERE started_at IS NULL")
+        low, high = cursor.fetchone()
+        if low is None:
+            return 0
+        zones = profile_timezones(connection)
+        updated = 0
+        for chunk_start in range(low, high + 1, chunk_size):
+            chunk = [chunk_start, chunk_start + chunk_size]
+            if sql is None:
+                updated += _ranges_in_python(
+                    cursor, connection, "id >= %s AND id < %s AND started_at IS NULL", chunk, zones,
+                )
+            else:
+                cursor.execute(
+                    "SELECT DISTINCT user_id FROM projects_timeentry WHERE id >= %s AND id < %s AND started_at IS NULL",
+                    chunk,
+                )
+                owners = [row[0] for row in cursor.fetchall()]
+                cursor.execute(sql, [owners, [zones.get(owner, default) for owner in owners], *chunk])
+                updated += cursor.rowcount
+            if log:
+                log(f'Backfilled ids {chunk_start}-{min(chunk_start + chunk_size, high + 1) - 1} ({updated} rows)')
+    return updated
+
+
+def resync_entry_ranges(connection, user_id, tz_name):
+    """Recompute every ``started_at``/``ended_at`` of ``user_id``'s entries in the zone ``tz_name``"""
+    sql = RESYNC_SQL.get(connection.vendor)
+    with connection.cursor() as cursor:
+        if sql is not None:
+            cursor.execute(sql, [tz_name, tz_name, user_id])
+            return cursor.rowcount
+        return _ranges_in_python(cursor, connection, "user_id = %s", [user_id], {user_id: tz_name})
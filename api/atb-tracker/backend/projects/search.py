@@ -0,0 +1,136 @@
+"""
+Full-text search over time entries, tasks, projects and clients.
+
+On PostgreSQL each table carries a generated ``search_vector`` tsvector column
+with a GIN index (migration 0005), so the index follows every write. Other
+backends (SQLite for local runs) use an FTS5 table kept current by triggers,
+installed after ``migrate``.
+
+Both match every word of the query as a prefix ("inv" finds "invoice"); quotes
+and operators in the query are matched as text, not as search syntax. Hits with
+equal rank come in type order, newest first.
+"""
+from django.db import connections, router
+
+from .models import TimeEntry
+
+SEARCH_KINDS = ('time_entry', 'task', 'project', 'client')
+
+# kind -> (table, title column, body column, fts rowid offset)
+_SOURCES = {
+    'time_entry': ('projects_timeentry', 'description', None, 0),
+    'task': ('projects_task', 'title', None, 1),
+    'project': ('projects_project', 'name', None, 2),
+    'client': ('projects_client', 'name', 'note', 3),
+}
+
+FTS_TABLE = 'projects_search'
+
+
+def search(user, query, kinds=SEARCH_KINDS, limit=20, offset=0):
+    """Return ranked hits for ``query`` among ``user``'s records, best first"""
+    kinds = [kind for kind in SEARCH_KINDS if kind in kinds]
+    if not query.strip() or not kinds:
+        return []
+    connection = connections[router.db_for_read(TimeEntry)]
+    if connection.vendor == 'postgresql':
+        rows = _search_postgres(connection, user.id, query, kinds, limit, offset)
+    else:
+        rows = _search_fts5(connection, user.id, query, kinds, limit, offset)
+    return [
+        {'type': kind, 'id': object_id, 'title': title, 'rank': float(rank)}
+        for kind, object_id, title, rank in rows
+    ]
+
+
+def _search_postgres(connection, user_id, query, kinds, limit, offset):
+    selects = []
+    params = [_tsquery_prefixes(query)]
+    for kind in kinds:
+        table, title, _, _ = _SOURCES[kind]
+        selects.append(
+            f"SELECT '{kind}' AS kind, t.id, t.{title} AS title, ts_rank(t.search_vector, q.query) AS rank "
+            f"FROM {table} t, q WHERE t.user_id = %s AND t.search_vector @@ q.query"
+        )
+        params.append(user_id)
+    sql = (
+        "WITH q AS (SELECT to_tsquery('english', %s) AS query) "
+        "SELECT kind, id, title, rank FROM (" + " UNION ALL ".join(selects) + ") hits "
+        "ORDER BY rank DESC, kind, id DESC LIMIT %s OFFSET %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit, offset])
+        return cursor.fetchall()
+
+
+def _tsquery_prefixes(query):
+    """Quote each term as a tsquery lexeme so user input cannot inject operators; terms match as prefixes"""
+    terms = [term.replace('\\', '\\\\').replace("'", "''") for term in query.split()]
+    return ' & '.join(f"'{term}':*" for term in terms)
+
+
+def _fts5_match(query):
+    """Quote each term so user input cannot inject FTS5 syntax; terms match as prefixes"""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _search_fts5(connection, user_id, query, kinds, limit, offset):
+    placeholders = ', '.join(['%s'] * len(kinds))
+    sql = (
+        f"SELECT kind, object_id, title, -bm25({FTS_TABLE}, 2.0, 1.0) AS rank FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s AND user_id = %s AND kind IN ({placeholders}) "
+        f"ORDER BY rank DESC, kind, object_id DESC LIMIT %s OFFSET %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [_fts5_match(query), user_id, *kinds, limit, offset])
+        return cursor.fetchall()
+
+
+def install_fts5_search(conn):
+    """
+    Create the FTS5 search table and its triggers on SQLite.
+
+    Idempotent: the table is backfilled only when it is first created, and the
+    triggers are recreated if a table rebuild dropped them. Rowids encode
+    ``object_id * 4 + kind offset`` so trigger updates and deletes hit the rowid index.
+    """
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        created = cursor.fetchone() is None
+        if created:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "title, body, kind UNINDEXED, object_id UNINDEXED, user_id UNINDEXED, "
+                "tokenize = 'porter unicode61')"
+            )
+
+        for kind, (table, title, body, slot) in _SOURCES.items():
+            body_sql = f"coalesce({{row}}.{body}, '')" if body else "''"
+            values = (
+                f"({{row}}.id * 4 + {slot}, coalesce({{row}}.{title}, ''), {body_sql}, "
+                f"'{kind}', {{row}}.id, {{row}}.user_id)"
+            )
+            insert = f"INSERT INTO {FTS_TABLE}(rowid, title, body, kind, object_id, user_id) VALUES "
+            delete = f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id * 4 + {slot};"
+
+            if created:
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE}(rowid, title, body, kind, object_id, user_id) "
+                    f"SELECT {values.format(row=table)[1:-1]} FROM {table}"
+                )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN "
+                f"{insert}{values.format(row='new')}; END"
+            )
+            columns = ', '.join(column for column in (title, body, 'user_id') if column)
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+                f"{delete} {insert}{values.format(row='new')}; END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN "
+                f"{delete} END"
+            )
@@ -1,37 +1,137 @@
+from django.conf import settings
+from django.db import router, transaction
 from rest_framework import serializers
 from .models import Project, Client, Task, TimeEntry, Tag
+from .counters import add_time_entries
+from .overlap import batch_overlaps, overlapping_entries
+from atb_tracker.cache import invalidate_user_cache
+from atb_tracker.fieldsets import SparseFieldsetSerializerMixin
+from user_settings.utils import user_timezone
 
 class ClientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Client
-        fields = ['id', 'name', 'email', 'address', 'note', 'currency', 'user']
-        read_only_fields = ['user']
+        fields = ['id', 'name', 'email', 'address', 'note', 'currency', 'user', 'project_count', 'total_minutes']
+        read_only_fields = ['user', 'project_count', 'total_minutes']
 
 class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ['id', 'title', 'status', 'project', 'assigned_to', 'created_at', 'updated_at']
 
-class TimeEntrySerializer(serializers.ModelSerializer):
+def _entry_owner(context):
+    """The user new entries belong to: ``context['user']`` or the request user"""
+    return context.get('user') or context['request'].user
+
+def _entry_timezone(context, user):
+    """The timezone ``user``'s entry clock times are read in: their profile's"""
+    request = context.get('request')
+    if request is not None and request.user == user and hasattr(request, 'user_context'):
+        return request.user_context.tz
+    return user_timezone(user)
+
+class TimeEntryListSerializer(serializers.ListSerializer):
+    """Bulk create: one overlap query for the whole batch and a single INSERT"""
+
+    def to_internal_value(self, data):
+        # Per-item errors keep the list shape of DRF's own bulk validation errors
+        attrs = super().to_internal_value(data)
+        if settings.TIME_ENTRIES_ALLOW_OVERLAP:
+            return attrs
+        owner = _entry_owner(self.context)
+        existing = TimeEntry.objects.filter(user=owner)
+        conflicts = batch_overlaps(existing, attrs, _entry_timezone(self.context, owner))
+        if conflicts:
+            errors = [{} for _ in attrs]
+            for index, other in conflicts:
+                if isinstance(other, tuple):
+                    message = f"Overlaps entry {other[1]} of this batch."
+                else:
+                    message = f"Overlaps existing time entry {other}."
+                errors[index] = {'non_field_errors': [message]}
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        entries = [TimeEntry(**item) for item in validated_data]
+        # bulk_create bypasses save()
+        timezones = {}
+        for entry in entries:
+            if entry.user_id not in timezones:
+                timezones[entry.user_id] = _entry_timezone(self.context, entry.user)
+            entry.sync_range(timezones[entry.user_id])
+        using = router.db_for_write(TimeEntry)
+        with transaction.atomic(using=using):
+            created = TimeEntry.objects.using(using).bulk_create(entries)
+            add_time_entries(created, using)
+        # ...and post_save, so counters, the dashboard cache and the calendar feed are updated here
+        from users.dashboard import CACHE_NAMESPACE as DASHBOARD_CACHE_NAMESPACE
+        from users.ical import FEED_CACHE_NAMESPACE as CALENDAR_FEED_CACHE_NAMESPACE
+        owners = {entry.user_id for entry in created}
+        for user_id in owners:
+            invalidate_user_cache(DASHBOARD_CACHE_NAMESPACE, user_id)
+            invalidate_user_cache(CALENDAR_FEED_CACHE_NAMESPACE, user_id)
+        return created
+
+class TimeEntrySerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = TimeEntry
         fields = [
             'id', 'project', 'description', 'start_time', 'end_time', 'duration', 'date', 'billable', 'type', 'created_at', 'updated_at'
         ]
+        list_serializer_class = TimeEntryListSerializer
+
+    def create(self, validated_data):
+        entry = TimeEntry(**validated_data)
+        entry.save(tz=_entry_timezone(self.context, entry.user))
+        return entry
+
+    def update(self, instance, validated_data):
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(tz=_entry_timezone(self.context, instance.user))
+        return instance
+
+    def validate(self, attrs):
+        # Batches are checked together by TimeEntryListSerializer
+        if settings.TIME_ENTRIES_ALLOW_OVERLAP or isinstance(self.parent, serializers.ListSerializer):
+            return attrs
+        instance = self.instance
+        date = attrs.get('date', getattr(instance, 'date', None))
+        start_time = attrs.get('start_time', getattr(instance, 'start_time', None))
+        end_time = attrs.get('end_time', getattr(instance, 'end_time', None))
+        if date is None or start_time is None or end_time is None:
+            return attrs
+
+        owner = instance.user if instance else _entry_owner(self.context)
+        existing = TimeEntry.objects.filter(user=owner)
+        if instance is not None:
+            existing = existing.exclude(pk=instance.pk)
+        tz = _entry_timezone(self.context, owner)
+        other = overlapping_entries(existing, date, start_time, end_time, tz).values_list('pk', flat=True).first()
+        if other is not None:
+            raise serializers.ValidationError(f"Overlaps existing time entry {other}.")
+        return attrs
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ['id', 'name', 'color', 'description']
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     client = ClientSerializer(read_only=True)
     client_name = serializers.CharField(write_only=True, required=False, allow_blank=True)
     tags = TagSerializer(many=True, read_only=True)
 
+    sparse_relations = {'client': 'select', 'tags': 'prefetch'}
+
     class Meta:
         model = Project
-        fields = ['id', 'name', 'client', 'client_name', 'status', 'progress', 'tags', 'updated_at']
+        fields = [
+            'id', 'name', 'client', 'client_name', 'status', 'progress', 'auto_progress', 'tags', 'updated_at',
+            'task_count', 'completed_task_count', 'total_minutes', 'billable_minutes', 'last_activity_at',
+        ]
+        read_only_fields = ['task_count', 'completed_task_count', 'total_minutes', 'billable_minutes', 'last_activity_at']
 
     def create(self, validated_data):
         client_name = validated_data.pop('client_name', None)
@@ -0,0 +1,63 @@
+from django.db import connections
+from django.db.models.signals import m2m_changed, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from user_settings.models import UserProfile
+from user_settings.utils import timezone_from_name
+from .models import Client, Project, Tag
+from .ranges import resync_entry_ranges
+
+
+# Projects embed their client and tags, so changes to those must move the
+# projects' updated_at for conditional GETs to see them
+
+def touch_projects(queryset):
+    queryset.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Client)
+@receiver(pre_delete, sender=Client)
+def touch_client_projects(sender, instance, created=False, **kwargs):
+    if not created:
+        touch_projects(Project.objects.filter(client=instance))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_tag_projects(sender, instance, created=False, **kwargs):
+    if not created:
+        touch_projects(Project.objects.filter(tags=instance))
+
+
+@receiver(m2m_changed, sender=Project.tags.through)
+def touch_retagged_projects(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        instance.updated_at = timezone.now()
+        touch_projects(Project.objects.filter(pk=instance.pk))
+    elif pk_set is not None:
+        touch_projects(Project.objects.filter(pk__in=pk_set))
+    else:
+        touch_projects(Project.objects.filter(tags=instance))
+
+
+# Entry ranges are read in the owner's profile timezone; a new zone moves all of them
+
+@receiver(pre_save, sender=UserProfile)
+def remember_profile_timezone(sender, instance, raw, using, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._stored_timezone = (
+            UserProfile.objects.using(using).filter(pk=instance.pk).values_list('timezone', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=UserProfile)
+def resync_profile_entry_ranges(sender, instance, raw, using, **kwargs):
+    if raw:
+        return
+    # Before a member has a profile, their entries are read in the default timezone
+    old, new = timezone_from_name(getattr(instance, '_stored_timezone', None)), timezone_from_name(instance.timezone)
+    if old != new:
+        resync_entry_ranges(connections[using], instance.user_id, str(new))
@@ -1,3 +1,665 @@
+import json
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+from zoneinfo import ZoneInfo
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from atb_tracker.fastpath import compile_row_converter
+from user_settings.models import UserProfile
+from users.models import Member
+from users.utils import get_tokens_for_user
+
+from .heatmap import _heatmap_numpy, heatmap
+from .models import Client, Project, Tag, Task, TimeEntry
+from .partitioning import TABLE, convert_to_partitioned, partition_name, scanned_partitions
+from .ranges import overlapping
+from .serializers import TimeEntrySerializer
+
+
+class TimeEntryFastPathTests(TestCase):
+    """The values_list() fast path of GET /api/projects/time-entries/ renders what the serializer would"""
+
+    url = '/api/projects/time-entries/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('fastpath@example.com', 'fastpath-password', first_name='Fast')
+        client = Client.objects.create(name='Fast path client', user=cls.user)
+        with_client = Project.objects.create(name='With client', client=client, user=cls.user)
+        # Projects without a client leave the nullable foreign key empty
+        without_client = Project.objects.create(name='Without client', user=cls.user)
+        rows = [
+            (with_client, 'Morning', date(2026, 3, 2), time(9, 0), time(10, 30), 90, True, 'regular'),
+            (without_client, 'Overnight', date(2026, 3, 2), time(23, 15, 30), time(1, 5), 110, False, 'regular'),
+            (without_client, 'Pomodoro', date(2026, 3, 3), time(9, 0), time(9, 0), 25, False, 'pomodoro'),
+            (with_client, 'Unicode éè "quoted"', date(2025, 12, 31), time(0, 0), time(0, 0, 1, 500), 1, True, 'regular'),
+        ]
+        for project, description, day, start_time, end_time, duration, billable, kind in rows:
+            TimeEntry.objects.create(
+                project=project, description=description, date=day, start_time=start_time, end_time=end_time,
+                duration=duration, billable=billable, type=kind, user=cls.user,
+            )
+        other = Member.objects.create_user('fastpath-other@example.com', 'fastpath-password', first_name='Other')
+        TimeEntry.objects.create(
+            project=Project.objects.create(name='Other', user=other), description='Not mine',
+            date=date(2026, 3, 2), start_time=time(8, 0), end_time=time(9, 0), duration=60, user=other,
+        )
+
+    def setUp(self):
+        # Throttle buckets and per-user cached reads outlive each test's transaction
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def expected(self, fields=None):
+        data = TimeEntrySerializer(TimeEntry.objects.filter(user=self.user).order_by('id'), many=True).data
+        rows = json.loads(JSONRenderer().render(data))
+        if fields is not None:
+            rows = [{name: row[name] for name in fields} for row in rows]
+        return rows
+
+    def listed(self, query=''):
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, 200)
+        return sorted(response.json(), key=lambda row: row.get('id', 0))
+
+    def test_serializer_is_eligible(self):
+        self.assertIsNotNone(compile_row_converter(TimeEntrySerializer()))
+
+    def test_full_representation_matches_serializer(self):
+        self.assertEqual(self.listed(), self.expected())
+
+    def test_sparse_fieldset_matches_serializer(self):
+        fields = ['id', 'project', 'date', 'start_time', 'end_time', 'billable']
+        self.assertEqual(self.listed('?fields=' + ','.join(fields)), self.expected(fields))
+
+    def test_sparse_fieldset_without_id(self):
+        fields = ['created_at', 'updated_at', 'description']
+        listed = self.client.get(self.url + '?fields=' + ','.join(fields)).json()
+        key = lambda row: (row['created_at'], row['description'])
+        self.assertEqual(sorted(listed, key=key), sorted(self.expected(fields), key=key))
+
+
+class TimeEntryRangeTimezoneTests(TestCase):
+    """started_at/ended_at are read in the owner's profile timezone and follow it when it changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('ranges@example.com', 'ranges-password', first_name='Range')
+        cls.other = Member.objects.create_user('ranges-other@example.com', 'ranges-password', first_name='Other')
+        cls.project = Project.objects.create(name='Ranges', user=cls.user)
+
+    def entry(self, user, **kwargs):
+        return TimeEntry.objects.create(
+            project=self.project, description='Range', date=date(2026, 3, 2),
+            start_time=time(9, 0), end_time=time(10, 0), duration=60, user=user, **kwargs
+        )
+
+    def test_save_without_profile_does_not_create_one(self):
+        entry = self.entry(self.user)
+        self.assertFalse(UserProfile.objects.filter(user=self.user).exists())
+        self.assertEqual(entry.started_at, datetime(2026, 3, 2, 9, 0, tzinfo=dt_timezone.utc))
+
+    def test_save_reads_clock_times_in_given_timezone(self):
+        entry = TimeEntry(
+            project=self.project, description='Range', date=date(2026, 3, 2),
+            start_time=time(9, 0), end_time=time(10, 0), duration=60, user=self.user,
+        )
+        entry.save(tz=ZoneInfo('Europe/Berlin'))
+        entry.refresh_from_db()
+        self.assertEqual(entry.started_at, datetime(2026, 3, 2, 8, 0, tzinfo=dt_timezone.utc))
+
+    def test_timezone_change_moves_ranges(self):
+        entry, untouched = self.entry(self.user), self.entry(self.other)
+        profile = UserProfile.objects.create(user=self.user)
+        profile.timezone = 'America/New_York'
+        profile.save()
+        entry.refresh_from_db()
+        self.assertEqual(entry.started_at, datetime(2026, 3, 2, 14, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(entry.ended_at, datetime(2026, 3, 2, 15, 0, tzinfo=dt_timezone.utc))
+        untouched.refresh_from_db()
+        self.assertEqual(untouched.started_at, datetime(2026, 3, 2, 9, 0, tzinfo=dt_timezone.utc))
+
+    def test_new_profile_with_timezone_moves_ranges(self):
+        entry = self.entry(self.user)
+        UserProfile.objects.create(user=self.user, timezone='Asia/Tokyo')
+        entry.refresh_from_db()
+        self.assertEqual(entry.started_at, datetime(2026, 3, 2, 0, 0, tzinfo=dt_timezone.utc))
+
+    def test_overnight_entry_keeps_its_length(self):
+        entry = self.entry(self.user)
+        TimeEntry.objects.filter(pk=entry.pk).update(start_time=time(23, 0), end_time=time(1, 0))
+        UserProfile.objects.create(user=self.user, timezone='Europe/Berlin')
+        entry.refresh_from_db()
+        self.assertEqual(entry.started_at, datetime(2026, 3, 2, 22, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(entry.ended_at - entry.started_at, timedelta(hours=2))
+
+
+class TimeEntryOverlapTests(TestCase):
+    """Writes overlapping another entry of the same user are refused; the gaps report lists overlaps and gaps"""
+
+    url = '/api/projects/time-entries/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('overlap@example.com', 'overlap-password', first_name='Over')
+        cls.project = Project.objects.create(name='Overlaps', user=cls.user)
+        cls.morning = cls.add(time(9, 0), time(10, 0))
+
+    @classmethod
+    def add(cls, start_time, end_time, day=date(2026, 3, 2), user=None):
+        return TimeEntry.objects.create(
+            project=cls.project, description='Overlap', date=day, start_time=start_time, end_time=end_time,
+            duration=60, user=user or cls.user,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def payload(self, start_time, end_time, day='2026-03-02'):
+        return {
+            'project': self.project.pk, 'description': 'Overlap', 'date': day,
+            'start_time': start_time, 'end_time': end_time, 'duration': 30,
+        }
+
+    def test_overlapping_create_is_refused(self):
+        response = self.client.post(self.url, self.payload('09:30', '10:30'), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['non_field_errors'], [f'Overlaps existing time entry {self.morning.pk}.'])
+
+    def test_adjacent_and_zero_length_entries_are_accepted(self):
+        self.assertEqual(self.client.post(self.url, self.payload('10:00', '10:30'), format='json').status_code, 201)
+        self.assertEqual(self.client.post(self.url, self.payload('09:30', '09:30'), format='json').status_code, 201)
+
+    def test_other_users_entries_do_not_conflict(self):
+        other = Member.objects.create_user('overlap-other@example.com', 'overlap-password', first_name='Other')
+        self.add(time(11, 0), time(12, 0), user=other)
+        self.assertEqual(self.client.post(self.url, self.payload('11:00', '12:00'), format='json').status_code, 201)
+
+    def test_overlapping_update_is_refused(self):
+        afternoon = self.add(time(14, 0), time(15, 0))
+        url = f'{self.url}{afternoon.pk}/'
+        response = self.client.patch(url, {'start_time': '09:45'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        # An entry never overlaps itself
+        self.assertEqual(self.client.patch(url, {'end_time': '15:30'}, format='json').status_code, 200)
+
+    def test_bulk_create_checks_existing_entries_and_the_batch(self):
+        response = self.client.post(self.url, [
+            self.payload('11:00', '12:00'),
+            self.payload('09:15', '09:45'),
+            self.payload('11:30', '12:30'),
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [
+            {},
+            {'non_field_errors': [f'Overlaps existing time entry {self.morning.pk}.']},
+            {'non_field_errors': ['Overlaps entry 0 of this batch.']},
+        ])
+        self.assertEqual(TimeEntry.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_create_inserts_the_batch(self):
+        response = self.client.post(self.url, [
+            self.payload('11:00', '12:00'), self.payload('23:30', '00:30'), self.payload('00:30', '01:00', '2026-03-03'),
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 3)
+        self.assertEqual(TimeEntry.objects.filter(user=self.user).count(), 4)
+
+    def test_gaps_report(self):
+        TimeEntry.objects.filter(pk=self.morning.pk).update(end_time=time(12, 0), ended_at=F('started_at') + timedelta(hours=3))
+        short = self.add(time(9, 30), time(10, 0))
+        late = self.add(time(11, 0), time(12, 30))
+        after = self.add(time(14, 0), time(15, 0))
+        self.add(time(16, 0), time(17, 0), day=date(2026, 3, 3))
+
+        response = self.client.get(self.url + 'gaps/?start=2026-03-02&end=2026-03-03&min_gap=30')
+
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        # 11:00 starts inside the long 09:00-12:00 entry, not inside the 09:30-10:00 one just before it
+        self.assertEqual(
+            [(row['entry'], row['previous_entry'], row['minutes']) for row in report['overlaps']],
+            [(short.pk, self.morning.pk, 30), (late.pk, self.morning.pk, 60)],
+        )
+        # Gaps stay within a day
+        self.assertEqual(report['gaps'], [{
+            'after_entry': late.pk, 'before_entry': after.pk,
+            'start': '2026-03-02T12:30:00+00:00', 'end': '2026-03-02T14:00:00+00:00', 'minutes': 90,
+        }])
+
+    def test_gaps_report_rejects_bad_ranges(self):
+        for query in ('', '?start=2026-03-02', '?start=2026-03-03&end=2026-03-02', '?start=2026-01-01&end=2027-01-31'):
+            self.assertEqual(self.client.get(self.url + 'gaps/' + query).status_code, 400)
+
+
+class SearchTests(TestCase):
+    """GET /api/projects/search/ ranks the user's records, matching words as prefixes on every backend"""
+
+    url = '/api/projects/search/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('search@example.com', 'search-password', first_name='Search')
+        cls.client_record = Client.objects.create(name='Invoice Partners', note='Monthly retainer', user=cls.user)
+        cls.project = Project.objects.create(name='Website relaunch', client=cls.client_record, user=cls.user)
+        cls.task = Task.objects.create(title='Quarterly review', project=cls.project, user=cls.user)
+        cls.entries = [
+            TimeEntry.objects.create(
+                project=cls.project, description=description, date=date(2026, 3, day),
+                start_time=time(9, 0), end_time=time(10, 0), duration=60, user=cls.user,
+            )
+            for day, description in enumerate(['Quarterly review', 'Invoice migration', 'Quarterly review'], start=2)
+        ]
+        other = Member.objects.create_user('search-other@example.com', 'search-password', first_name='Other')
+        Project.objects.create(name='Invoice secrets', user=other)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def hits(self, query):
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, 200)
+        return [(row['type'], row['id']) for row in response.json()['results']]
+
+    def test_words_match_as_prefixes(self):
+        self.assertCountEqual(
+            self.hits('?q=invo'), [('client', self.client_record.pk), ('time_entry', self.entries[1].pk)]
+        )
+        self.assertEqual(self.hits('?q=web relaun'), [('project', self.project.pk)])
+        self.assertEqual(self.hits('?q=invoice relaunch'), [])
+
+    def test_equal_ranks_come_in_type_order_newest_first(self):
+        self.assertEqual(self.hits('?q=quarterly review'), [
+            ('task', self.task.pk), ('time_entry', self.entries[2].pk), ('time_entry', self.entries[0].pk),
+        ])
+
+    def test_types_filter(self):
+        self.assertEqual(self.hits('?q=quarterly&types=task'), [('task', self.task.pk)])
+
+    def test_query_syntax_is_matched_as_text(self):
+        for query in ('"invoice', "invoice'", 'invoice & | !', 'invoice OR review', '-invoice*'):
+            response = self.client.get(self.url, {'q': query})
+            self.assertEqual(response.status_code, 200, query)
+        self.assertEqual(self.hits('?q=' + '%22review'), self.hits('?q=review'))
+
+    def test_pagination(self):
+        response = self.client.get(self.url + '?q=quarterly&limit=2').json()
+        self.assertEqual(len(response['results']), 2)
+        self.assertEqual(response['next_offset'], 2)
+        response = self.client.get(self.url + '?q=quarterly&limit=2&offset=2').json()
+        self.assertEqual(response['results'][0]['id'], self.entries[0].pk)
+        self.assertIsNone(response['next_offset'])
+        self.assertEqual(self.client.get(self.url + '?q=quarterly&limit=x').status_code, 400)
+
+    def test_blank_query_finds_nothing(self):
+        self.assertEqual(self.hits('?q=%20'), [])
+
+
+class BillingSummaryTests(TestCase):
+    """GET /api/projects/billing/summary/ totals revenue and cost per currency; bad ranges get 400"""
+
+    url = '/api/projects/billing/summary/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user(
+            'billing@example.com', 'billing-password', first_name='Bill', rate=Decimal('90.00'), cost=Decimal('30.00'),
+        )
+        euro = Project.objects.create(
+            name='Euro', client=Client.objects.create(name='Berlin', currency='EUR', user=cls.user), user=cls.user,
+        )
+        dollar = Project.objects.create(
+            name='Dollar', client=Client.objects.create(name='Boston', currency='USD', user=cls.user), user=cls.user,
+        )
+        # No client, and a client without a currency: both bill in BILLING_DEFAULT_CURRENCY
+        internal = Project.objects.create(name='Internal', user=cls.user)
+        blank = Project.objects.create(
+            name='Blank', client=Client.objects.create(name='Nowhere', currency='', user=cls.user), user=cls.user,
+        )
+        rows = [
+            (euro, date(2026, 3, 2), 60, True),
+            (euro, date(2026, 3, 3), 30, False),
+            (euro, date(2026, 4, 1), 60, True),
+            (dollar, date(2026, 3, 2), 120, True),
+            (internal, date(2026, 3, 4), 30, False),
+            (blank, date(2026, 3, 5), 20, True),
+        ]
+        for project, day, duration, billable in rows:
+            TimeEntry.objects.create(
+                project=project, description='Billed', date=day, start_time=time(9, 0), end_time=time(9, 0),
+                duration=duration, billable=billable, user=cls.user,
+            )
+        other = Member.objects.create_user('billing-other@example.com', 'billing-password', rate=Decimal('500.00'))
+        TimeEntry.objects.create(
+            project=Project.objects.create(name='Not mine', user=other), description='Other', date=date(2026, 3, 2),
+            start_time=time(9, 0), end_time=time(9, 0), duration=600, billable=True, user=other,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def summary(self, query=''):
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, 200)
+        return {group['currency']: group for group in response.json()['currencies']}
+
+    def test_totals_per_currency(self):
+        currencies = self.summary()
+        self.assertEqual(list(currencies), ['EUR', 'USD'])
+        eur, usd = currencies['EUR'], currencies['USD']
+        self.assertEqual((eur['minutes'], eur['billable_minutes']), (150, 120))
+        self.assertEqual((eur['revenue'], eur['cost'], eur['margin']), ('180.00', '75.00', '105.00'))
+        self.assertEqual((usd['minutes'], usd['billable_minutes']), (170, 140))
+        self.assertEqual((usd['revenue'], usd['cost'], usd['margin']), ('210.00', '85.00', '125.00'))
+        self.assertEqual(
+            [(row['period'], row['project_name'], row['minutes']) for row in eur['rows']],
+            [('2026-03-01', 'Euro', 90), ('2026-04-01', 'Euro', 60)],
+        )
+        self.assertEqual([row['client_name'] for row in usd['rows']], [None, 'Boston', 'Nowhere'])
+
+    def test_range_and_period(self):
+        currencies = self.summary('?start=2026-04-01&end=2026-04-30')
+        self.assertEqual(list(currencies), ['EUR'])
+        self.assertEqual(currencies['EUR']['minutes'], 60)
+        rows = self.summary('?period=day&end=2026-03-02')['USD']['rows']
+        self.assertEqual([(row['period'], row['minutes']) for row in rows], [('2026-03-02', 120)])
+
+    def test_malformed_dates_are_refused(self):
+        for query in ('?start=2026-02-30', '?end=2026-13-01', '?start=March', '?start=2026-03-09&end=2026-03-02',
+                      '?period=year'):
+            response = self.client.get(self.url + query)
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn('error', response.json())
+
+
+class HeatmapTests(TestCase):
+    """Heatmap minutes are split at local hour boundaries, by SQL on PostgreSQL and by NumPy elsewhere"""
+
+    url = '/api/projects/time-entries/heatmap/'
+    tz = ZoneInfo('Europe/Berlin')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('heatmap@example.com', 'heatmap-password', first_name='Heat')
+        UserProfile.objects.create(user=cls.user, timezone='Europe/Berlin')
+        cls.project = Project.objects.create(name='Heatmap', user=cls.user)
+        cls.other = Project.objects.create(name='Elsewhere', user=cls.user)
+        # Monday 2026-03-02; the second entry runs from Sunday into Monday
+        for project, day, start, end in (
+            (cls.project, date(2026, 3, 2), time(16, 19), time(17, 49)),
+            (cls.project, date(2026, 3, 8), time(23, 30), time(0, 15)),
+            (cls.other, date(2026, 3, 3), time(9, 0), time(9, 30)),
+        ):
+            TimeEntry.objects.create(
+                project=project, description='Heat', date=day, start_time=start, end_time=end, duration=0,
+                user=cls.user,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def assertCells(self, grid, expected):
+        cells = {(day, hour): minutes for day, row in enumerate(grid) for hour, minutes in enumerate(row) if minutes}
+        self.assertEqual(cells, expected)
+
+    def test_minutes_split_at_hour_boundaries(self):
+        response = self.client.get(self.url + '?start=2026-03-01&end=2026-03-31')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['timezone'], 'Europe/Berlin')
+        self.assertEqual(data['total_minutes'], 165)
+        self.assertCells(data['grid'], {(0, 16): 41, (0, 17): 49, (6, 23): 30, (0, 0): 15, (1, 9): 30})
+
+    def test_project_filter(self):
+        grid = self.client.get(self.url + f'?start=2026-03-01&end=2026-03-31&project={self.other.pk}').json()['grid']
+        self.assertCells(grid, {(1, 9): 30})
+
+    def test_numpy_fallback_matches(self):
+        entries = TimeEntry.objects.filter(user=self.user, project=self.project)
+        grid = _heatmap_numpy(entries, self.tz).round().astype(int).tolist()
+        self.assertCells(grid, {(0, 16): 41, (0, 17): 49, (6, 23): 30, (0, 0): 15})
+        self.assertEqual(heatmap(entries, self.tz), grid)
+
+    def test_bad_parameters_are_refused(self):
+        for query in ('?start=2026-03-09&end=2026-03-02', '?end=2026-02-30', '?project=first'):
+            self.assertEqual(self.client.get(self.url + query).status_code, 400)
+
+
+class ProjectConditionalRequestTests(TestCase):
+    """Project reads carry ETags for revalidation, and writes honour If-Match"""
+
+    url = '/api/projects/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('etag@example.com', 'etag-password', first_name='Etag')
+        cls.client_record = Client.objects.create(name='Etag client', user=cls.user)
+        cls.tag = Tag.objects.create(name='etag', user=cls.user)
+        cls.project = Project.objects.create(name='Etag project', client=cls.client_record, user=cls.user)
+        cls.detail = f'{cls.url}{cls.project.pk}/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_detail_revalidates_with_304(self):
+        response = self.client.get(self.detail)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('Last-Modified', response)
+        repeat = self.client.get(self.detail, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat['ETag'], response['ETag'])
+        self.assertEqual(repeat.content, b'')
+
+    def test_list_revalidates_until_it_changes(self):
+        etag = self.etag(self.url)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Project.objects.create(name='Another', user=self.user)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_update_changes_etag(self):
+        etag = self.etag(self.detail)
+        response = self.client.patch(self.detail, {'name': 'Renamed'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.detail, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_stale_if_match_is_refused(self):
+        etag = self.etag(self.detail)
+        self.client.patch(self.detail, {'name': 'Changed elsewhere'}, format='json')
+
+        response = self.client.patch(self.detail, {'name': 'Lost update'}, format='json', HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(self.client.delete(self.detail, HTTP_IF_MATCH=etag).status_code, 412)
+        self.assertEqual(Project.objects.get(pk=self.project.pk).name, 'Changed elsewhere')
+        self.assertEqual(self.client.patch(self.detail, {'name': 'Forced'}, format='json', HTTP_IF_MATCH='*').status_code, 200)
+
+    def test_client_change_moves_etag(self):
+        etag, list_etag = self.etag(self.detail), self.etag(self.url)
+        self.client_record.name = 'Renamed client'
+        self.client_record.save()
+        self.assertEqual(self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+        self.assertEqual(self.client.get(self.detail).json()['client']['name'], 'Renamed client')
+
+    def test_tag_changes_move_etag(self):
+        etag = self.etag(self.detail)
+        self.project.tags.add(self.tag)
+        self.assertEqual(self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.etag(self.detail)
+        self.tag.name = 'retagged'
+        self.tag.save()
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([tag['name'] for tag in response.json()['tags']], ['retagged'])
+
+
+class CounterTests(TestCase):
+    """Task, time entry and project writes keep the project and client counters; recompute_counters repairs drift"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('counters@example.com', 'counters-password', first_name='Count')
+        cls.acme = Client.objects.create(name='Acme', user=cls.user)
+        cls.globex = Client.objects.create(name='Globex', user=cls.user)
+        cls.first = Project.objects.create(name='First', client=cls.acme, user=cls.user, auto_progress=True)
+        cls.second = Project.objects.create(name='Second', client=cls.globex, user=cls.user)
+
+    def entry(self, project, duration, billable=True):
+        return TimeEntry.objects.create(
+            project=project, description='Counted', date=date(2026, 3, 2), start_time=time(9, 0),
+            end_time=time(10, 0), duration=duration, billable=billable, user=self.user,
+        )
+
+    def project_counters(self, project):
+        project.refresh_from_db()
+        return (project.task_count, project.completed_task_count, project.progress,
+                project.total_minutes, project.billable_minutes)
+
+    def client_counters(self, client):
+        client.refresh_from_db()
+        return client.project_count, client.total_minutes
+
+    def test_writes_count(self):
+        Task.objects.create(title='Open', project=self.first, user=self.user)
+        done = Task.objects.create(title='Done', project=self.first, status='Completed', user=self.user)
+        self.entry(self.first, 60)
+        self.entry(self.first, 30, billable=False)
+
+        self.assertEqual(self.project_counters(self.first), (2, 1, 50, 90, 60))
+        self.assertEqual(self.client_counters(self.acme), (1, 90))
+        self.assertIsNotNone(self.first.last_activity_at)
+
+        done.status = 'Pending'
+        done.save()
+        self.assertEqual(self.project_counters(self.first)[:3], (2, 0, 0))
+
+    def test_moving_between_projects(self):
+        task = Task.objects.create(title='Moving', project=self.first, status='Completed', user=self.user)
+        entry = self.entry(self.first, 45)
+
+        task.project = self.second
+        task.save()
+        entry.project = self.second
+        entry.duration = 50
+        entry.save()
+
+        self.assertEqual(self.project_counters(self.first), (0, 0, 0, 0, 0))
+        self.assertEqual(self.project_counters(self.second), (1, 1, 0, 50, 50))
+        self.assertEqual(self.client_counters(self.acme), (1, 0))
+        self.assertEqual(self.client_counters(self.globex), (1, 50))
+
+        # A project changing client takes its minutes along
+        self.second.client = self.acme
+        self.second.save()
+        self.assertEqual(self.client_counters(self.acme), (2, 50))
+        self.assertEqual(self.client_counters(self.globex), (0, 0))
+
+    def test_deletes_uncount(self):
+        task = Task.objects.create(title='Deleted', project=self.first, status='Completed', user=self.user)
+        entry = self.entry(self.first, 20)
+        self.entry(self.second, 40)
+
+        task.delete()
+        entry.delete()
+        self.assertEqual(self.project_counters(self.first), (0, 0, 0, 0, 0))
+        self.assertEqual(self.client_counters(self.acme), (1, 0))
+
+        self.second.delete()
+        self.assertEqual(self.client_counters(self.globex), (0, 0))
+
+    def test_recompute_repairs_drift(self):
+        Task.objects.create(title='Counted', project=self.first, status='Completed', user=self.user)
+        self.entry(self.first, 60)
+        self.entry(self.second, 15, billable=False)
+        expected = [self.project_counters(self.first), self.project_counters(self.second),
+                    self.client_counters(self.acme), self.client_counters(self.globex)]
+        # Writes that bypass the ORM's signals
+        Project.objects.update(task_count=7, completed_task_count=0, total_minutes=F('total_minutes') + 5)
+        Project.objects.filter(auto_progress=True).update(progress=3)
+        Client.objects.update(project_count=0, total_minutes=1)
+
+        out = StringIO()
+        call_command('recompute_counters', '--check', stdout=out)
+        self.assertIn('2 projects and 2 clients have drifted counters', out.getvalue())
+
+        call_command('recompute_counters', stdout=out)
+        self.assertIn('Repaired counters of 2 projects and 2 clients', out.getvalue())
+        self.assertEqual([self.project_counters(self.first), self.project_counters(self.second),
+                          self.client_counters(self.acme), self.client_counters(self.globex)], expected)
+
+        call_command('recompute_counters', '--check', stdout=out)
+        self.assertIn('0 projects and 0 clients have drifted counters', out.getvalue())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Declarative partitioning needs PostgreSQL')
+class TimeEntryPartitionPruningTests(TestCase):
+    """After partition_time_entries --convert, per-user queries only plan scans of the months they cover"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('partitions@example.com', 'partitions-password', first_name='Part')
+        project = Project.objects.create(name='Partitioned', user=cls.user)
+        for month in range(1, 7):
+            for day in (1, 15, 28):
+                TimeEntry.objects.create(
+                    project=project, description='Partitioned', date=date(2026, month, day),
+                    start_time=time(9, 0), end_time=time(10, 0), duration=60, user=cls.user,
+                )
+        # DDL is transactional on PostgreSQL: the conversion is rolled back with the test data.
+        # Inside the test's transaction, deferred foreign key checks must run before the renames.
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        convert_to_partitioned(connection, batch_size=10, months_ahead=1)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {TABLE}')
+
+    def scanned(self, queryset):
+        return {name for name in scanned_partitions(queryset) if name.startswith(TABLE)}
+
+    def test_rows_survive_conversion(self):
+        self.assertEqual(TimeEntry.objects.filter(user=self.user).count(), 18)
+
+    def test_month_of_dates_scans_one_partition(self):
+        queryset = TimeEntry.objects.filter(user=self.user, date__gte=date(2026, 3, 1), date__lt=date(2026, 4, 1))
+        self.assertEqual(self.scanned(queryset), {partition_name(date(2026, 3, 1))})
+        self.assertEqual(queryset.count(), 3)
+
+    def test_range_overlap_scans_one_partition(self):
+        started_at = datetime(2026, 3, 15, 8, 30, tzinfo=dt_timezone.utc)
+        queryset = overlapping(TimeEntry.objects.filter(user=self.user), started_at, started_at + timedelta(hours=1))
+        self.assertEqual(self.scanned(queryset), {partition_name(date(2026, 3, 1))})
+        self.assertEqual(queryset.count(), 1)
 
-# Create your tests here.
+    def test_window_across_months_scans_only_those_months(self):
+        started_at = datetime(2026, 2, 27, tzinfo=dt_timezone.utc)
+        queryset = overlapping(TimeEntry.objects.filter(user=self.user), started_at, started_at + timedelta(days=3))
+        self.assertEqual(self.scanned(queryset), {partition_name(date(2026, month, 1)) for month in (2, 3)})
+        self.assertEqual(queryset.count(), 2)
@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     ProjectListCreateView, ProjectRetrieveUpdateDestroyView, ClientListCreateView, ClientRetrieveUpdateDestroyView,
     TaskListCreateView, TaskRetrieveUpdateDestroyView, CompletedTaskCountView, CompletedProjectCountView,
-    TimeEntryListCreateView, TimeEntryRetrieveUpdateDestroyView, TagViewSet
+    TimeEntryListCreateView, TimeEntryRetrieveUpdateDestroyView, TagViewSet, SearchView, BillingSummaryView,
+    TimeEntryHeatmapView, TimeEntryGapsReportView, TimeEntryExportView,
 )
 
 router = DefaultRouter()
@@ -21,7 +22,14 @@ urlpatterns = [
     path('completed-count/', CompletedProjectCountView.as_view(), name='completed-project-count'),
     # TimeEntry endpoints
     path('time-entries/', TimeEntryListCreateView.as_view(), name='timeentry-list-create'),
+    path('time-entries/heatmap/', TimeEntryHeatmapView.as_view(), name='timeentry-heatmap'),
+    path('time-entries/export/', TimeEntryExportView.as_view(), name='timeentry-export'),
+    path('time-entries/gaps/', TimeEntryGapsReportView.as_view(), name='timeentry-gaps'),
     path('time-entries/<int:pk>/', TimeEntryRetrieveUpdateDestroyView.as_view(), name='timeentry-detail'),
+    # Full-text search
+    path('search/', SearchView.as_view(), name='search'),
+    # Invoicing
+    path('billing/summary/', BillingSummaryView.as_view(), name='billing-summary'),
     # Tag endpoints
     path('', include(router.urls)),
 ]
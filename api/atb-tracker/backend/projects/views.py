@@ -4,17 +4,29 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
+from datetime import datetime, time, timedelta
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from .models import Project, Client, Task, TimeEntry, Tag
+from .search import search, SEARCH_KINDS
+from .billing import billing_rows, merge_billing_rows, summarize, PERIODS
+from .heatmap import heatmap
+from .overlap import entry_write_lock, gaps_and_overlaps
+from .ranges import entry_dates, overlapping, parse_range_bound
 from .serializers import ProjectSerializer, ClientSerializer, TaskSerializer, TimeEntrySerializer, TagSerializer
 from users.authentication import UserDataIsolationMixin
+from archive.models import DailyRollup
+from archive.reads import time_entries_between
+from atb_tracker.conditional import ConditionalRequestMixin
+from atb_tracker.fieldsets import SparseFieldsetViewMixin
+from atb_tracker.fastpath import ValuesListFastPathMixin
 
-class ProjectListCreateView(UserDataIsolationMixin, generics.ListCreateAPIView):
+class ProjectListCreateView(UserDataIsolationMixin, ConditionalRequestMixin, SparseFieldsetViewMixin, generics.ListCreateAPIView):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
 
-class ProjectRetrieveUpdateDestroyView(UserDataIsolationMixin, generics.RetrieveUpdateDestroyAPIView):
+class ProjectRetrieveUpdateDestroyView(UserDataIsolationMixin, ConditionalRequestMixin, SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
@@ -29,12 +41,12 @@ class ClientRetrieveUpdateDestroyView(UserDataIsolationMixin, generics.RetrieveU
     serializer_class = ClientSerializer
     permission_classes = [IsAuthenticated]
 
-class TaskListCreateView(UserDataIsolationMixin, generics.ListCreateAPIView):
+class TaskListCreateView(UserDataIsolationMixin, ConditionalRequestMixin, generics.ListCreateAPIView):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
 
-class TaskRetrieveUpdateDestroyView(UserDataIsolationMixin, generics.RetrieveUpdateDestroyAPIView):
+class TaskRetrieveUpdateDestroyView(UserDataIsolationMixin, ConditionalRequestMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
@@ -68,32 +80,217 @@ class CompletedProjectCountView(UserDataIsolationMixin, APIView):
             qs = qs.filter(created_at__lte=end)
         return Response({"completed_projects": qs.count()})
 
-class TimeEntryListCreateView(UserDataIsolationMixin, generics.ListCreateAPIView):
+class SearchView(APIView):
+    """
+    Ranked full-text search over the user's time entries, tasks, projects and clients
+    """
+    permission_classes = [IsAuthenticated]
+    max_limit = 100
+
+    def get(self, request):
+        query = request.GET.get('q', '')
+        kinds = request.GET.get('types')
+        kinds = kinds.split(',') if kinds else SEARCH_KINDS
+        try:
+            limit = min(max(int(request.GET.get('limit', 20)), 1), self.max_limit)
+            offset = max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            return Response({"error": "limit and offset must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Fetch one extra hit to know whether another page exists
+        results = search(request.user, query, kinds, limit + 1, offset)
+        return Response({
+            "query": query,
+            "results": results[:limit],
+            "next_offset": offset + limit if len(results) > limit else None,
+        })
+
+class BillingSummaryView(APIView):
+    """
+    Billable revenue, cost and margin per client, project and period, grouped by currency
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'exports'
+
+    def get(self, request):
+        period = request.GET.get('period', 'month')
+        if period not in PERIODS:
+            return Response({"error": f"period must be one of {', '.join(PERIODS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Both bounds are optional, but a given one must be a date
+        raw_start, raw_end = request.GET.get('start'), request.GET.get('end')
+        try:
+            start = parse_date(raw_start) if raw_start else None
+            end = parse_date(raw_end) if raw_end else None
+            invalid = (raw_start and start is None) or (raw_end and end is None) or (start and end and start > end)
+        except ValueError:
+            invalid = True
+        if invalid:
+            return Response({"error": "start and end must be YYYY-MM-DD dates with start <= end"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        qs = TimeEntry.objects.filter(user=request.user)
+        archived = DailyRollup.objects.filter(user=request.user, kind='timeentry')
+        if start is not None:
+            qs = qs.filter(date__gte=start)
+            archived = archived.filter(date__gte=start)
+        if end is not None:
+            qs = qs.filter(date__lte=end)
+            archived = archived.filter(date__lte=end)
+
+        rows = merge_billing_rows(
+            billing_rows(qs, period),
+            billing_rows(archived, period, minutes_field='minutes', billable_field='billable_minutes'),
+        )
+        return Response({
+            "period": period,
+            "start": start and start.isoformat(),
+            "end": end and end.isoformat(),
+            "currencies": summarize(rows),
+        })
+
+class TimeEntryExportView(APIView):
+    """
+    Every time entry dated start..end, including entries moved to the archive
+    """
+    permission_classes = [IsAuthenticated]
+    max_days = 3660
+    throttle_scope = 'exports'
+
+    def get(self, request):
+        start = request.GET.get('start')
+        end = request.GET.get('end')
+        try:
+            start = parse_date(start) if start else None
+            end = parse_date(end) if end else None
+        except ValueError:
+            start = end = None
+        if start is None or end is None or start > end:
+            return Response({"error": "start and end must be YYYY-MM-DD dates with start <= end"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= self.max_days:
+            return Response({"error": f"Exports are limited to {self.max_days} days"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(time_entries_between(request.user, start, end))
+
+class TimeEntryHeatmapView(APIView):
+    """
+    Minutes tracked per weekday (Monday first) and local hour of day
+
+    Reads the hot table only: entries moved to the archive are not counted.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'exports'
+    default_days = 90
+
+    def get(self, request):
+        tz = request.user_context.tz
+        try:
+            end = parse_date(request.GET['end']) if request.GET.get('end') else timezone.now().astimezone(tz).date()
+            start = parse_date(request.GET['start']) if request.GET.get('start') else end - timedelta(days=self.default_days - 1)
+        except ValueError:
+            start = end = None
+        if start is None or end is None or start > end:
+            return Response({"error": "start and end must be YYYY-MM-DD dates with start <= end"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            project_id = int(request.GET['project']) if request.GET.get('project') else None
+            client_id = int(request.GET['client']) if request.GET.get('client') else None
+        except ValueError:
+            return Response({"error": "project and client must be ids"}, status=status.HTTP_400_BAD_REQUEST)
+
+        lower = datetime.combine(start, time.min, tzinfo=tz)
+        upper = datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz)
+        first_date, last_date = entry_dates(lower, upper)
+        qs = TimeEntry.objects.filter(
+            user=request.user,
+            date__gte=first_date,
+            date__lte=last_date,
+            started_at__gte=lower,
+            started_at__lt=upper,
+        )
+        grid = heatmap(qs, tz, project_id=project_id, client_id=client_id)
+        return Response({
+            "timezone": str(tz),
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "project": project_id,
+            "client": client_id,
+            "total_minutes": sum(map(sum, grid)),
+            "grid": grid,
+        })
+
+class TimeEntryGapsReportView(APIView):
+    """
+    Overlapping time entries and untracked gaps within each workday
+
+    Reads the hot table only: days whose entries were archived show no entries.
+    """
+    permission_classes = [IsAuthenticated]
+    max_days = 366
+    throttle_scope = 'exports'
+
+    def get(self, request):
+        start = request.GET.get('start')
+        end = request.GET.get('end')
+        try:
+            start = parse_date(start) if start else None
+            end = parse_date(end) if end else None
+            min_gap = int(request.GET.get('min_gap', 1))
+        except ValueError:
+            start = end = None
+        if start is None or end is None or start > end:
+            return Response({"error": "start and end must be YYYY-MM-DD dates with start <= end"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= self.max_days:
+            return Response({"error": f"Reports are limited to {self.max_days} days"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(gaps_and_overlaps(request.user, start, end, request.user_context.tz, min_gap_minutes=min_gap))
+
+class TimeEntryListCreateView(UserDataIsolationMixin, ConditionalRequestMixin, SparseFieldsetViewMixin, ValuesListFastPathMixin, generics.ListCreateAPIView):
+    queryset = TimeEntry.objects.all()
     serializer_class = TimeEntrySerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = TimeEntry.objects.filter(user=self.request.user)
+        queryset = super().get_queryset()
         entry_type = self.request.query_params.get('type')
         if entry_type:
             queryset = queryset.filter(type=entry_type)
+        # Calendar windows: ?start=&end= (ISO datetimes or dates, local to the profile) select entries overlapping the range
+        tz = self.request.user_context.tz
+        start = parse_range_bound(self.request.query_params.get('start'), tz=tz)
+        end = parse_range_bound(self.request.query_params.get('end'), end=True, tz=tz)
+        if start is not None and end is not None:
+            queryset = overlapping(queryset, start, end)
+        elif start is not None:
+            queryset = queryset.filter(ended_at__gt=start)
+        elif end is not None:
+            queryset = queryset.filter(started_at__lt=end)
         return queryset
 
     def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        if not serializer.is_valid():
-            print("[TimeEntryListCreateView] Validation errors:", serializer.errors)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        
-        self.perform_create(serializer)
+        # A JSON array creates all entries in one batch
+        serializer = self.get_serializer(data=request.data, many=isinstance(request.data, list))
+        # The overlap check and the insert run in one locked transaction
+        with entry_write_lock(request.user):
+            if not serializer.is_valid():
+                print("[TimeEntryListCreateView] Validation errors:", serializer.errors)
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
-class TimeEntryRetrieveUpdateDestroyView(UserDataIsolationMixin, generics.RetrieveUpdateDestroyAPIView):
+class TimeEntryRetrieveUpdateDestroyView(UserDataIsolationMixin, ConditionalRequestMixin, SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = TimeEntry.objects.all()
     serializer_class = TimeEntrySerializer
     permission_classes = [IsAuthenticated]
 
+    def update(self, request, *args, **kwargs):
+        with entry_write_lock(request.user):
+            return super().update(request, *args, **kwargs)
+
 class TagViewSet(UserDataIsolationMixin, viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
@@ -11,6 +11,7 @@ class UserProfile(models.Model):
     website = models.URLField(max_length=255, blank=True)
     timezone = models.CharField(max_length=100, blank=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
 
     def __str__(self):
         return f"{self.user.get_full_name()} Profile"
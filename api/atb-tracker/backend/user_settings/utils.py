@@ -0,0 +1,23 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.utils import timezone
+
+from .models import UserProfile
+
+
+def timezone_from_name(name):
+    """Return the tzinfo named ``name``, or the default timezone if it is empty or unknown"""
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.get_default_timezone()
+
+
+def user_timezone(user):
+    """Return the tzinfo from the user's profile, or the default timezone if unset or unknown
+
+    Requests should use ``request.user_context.tz`` (users.context), which is cached.
+    """
+    return timezone_from_name(UserProfile.objects.filter(user=user).values_list('timezone', flat=True).first())
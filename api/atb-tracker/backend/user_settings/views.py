@@ -3,6 +3,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from users.models import Member
+from jobs.models import Job
+from jobs.registry import enqueue
+from jobs.serializers import JobSerializer
+from atb_tracker.conditional import ConditionalRequestMixin
 from .models import UserProfile
 from .serializers import UserProfileSerializer
 from rest_framework.exceptions import NotAuthenticated
@@ -11,25 +15,38 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 
 logger = logging.getLogger(__name__)
 
-class UserProfileDetailView(generics.RetrieveUpdateAPIView):
+class CachedProfileRetrieveMixin:
+    """Answer GET with the profile representation cached in ``request.user_context``"""
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(request.user_context.profile)
+
+
+class UserProfileDetailView(ConditionalRequestMixin, CachedProfileRetrieveMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
     def get_object(self):
-        logger.debug(f"Request user: {self.request.user}")
-        logger.debug(f"Request user is authenticated: {self.request.user.is_authenticated}")
-        logger.debug(f"Request headers: {dict(self.request.headers)}")
-        
         user = self.request.user
-        if not hasattr(user, 'profile'):
-            profile, created = UserProfile.objects.get_or_create(user=user)
-        else:
-            profile = user.profile
-        
-        logger.debug(f"Profile retrieved/created for user: {user.email}")
+        profile, created = UserProfile.objects.get_or_create(user=user)
+        if created:
+            logger.debug(f"Profile created for user: {user.email}")
+        # Name changes then land on request.user, which the new ETag is computed from
+        profile.user = user
         return profile
 
+    def object_version(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            # Cached in the user context, which is invalidated when the profile or member is saved
+            context = self.request.user_context
+            return context.last_modified, context.version
+        # The representation also carries the member's name, email and picture
+        profile = self.get_object()
+        user = self.request.user
+        last = max(filter(None, [profile.updated_at, user.updated_at]))
+        return last, f"{profile.updated_at and profile.updated_at.isoformat()}|{user.updated_at.isoformat()}"
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
@@ -71,22 +88,15 @@ class UserProfileDetailView(generics.RetrieveUpdateAPIView):
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_account(request):
-    """Delete user account and all associated data"""
+    """Queue deletion of the user account and all associated data; poll the returned job"""
     user = request.user
     if not user:
         return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    try:
-        # Delete user profile
-        try:
-            profile = UserProfile.objects.get(user=user)
-            profile.delete()
-        except UserProfile.DoesNotExist:
-            pass
-        
-        # Delete user
-        user.delete()
-        
-        return Response({'message': 'Account deleted successfully'}, status=status.HTTP_200_OK)
-    except Exception as e:
-        return Response({'error': f'Failed to delete account: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    job = Job.objects.filter(
+        user=user, name='users.delete_account', status__in=[Job.QUEUED, Job.RUNNING]
+    ).first() or enqueue('users.delete_account', user=user, user_id=user.pk)
+    return Response(
+        {'message': 'Account deletion started', 'job': JobSerializer(job).data},
+        status=status.HTTP_202_ACCEPTED,
+    )
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def reserve_shard_id_ranges(sender, using, **kwargs):
+    from django.conf import settings
+    from atb_tracker.sharding import SHARDED_APPS
+    from .shards import reserve_id_ranges
+    if using in settings.SHARD_DATABASES and sender.label in SHARDED_APPS:
+        reserve_id_ranges(using, models=list(sender.get_models(include_auto_created=True)))
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(reserve_shard_id_ranges)
@@ -2,7 +2,9 @@ from rest_framework import authentication
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from django.contrib.auth.models import AnonymousUser
+from .context import attach_user_context
 from .models import Member
+from .shards import route_request
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,8 +26,6 @@ class CustomJWTAuthentication(JWTAuthentication):
             
             user = self.get_user(validated_token)
             
-            return (user, validated_token)
-            
         except InvalidToken as e:
             logger.error(f"Invalid JWT token: {e}")
             return None
@@ -36,6 +36,10 @@ class CustomJWTAuthentication(JWTAuthentication):
             logger.error(f"JWT authentication error: {e}")
             return None
 
+        route_request(user, request.method)
+        attach_user_context(request, user)
+        return (user, validated_token)
+
 class UserDataIsolationMixin:
     """Mixin to ensure user data isolation in views"""
     
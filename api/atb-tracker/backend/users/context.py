@@ -0,0 +1,74 @@
+"""
+Per-user request context: the member's profile and settings, loaded once.
+
+``UserContext`` carries the serialized profile (name, email, avatar URLs and the
+UserProfile fields), the timezone views bucket dates by, and the version the
+profile's ETag is built from. It is cached per member and origin (avatar URLs are
+absolute) under a versioned namespace that any Member or UserProfile save
+bumps (see ``users/signals.py``), so it is never served stale.
+
+``CustomJWTAuthentication`` attaches it to every authenticated request as
+``request.user_context``, loaded on first use; views read it from there instead
+of querying the profile again.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from atb_tracker.cache import user_cache_key
+from user_settings.models import UserProfile
+from user_settings.serializers import UserProfileSerializer
+from user_settings.utils import timezone_from_name
+
+CACHE_NAMESPACE = 'user-context'
+
+
+class UserContext:
+    """A member's cached profile, settings and timezone"""
+
+    def __init__(self, user_id, profile, version, last_modified):
+        self.user_id = user_id
+        # The UserProfileSerializer representation, as GET /api/user-settings/profile/ returns it
+        self.profile = profile
+        # The profile ETag's version and Last-Modified; they cover the member's fields too
+        self.version = version
+        self.last_modified = last_modified
+
+    @property
+    def timezone_name(self):
+        return self.profile.get('timezone') or ''
+
+    @property
+    def avatar_url(self):
+        return self.profile.get('avatar_url')
+
+    @property
+    def tz(self):
+        """The member's tzinfo, or the default timezone if unset or unknown"""
+        return timezone_from_name(self.timezone_name)
+
+
+def build_user_context(user, request=None):
+    """Load ``user``'s profile (creating it on first use) and build their UserContext"""
+    profile, _ = UserProfile.objects.get_or_create(user=user)
+    profile.user = user
+    profile_data = dict(UserProfileSerializer(profile, context={'request': request}).data)
+    version = f"{profile.updated_at and profile.updated_at.isoformat()}|{user.updated_at.isoformat()}"
+    last_modified = max(filter(None, [profile.updated_at, user.updated_at]))
+    return UserContext(user.pk, profile_data, version, last_modified)
+
+
+def get_user_context(user, request=None):
+    """``user``'s UserContext from the cache, built on a miss; URLs are absolute when ``request`` is given"""
+    origin = request.build_absolute_uri('/') if request is not None else ''
+    key = user_cache_key(CACHE_NAMESPACE, user.pk, origin)
+    context = cache.get(key)
+    if context is None:
+        context = build_user_context(user, request)
+        cache.set(key, context, settings.USER_CONTEXT_CACHE_SECONDS)
+    return context
+
+
+def attach_user_context(request, user):
+    """Give ``request`` a ``user_context`` for ``user``, loaded on first access"""
+    request.user_context = SimpleLazyObject(lambda: get_user_context(user, request))
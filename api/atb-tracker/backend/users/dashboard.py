@@ -0,0 +1,116 @@
+"""
+Dashboard bootstrap: everything the dashboard shows on load in one response.
+
+The member's projects (as GET /api/projects/ lists them, completed ones
+included, so the page can cache the list it was given), this week's time
+entries and pomodoro sessions (the dashboard draws today's list and the per-day
+week summary from them), today's and this week's totals and the completed counts
+are read in seven queries, then cached per user, local timezone and day. Any
+write to those tables invalidates the cached copy (see ``users/signals.py``), so
+the timeout only bounds how long a write made outside the ORM's signals can go
+unnoticed.
+
+The page reloads this payload for its periodic refresh too, so the first load
+and every refresh cover the same week.
+
+This deliberately differs from the original plan of sending only active projects
+in a minimal shape: the page keeps the list as its project cache and reads
+clients, tags and completed projects from it, so the full list costs less than a
+second request. The project picker filters to active projects on the client.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from atb_tracker.cache import user_cache_key
+from atb_tracker.fastpath import compile_row_converter
+from pomodoro.models import PomodoroSession
+from pomodoro.serializers import PomodoroSessionSerializer
+from projects.models import Project, Task, TimeEntry
+from projects.serializers import ProjectSerializer, TimeEntrySerializer
+
+CACHE_NAMESPACE = 'dashboard'
+
+COMPLETED = 'completed'
+
+
+def _rows(queryset, serializer_class):
+    columns, convert = compile_row_converter(serializer_class())
+    return [convert(row) for row in queryset.values_list(*columns)]
+
+
+def _projects(user):
+    """(every project in the ProjectSerializer representation, completed project count) from two queries"""
+    queryset = Project.objects.filter(user=user).select_related('client').prefetch_related('tags').order_by('name', 'id')
+    projects = list(ProjectSerializer(queryset, many=True).data)
+    completed = sum(1 for project in projects if project['status'].lower() == COMPLETED)
+    return projects, completed
+
+
+def dashboard(user, tz):
+    """Build the dashboard bootstrap payload for ``user`` in the timezone ``tz``"""
+    today = timezone.now().astimezone(tz).date()
+    week_start = today - timedelta(days=today.weekday())
+    # Pomodoro sessions are stored as absolute times; bound them by local midnights
+    today_from = datetime.combine(today, time.min, tzinfo=tz)
+    week_from = datetime.combine(week_start, time.min, tzinfo=tz)
+    until = datetime.combine(today + timedelta(days=1), time.min, tzinfo=tz)
+
+    projects, completed_projects = _projects(user)
+    completed_tasks = Task.objects.filter(user=user, status__iexact=COMPLETED).count()
+
+    entries = TimeEntry.objects.filter(user=user, date__gte=week_start, date__lte=today)
+    time_entries = _rows(entries.order_by('date', 'start_time', 'id'), TimeEntrySerializer)
+    is_today = Q(date=today)
+    entry_totals = entries.aggregate(
+        today_minutes=Sum('duration', filter=is_today, default=0),
+        today_billable=Sum('duration', filter=is_today & Q(billable=True), default=0),
+        today_entries=Count('pk', filter=is_today),
+        week_minutes=Sum('duration', default=0),
+        week_billable=Sum('duration', filter=Q(billable=True), default=0),
+        week_entries=Count('pk'),
+    )
+
+    sessions = PomodoroSession.objects.filter(user=user, start_time__gte=week_from, start_time__lt=until)
+    pomodoro_sessions = _rows(sessions.order_by('start_time', 'id'), PomodoroSessionSerializer)
+    is_today = Q(start_time__gte=today_from)
+    focus_totals = sessions.aggregate(
+        today_focus=Sum('duration', filter=is_today, default=0),
+        today_sessions=Count('pk', filter=is_today),
+        week_focus=Sum('duration', default=0),
+        week_sessions=Count('pk'),
+    )
+
+    return {
+        'timezone': str(tz),
+        'date': today.isoformat(),
+        'week_start': week_start.isoformat(),
+        'projects': projects,
+        'time_entries': time_entries,
+        'pomodoro_sessions': pomodoro_sessions,
+        'totals': {
+            period: {
+                'minutes': entry_totals[f'{period}_minutes'],
+                'billable_minutes': entry_totals[f'{period}_billable'],
+                'entries': entry_totals[f'{period}_entries'],
+                'focus_minutes': focus_totals[f'{period}_focus'],
+                'sessions': focus_totals[f'{period}_sessions'],
+            }
+            for period in ('today', 'week')
+        },
+        'completed': {'tasks': completed_tasks, 'projects': completed_projects},
+    }
+
+
+def cached_dashboard(user, tz):
+    """Return :func:`dashboard`, cached until the user's data changes or the local day turns"""
+    today = timezone.now().astimezone(tz).date()
+    key = user_cache_key(CACHE_NAMESPACE, user.id, tz, today)
+    result = cache.get(key)
+    if result is None:
+        result = dashboard(user, tz)
+        cache.set(key, result, settings.DASHBOARD_CACHE_SECONDS)
+    return result
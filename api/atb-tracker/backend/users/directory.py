@@ -0,0 +1,85 @@
+"""
+Team directory: the members sharing one of the caller's groups.
+
+``Member.groups`` stays the comma-separated field the API reads and writes.
+``MemberGroup`` mirrors it as one indexed row per (group, member), so scoping to
+a group is an index lookup instead of a substring scan over every member.
+
+Search matches "first last email", lower-cased: a prefix for one or two
+characters, a substring from three. On PostgreSQL a pg_trgm GIN index on that
+exact expression serves both (migration 0004); other backends scan it. Pages are
+cursors over the unique email, so the thousandth page costs the same as the first.
+"""
+from django.db import transaction
+from django.db.models import CharField
+from django.db.models.expressions import RawSQL
+from rest_framework.pagination import CursorPagination
+
+from .models import Member, MemberGroup
+
+# Must match the indexed expression in migration 0004 character for character
+SEARCH_TEXT_SQL = "lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || email)"
+TRIGRAM_MIN_LENGTH = 3
+
+
+def parse_groups(groups):
+    """Split the comma separated ``Member.groups`` value into group names"""
+    if not groups:
+        return []
+    return [name.strip() for name in groups.split(',') if name.strip()]
+
+
+def sync_member_groups(member, using=None):
+    """Make ``member``'s MemberGroup rows match ``member.groups``"""
+    wanted = set(parse_groups(member.groups))
+    rows = MemberGroup.objects.using(using).filter(member=member)
+    existing = set(rows.values_list('name', flat=True))
+    if wanted == existing:
+        return
+    with transaction.atomic(using=using):
+        rows.filter(name__in=existing - wanted).delete()
+        MemberGroup.objects.using(using).bulk_create(
+            [MemberGroup(member=member, name=name) for name in wanted - existing], ignore_conflicts=True,
+        )
+
+
+def group_member_ids(names):
+    """Subquery of the ids of members in any of the groups ``names``"""
+    return MemberGroup.objects.filter(name__in=names).values('member_id')
+
+
+def caller_groups(user, group=None):
+    """``user``'s groups, or just ``group`` when ``user`` belongs to it"""
+    names = parse_groups(user.groups)
+    if group is not None:
+        names = [name for name in names if name == group]
+    return names
+
+
+def search_members(queryset, query):
+    """Filter ``queryset`` to members whose name or email matches ``query``"""
+    term = ' '.join(query.lower().split())
+    if not term:
+        return queryset
+    lookup = 'contains' if len(term) >= TRIGRAM_MIN_LENGTH else 'startswith'
+    text = RawSQL(SEARCH_TEXT_SQL, (), output_field=CharField())
+    return queryset.alias(search_text=text).filter(**{f'search_text__{lookup}': term})
+
+
+def directory_members(user, group=None, query=None):
+    """The members sharing a group with ``user`` (``user`` alone without groups), optionally searched"""
+    names = caller_groups(user, group)
+    if names:
+        queryset = Member.objects.filter(pk__in=group_member_ids(names), is_active=True)
+    else:
+        queryset = Member.objects.filter(pk=user.pk)
+    if query:
+        queryset = search_members(queryset, query)
+    return queryset.only('id', 'email', 'first_name', 'last_name', 'picture', 'groups')
+
+
+class DirectoryPagination(CursorPagination):
+    ordering = 'email'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
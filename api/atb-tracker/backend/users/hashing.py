@@ -0,0 +1,76 @@
+"""
+Password checks on a bounded thread pool.
+
+A password check is tens of milliseconds of PBKDF2, and hashlib releases the GIL
+while it runs, so during a login storm a threaded server can end up with every
+core hashing and every other request waiting behind it. Checks run on at most
+``PASSWORD_HASH_WORKERS`` threads; ``PASSWORD_HASH_QUEUE`` more logins may wait
+for one, and any beyond that are turned away with a 503 at once instead of
+piling up. ``PASSWORD_HASH_WORKERS = 0`` checks inline on the request thread.
+
+Only the hash comparison leaves the request thread. Re-hashing a password
+stored with outdated hasher parameters is written back by the caller, so the
+pool threads never open database connections.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+POOL_SETTINGS = {'PASSWORD_HASH_WORKERS', 'PASSWORD_HASH_QUEUE'}
+
+_pool = {}
+_pool_lock = threading.Lock()
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-ins are being processed; please retry shortly.'
+    default_code = 'hashing_busy'
+    wait = 1
+
+
+def _executor():
+    with _pool_lock:
+        if not _pool:
+            workers = settings.PASSWORD_HASH_WORKERS
+            _pool['executor'] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+            _pool['slots'] = threading.BoundedSemaphore(workers + settings.PASSWORD_HASH_QUEUE)
+        return _pool['executor'], _pool['slots']
+
+
+@receiver(setting_changed)
+def reset_pool(setting, **kwargs):
+    # override_settings (the login benchmark) swaps the pool size
+    if setting in POOL_SETTINGS:
+        with _pool_lock:
+            executor = _pool.pop('executor', None)
+            _pool.clear()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def check_member_password(user, raw_password):
+    """``user.check_password(raw_password)``, hashed on the bounded pool; raises HashingBusy when it is full"""
+    outdated = []
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        valid = check_password(raw_password, user.password, outdated.append)
+    else:
+        executor, slots = _executor()
+        if not slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            valid = executor.submit(check_password, raw_password, user.password, outdated.append).result()
+        finally:
+            slots.release()
+    if outdated:
+        # What AbstractBaseUser.check_password does on success with an outdated hash
+        user.set_password(raw_password)
+        user._password = None
+        user.save(update_fields=['password'])
+    return valid
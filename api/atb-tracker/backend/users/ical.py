@@ -0,0 +1,215 @@
+"""
+iCalendar subscription feed of a member's time entries and pomodoro sessions.
+
+Calendar apps poll subscription URLs every few minutes, so the feed is built to
+make a repeat poll nearly free:
+
+* The feed has a version in the per-user "calendar-feed" cache namespace, bumped
+  by every time entry, pomodoro session and project write (``users/signals.py``).
+  The ETag is derived from it, so an unchanged feed is answered 304 after the
+  token lookup alone, and the rendered body is cached under the same version.
+* When the version has moved, one grouped query per table fingerprints every day
+  in the window (row count and latest ``updated_at``). VEVENT blocks are cached
+  per UTC day under that fingerprint, so only the days that changed are read
+  and rendered again. A project rename leaves entry rows untouched, so project
+  writes also bump the "calendar-day" namespace, which retires every day block.
+
+Feeds are authenticated by a secret token in the URL; only its SHA-256 digest is
+stored (``CalendarFeed``), so the URL is shown once, when it is issued.
+"""
+import hashlib
+import secrets
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from rest_framework.negotiation import BaseContentNegotiation
+
+from atb_tracker.cache import user_cache_key
+from pomodoro.models import PomodoroSession
+from projects.models import TimeEntry
+
+FEED_CACHE_NAMESPACE = 'calendar-feed'
+DAY_CACHE_NAMESPACE = 'calendar-day'
+ICS_CONTENT_TYPE = 'text/calendar; charset=utf-8'
+PRODID = '-//ATB Tracker//Time Tracking//EN'
+UID_DOMAIN = 'atb-tracker'
+# RFC 5545 3.1: content lines are folded at 75 octets
+LINE_OCTETS = 75
+
+
+def new_feed_token():
+    """(token for the URL, digest to store)"""
+    token = secrets.token_urlsafe(32)
+    return token, token_digest(token)
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def escape_text(value):
+    """Escape a TEXT property value (RFC 5545 3.3.11)"""
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+    )
+
+
+def fold(line):
+    """Fold a content line into CRLF-separated chunks of at most 75 octets, never splitting a character"""
+    encoded = line.encode()
+    if len(encoded) <= LINE_OCTETS:
+        return line + '\r\n'
+    chunks = []
+    start = 0
+    limit = LINE_OCTETS
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Back off UTF-8 continuation bytes
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        chunks.append(encoded[start:end].decode())
+        start = end
+        # Continuation lines start with a space, which counts towards their 75
+        limit = LINE_OCTETS - 1
+    return '\r\n '.join(chunks) + '\r\n'
+
+
+def _stamp(moment):
+    return moment.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _event(uid, start, end, stamp, summary, description, category):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}@{UID_DOMAIN}',
+        f'DTSTAMP:{_stamp(stamp)}',
+        f'DTSTART:{_stamp(start)}',
+        f'DTEND:{_stamp(end)}',
+        f'SUMMARY:{escape_text(summary)}',
+    ]
+    if description:
+        lines.append(f'DESCRIPTION:{escape_text(description)}')
+    lines += [f'CATEGORIES:{escape_text(category)}', 'TRANSP:TRANSPARENT', 'END:VEVENT']
+    return ''.join(fold(line) for line in lines)
+
+
+def _entry_event(entry_id, project_name, description, start, end, duration, billable, updated_at):
+    summary = f'{project_name}: {description}' if description else project_name
+    details = f"{duration} min{', billable' if billable else ''}"
+    return _event(f'timeentry-{entry_id}', start, end, updated_at, summary,
+                  f'{description}\n{details}' if description else details, 'Time entry')
+
+
+def _session_event(session_id, start, end, duration, cycles, notes, updated_at):
+    summary = f"Focus session ({cycles} cycle{'s' if cycles != 1 else ''})"
+    details = f'{duration} min focus' + (f'\n{notes}' if notes else '')
+    return _event(f'pomodoro-{session_id}', start, end, updated_at, summary, details, 'Focus')
+
+
+def _midnight(day):
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+def day_fingerprints(user, since):
+    """{UTC day: (entries, latest entry change, sessions, latest session change)} for days from ``since``"""
+    fingerprints = {}
+    entries = (
+        TimeEntry.objects.filter(user=user, date__gte=since).order_by()
+        .values('date').annotate(count=Count('pk'), last=Max('updated_at'))
+    )
+    for row in entries:
+        fingerprints[row['date']] = (row['count'], row['last'].isoformat(), 0, None)
+    sessions = (
+        PomodoroSession.objects.filter(user=user, start_time__gte=_midnight(since)).order_by()
+        .annotate(day=TruncDate('start_time', tzinfo=dt_timezone.utc))
+        .values('day').annotate(count=Count('pk'), last=Max('updated_at'))
+    )
+    for row in sessions:
+        count, last = fingerprints.get(row['day'], (0, None, 0, None))[:2]
+        fingerprints[row['day']] = (count, last, row['count'], row['last'].isoformat())
+    return fingerprints
+
+
+def render_days(user, days):
+    """{day: rendered VEVENT blocks} for the UTC ``days``, with one query per table"""
+    blocks = {day: [] for day in days}
+    entries = (
+        TimeEntry.objects.filter(user=user, date__in=days).order_by('started_at', 'id')
+        .values_list('id', 'project__name', 'description', 'started_at', 'ended_at', 'duration',
+                     'billable', 'updated_at', 'date')
+    )
+    for *fields, day in entries:
+        if fields[3] is not None:
+            blocks[day].append(_entry_event(*fields))
+    sessions = (
+        PomodoroSession.objects.filter(user=user, start_time__gte=_midnight(min(days)),
+                                       start_time__lt=_midnight(max(days) + timedelta(days=1)))
+        .order_by('start_time', 'id')
+        .values_list('id', 'start_time', 'end_time', 'duration', 'cycles', 'notes', 'updated_at')
+    )
+    for fields in sessions:
+        day = fields[1].astimezone(dt_timezone.utc).date()
+        if day in blocks:
+            blocks[day].append(_session_event(*fields))
+    return {day: ''.join(events) for day, events in blocks.items()}
+
+
+def render_feed(user, tz_name):
+    """The full VCALENDAR for ``user``, re-rendering only the days whose fingerprint changed"""
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    since = today - timedelta(days=settings.CALENDAR_FEED_DAYS - 1)
+    fingerprints = day_fingerprints(user, since)
+
+    prefix = user_cache_key(DAY_CACHE_NAMESPACE, user.pk)
+    keys = {day: f'{prefix}:{day.isoformat()}:' + ':'.join(map(str, fingerprint))
+            for day, fingerprint in fingerprints.items()}
+    cached = cache.get_many(keys.values())
+    blocks = {day: cached[key] for day, key in keys.items() if key in cached}
+    stale = [day for day in keys if day not in blocks]
+    if stale:
+        rendered = render_days(user, stale)
+        cache.set_many({keys[day]: rendered[day] for day in stale}, settings.CALENDAR_FEED_CACHE_SECONDS)
+        blocks.update(rendered)
+
+    refresh = f'PT{settings.CALENDAR_FEED_REFRESH_MINUTES}M'
+    header = [
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN', 'METHOD:PUBLISH',
+        'X-WR-CALNAME:ATB Tracker', f'X-WR-TIMEZONE:{tz_name}',
+        f'REFRESH-INTERVAL;VALUE=DURATION:{refresh}', f'X-PUBLISHED-TTL:{refresh}',
+    ]
+    return ''.join(fold(line) for line in header) + ''.join(blocks[day] for day in sorted(blocks)) + 'END:VCALENDAR\r\n'
+
+
+def feed_cache_key(user, tz_name):
+    """Cache key of ``user``'s rendered feed; it moves with every write and at UTC midnight"""
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    # The window moves at UTC midnight, so the date is part of the version
+    return user_cache_key(FEED_CACHE_NAMESPACE, user.pk, tz_name, today)
+
+
+def feed_etag(key):
+    return f'"{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}"'
+
+
+def cached_feed(user, tz_name, key):
+    """The feed body cached under ``key`` (see :func:`feed_cache_key`), rendered on a miss"""
+    body = cache.get(key)
+    if body is None:
+        body = render_feed(user, tz_name)
+        cache.set(key, body, settings.CALENDAR_FEED_CACHE_SECONDS)
+    return body
+
+
+class FeedContentNegotiation(BaseContentNegotiation):
+    """Calendar clients ask for text/calendar; the feed bypasses rendering and errors go out as JSON"""
+
+    def select_parser(self, request, parsers):
+        return parsers[0] if parsers else None
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from auth_app.views import verify_token
+from users.models import Member
+from users.utils import get_tokens_for_user
+from users.views import LoginView
+
+EMAIL = 'login-benchmark@example.com'
+PASSWORD = 'login-benchmark-password'
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+class Command(BaseCommand):
+    help = ('Storm the login endpoint from many threads with password hashing inline and on the bounded '
+            'pool, timing the logins and a cheap request served alongside them')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200, help='Logins per run')
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help="Request threads, standing in for a threaded server's workers")
+        parser.add_argument('--hash-workers', type=int, default=None,
+                            help='Pool size for the pooled run (default: PASSWORD_HASH_WORKERS)')
+
+    def handle(self, *args, **options):
+        hash_workers = options['hash_workers'] or settings.PASSWORD_HASH_WORKERS
+        if hash_workers <= 0:
+            raise CommandError('The pooled run needs at least one hash worker')
+        if Member.objects.by_email(EMAIL).exists():
+            raise CommandError(f'{EMAIL} already exists; delete it or run against another database')
+
+        member = Member.objects.create_user(EMAIL, PASSWORD, first_name='Login', last_name='Benchmark')
+        factory = RequestFactory()
+        # Upper case, so the run goes through the case-insensitive lookup
+        login_body = json.dumps({'email': EMAIL.upper(), 'password': PASSWORD})
+        probe_body = json.dumps({'token': get_tokens_for_user(member)['access']})
+        login_view = LoginView.as_view()
+
+        def login():
+            return login_view(factory.post('/api/users/login/', login_body, content_type='application/json'))
+
+        def probe():
+            return verify_token(factory.post('/api/auth/verify/', probe_body, content_type='application/json'))
+
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                response = login()
+            if response.status_code != 200:
+                raise CommandError(f'Login answered {response.status_code}')
+            self.stdout.write(f'Queries per login: {len(queries)}')
+
+            runs = [('inline hashing', 0, 0), (f'pool of {hash_workers}', hash_workers, options['logins'])]
+            unthrottled = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+            for label, workers, queue in runs:
+                with override_settings(REST_FRAMEWORK=unthrottled, PASSWORD_HASH_WORKERS=workers,
+                                       PASSWORD_HASH_QUEUE=queue):
+                    self.report(label, *self.storm(login, probe, options))
+        finally:
+            member.delete()
+
+    def storm(self, login, probe, options):
+        """Run the logins on ``--concurrency`` threads while one thread keeps probing"""
+        done = threading.Event()
+        probes = []
+
+        def timed(call):
+            started = time.perf_counter()
+            try:
+                return call().status_code, time.perf_counter() - started
+            finally:
+                connections.close_all()
+
+        def keep_probing():
+            while not done.is_set():
+                probes.append(timed(probe)[1])
+
+        prober = threading.Thread(target=keep_probing)
+        started = time.perf_counter()
+        prober.start()
+        try:
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                results = list(executor.map(lambda _: timed(login), range(options['logins'])))
+        finally:
+            done.set()
+            prober.join()
+        return results, probes, time.perf_counter() - started
+
+    def report(self, label, results, probes, elapsed):
+        latencies = [seconds for status, seconds in results if status == 200]
+        failed = len(results) - len(latencies)
+        self.stdout.write(
+            f'  {label:<16} {len(latencies) / elapsed:7.1f} logins/s'
+            f'  login p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  p99 {percentile(latencies, 0.99) * 1000:7.1f} ms'
+            f'  other requests p50 {percentile(probes, 0.5) * 1000:6.1f} ms'
+            f'  p99 {percentile(probes, 0.99) * 1000:6.1f} ms'
+            + (f'  ({failed} failed)' if failed else '')
+        )
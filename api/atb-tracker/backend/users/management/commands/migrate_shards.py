@@ -0,0 +1,14 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from atb_tracker.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = 'Apply migrations to the default database and every shard in SHARD_DATABASE_URLS'
+
+    def handle(self, *args, **options):
+        for alias in shard_aliases():
+            self.stdout.write(f'Migrating {alias}')
+            call_command('migrate', database=alias, interactive=False, verbosity=options['verbosity'])
+        self.stdout.write(self.style.SUCCESS(f'Migrated {len(shard_aliases())} databases'))
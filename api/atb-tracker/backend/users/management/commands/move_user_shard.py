@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from atb_tracker.sharding import shard_aliases
+from users.models import Member
+from users.shards import move_user, shard_for
+
+
+class Command(BaseCommand):
+    help = "Move a user's data to another shard with an online copy-and-switch"
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='User to move')
+        parser.add_argument('shard', help='Target database alias')
+        parser.add_argument('--drain-seconds', type=float, default=2.0,
+                            help='Wait after making the user read-only so in-flight writes finish')
+
+    def handle(self, *args, **options):
+        if options['shard'] not in shard_aliases():
+            raise CommandError(f"Unknown shard {options['shard']!r}; configured: {', '.join(shard_aliases())}")
+        try:
+            user = Member.objects.get(email=options['email'])
+        except Member.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        source = shard_for(user.pk)
+        if source == options['shard']:
+            self.stdout.write(f'{user.email} is already on {source}')
+            return
+        copied = move_user(user, options['shard'], options['drain_seconds'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"Moved {user.email} from {source} to {options['shard']} ({copied} rows)"))
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Kept in step with users.directory.SEARCH_TEXT_SQL
+SEARCH_TEXT_SQL = "lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || email)"
+
+
+def fill_member_groups(apps, schema_editor):
+    from users.directory import parse_groups
+    Member = apps.get_model('users', 'Member')
+    MemberGroup = apps.get_model('users', 'MemberGroup')
+    using = schema_editor.connection.alias
+    members = Member.objects.using(using).exclude(groups__isnull=True).exclude(groups='')
+    batch = []
+    for member_id, groups in members.values_list('id', 'groups').iterator(chunk_size=2000):
+        batch.extend(MemberGroup(member_id=member_id, name=name) for name in set(parse_groups(groups)))
+        if len(batch) >= 2000:
+            MemberGroup.objects.using(using).bulk_create(batch)
+            batch = []
+    MemberGroup.objects.using(using).bulk_create(batch)
+
+
+def add_search_index(apps, schema_editor):
+    # SQLite and others fall back to scanning the expression
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX users_member_search_trgm_idx ON users_member USING gin (({SEARCH_TEXT_SQL}) gin_trgm_ops)"
+    )
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS users_member_search_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_usershard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'users_membergroup',
+                'constraints': [models.UniqueConstraint(fields=('name', 'member'), name='users_membergroup_name_member_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_member_groups, migrations.RunPython.noop),
+        migrations.RunPython(add_search_index, remove_search_index),
+    ]
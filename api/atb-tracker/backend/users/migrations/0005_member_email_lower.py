@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:39
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0004_membergroup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='users_member_email_lower_idx'),
+        ),
+    ]
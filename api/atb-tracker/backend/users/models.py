@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.contrib.auth.hashers import make_password, check_password
+from django.db.models.functions import Lower
 
 class MemberManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -25,6 +26,18 @@ class MemberManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
+    def by_email(self, email):
+        """Members whose email is ``email`` ignoring case, looked up through the lower(email) index"""
+        return self.alias(email_lower=Lower('email')).filter(email_lower=email.lower())
+
+    def get_by_email(self, email):
+        """The member signing in as ``email``, in one query; an exact-case match wins over others"""
+        # Emails are unique as typed, so addresses differing only in case can coexist
+        members = list(self.by_email(email))
+        if not members:
+            raise self.model.DoesNotExist(f'No member with email {email}')
+        return next((member for member in members if member.email == email), members[0])
+
 class Member(AbstractUser):
     # Override username field to use email
     username = None
@@ -55,3 +68,52 @@ class Member(AbstractUser):
 
     class Meta:
         db_table = 'users_member'
+        indexes = [
+            # Sign-in matches emails case-insensitively (MemberManager.by_email)
+            models.Index(Lower('email'), name='users_member_email_lower_idx'),
+        ]
+
+
+class MemberGroup(models.Model):
+    """One row per group named in ``Member.groups``, kept in sync on save (see users.directory)"""
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='group_memberships')
+    name = models.CharField(max_length=255)
+
+    def __str__(self):
+        return f"{self.member_id} in {self.name}"
+
+    class Meta:
+        db_table = 'users_membergroup'
+        constraints = [
+            # Also the index behind group lookups
+            models.UniqueConstraint(fields=['name', 'member'], name='users_membergroup_name_member_uniq'),
+        ]
+
+
+class UserShard(models.Model):
+    """Directory entry placing a member's data on one database alias (see atb_tracker.sharding)"""
+    user = models.OneToOneField(Member, on_delete=models.CASCADE, primary_key=True, related_name='shard')
+    alias = models.CharField(max_length=64, db_index=True)
+    # Set while the member's data is being copied to another shard; writes get a 503
+    read_only = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.alias}"
+
+    class Meta:
+        db_table = 'users_usershard'
+
+
+class CalendarFeed(models.Model):
+    """A member's iCalendar subscription, authenticated by a secret URL token (see users.ical)"""
+    user = models.OneToOneField(Member, on_delete=models.CASCADE, primary_key=True, related_name='calendar_feed')
+    # SHA-256 of the token; the token itself is only shown when it is issued
+    token_digest = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Calendar feed of {self.user_id}"
+
+    class Meta:
+        db_table = 'users_calendarfeed'
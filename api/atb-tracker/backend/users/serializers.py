@@ -38,3 +38,16 @@ class MemberSerializer(serializers.ModelSerializer):
         data = super().to_representation(instance)
         data['name'] = self.get_name(instance)
         return data
+
+
+class MemberDirectorySerializer(serializers.ModelSerializer):
+    """Trimmed member representation for the team directory"""
+    name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Member
+        fields = ['id', 'email', 'first_name', 'last_name', 'name', 'picture', 'groups']
+        read_only_fields = fields
+
+    def get_name(self, obj):
+        return f"{obj.first_name} {obj.last_name}".strip()
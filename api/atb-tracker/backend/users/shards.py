@@ -0,0 +1,232 @@
+"""
+Shard directory: placing members on a shard, mirroring their rows and moving them.
+
+``move_user`` is an online copy-and-switch. The member's rows are copied to the
+target while they keep working on the source. Then the member is made read-only
+for a moment while rows changed since the copy started are resynced, the
+directory entry is switched and the source rows are dropped.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+
+from archive.models import ArchiveBatch, DailyRollup
+from atb_tracker.sharding import SHARD_ID_STRIDE, ShardMoving, activate_shard, shard_aliases, sharding_enabled
+from pomodoro.models import PomodoroSession
+from projects.models import Client, Project, Tag, Task, TimeEntry
+from user_settings.models import UserProfile
+
+from .models import Member, UserShard
+
+# Every per-user table, parents before children, with the lookup to the owning member
+SHARDED_MODELS = [
+    (UserProfile, 'user'),
+    (Tag, 'user'),
+    (Client, 'user'),
+    (Project, 'user'),
+    (Project.tags.through, 'project__user'),
+    (Task, 'user'),
+    (TimeEntry, 'user'),
+    (PomodoroSession, 'user'),
+    (ArchiveBatch, 'user'),
+    (DailyRollup, 'user'),
+]
+# Rows are only ever added or removed, so comparing ids finds every change
+APPEND_ONLY = {ArchiveBatch, DailyRollup}
+COPY_CHUNK = 2000
+# updated_at comes from the application servers' clocks
+CLOCK_SKEW = timedelta(minutes=1)
+
+
+def shard_for(user_id):
+    """Alias holding ``user_id``'s data"""
+    if not sharding_enabled():
+        return DEFAULT_DB_ALIAS
+    return UserShard.objects.filter(user_id=user_id).values_list('alias', flat=True).first() or DEFAULT_DB_ALIAS
+
+
+def users_by_shard(user_ids):
+    """Group ``user_ids`` by the alias holding their data"""
+    user_ids = list(user_ids)
+    if not sharding_enabled():
+        return {DEFAULT_DB_ALIAS: user_ids} if user_ids else {}
+    placed = dict(UserShard.objects.filter(user_id__in=user_ids).values_list('user_id', 'alias'))
+    groups = {}
+    for user_id in user_ids:
+        groups.setdefault(placed.get(user_id, DEFAULT_DB_ALIAS), []).append(user_id)
+    return groups
+
+
+def route_request(user, method):
+    """Send the rest of the request's sharded queries to ``user``'s shard"""
+    if not sharding_enabled():
+        return
+    alias, read_only = (
+        UserShard.objects.filter(user_id=user.pk).values_list('alias', 'read_only').first()
+        or (DEFAULT_DB_ALIAS, False)
+    )
+    if read_only and method not in SAFE_METHODS:
+        raise ShardMoving()
+    activate_shard(alias)
+
+
+def place_user(user):
+    """Choose a shard for a new member, mirror their row there and record it"""
+    aliases = shard_aliases()
+    alias = settings.SHARD_PLACEMENT
+    if alias == 'least-loaded':
+        load = dict(UserShard.objects.values_list('alias').annotate(Count('pk')).order_by())
+        load[DEFAULT_DB_ALIAS] = (
+            Member.objects.exclude(pk=user.pk).exclude(shard__alias__in=aliases[1:]).count()
+        )
+        alias = min(aliases, key=lambda name: (load.get(name, 0), aliases.index(name)))
+    if alias not in aliases:
+        raise ImproperlyConfigured(f'SHARD_PLACEMENT names unknown database {alias!r}')
+    if alias != DEFAULT_DB_ALIAS:
+        mirror_member(user, alias)
+    UserShard.objects.update_or_create(user=user, defaults={'alias': alias})
+    return alias
+
+
+def _insert(model, objs, using):
+    # raw=True keeps auto_now/auto_now_add values instead of stamping the copy time
+    fields = model._meta.local_concrete_fields
+    batch_size = max(connections[using].ops.bulk_batch_size(fields, objs), 1)
+    for i in range(0, len(objs), batch_size):
+        model._base_manager._insert(objs[i:i + batch_size], fields=fields, using=using, raw=True)
+
+
+def mirror_member(user, alias):
+    """Create or refresh the copy of ``user``'s row on ``alias``"""
+    values = {
+        field.attname: getattr(user, field.attname)
+        for field in Member._meta.local_concrete_fields if not field.primary_key
+    }
+    if not Member._base_manager.db_manager(alias).filter(pk=user.pk).update(**values):
+        _insert(Member, [user], alias)
+
+
+def _rows(model, lookup, user_id, using):
+    return model._base_manager.db_manager(using).filter(**{f'{lookup}_id': user_id})
+
+
+def _delete_ids(queryset, ids):
+    ids = sorted(ids)
+    for i in range(0, len(ids), COPY_CHUNK):
+        queryset.filter(pk__in=ids[i:i + COPY_CHUNK])._raw_delete(queryset.db)
+
+
+def _copy(model, lookup, user_id, source, target, ids=None):
+    queryset = _rows(model, lookup, user_id, source).order_by('pk')
+    if ids is None:
+        chunks = [queryset.iterator(chunk_size=COPY_CHUNK)]
+    else:
+        ids = sorted(ids)
+        chunks = [queryset.filter(pk__in=ids[i:i + COPY_CHUNK]) for i in range(0, len(ids), COPY_CHUNK)]
+    copied = 0
+    for chunk in chunks:
+        batch = []
+        for obj in chunk:
+            batch.append(obj)
+            if len(batch) >= COPY_CHUNK:
+                _insert(model, batch, target)
+                copied += len(batch)
+                batch = []
+        _insert(model, batch, target)
+        copied += len(batch)
+    return copied
+
+
+def _resync(model, lookup, user_id, source, target, since):
+    """Make ``target`` match ``source`` for rows changed since ``since``; returns rows touched"""
+    source_rows = _rows(model, lookup, user_id, source)
+    target_rows = _rows(model, lookup, user_id, target)
+    source_ids = set(source_rows.values_list('pk', flat=True))
+    target_ids = set(target_rows.values_list('pk', flat=True))
+    changed = source_ids - target_ids
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        changed |= set(source_rows.filter(updated_at__gte=since).values_list('pk', flat=True))
+    elif model not in APPEND_ONLY:
+        # No change tracking; these tables are small per user
+        changed = source_ids
+    removed = target_ids - source_ids
+    _delete_ids(target_rows, removed | (changed & target_ids))
+    _copy(model, lookup, user_id, source, target, ids=changed)
+    return len(changed) + len(removed)
+
+
+def purge_user(user_id, alias):
+    """Delete ``user_id``'s per-user rows, and their mirrored member row, from ``alias``"""
+    with transaction.atomic(using=alias):
+        for model, lookup in reversed(SHARDED_MODELS):
+            _rows(model, lookup, user_id, alias)._raw_delete(alias)
+        if alias != DEFAULT_DB_ALIAS:
+            Member._base_manager.db_manager(alias).filter(pk=user_id)._raw_delete(alias)
+
+
+def reserve_id_ranges(alias, models=None):
+    """Make ``alias`` hand out ids from its own block so rows never collide when moved"""
+    floor = shard_aliases().index(alias) * SHARD_ID_STRIDE
+    if not floor:
+        return
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        for model in models or [model for model, _ in SHARDED_MODELS]:
+            table = model._meta.db_table
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+                sequence = cursor.fetchone()[0]
+                if sequence:
+                    cursor.execute(
+                        f"SELECT setval(%s, GREATEST((SELECT last_value FROM {sequence}), %s))", [sequence, floor]
+                    )
+            elif connection.vendor == 'sqlite':
+                cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = %s", [floor, table])
+                if not cursor.rowcount:
+                    cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, floor])
+
+
+def move_user(user, target, drain_seconds=2.0, log=None):
+    """Move ``user``'s data to the ``target`` alias; returns the number of rows copied"""
+    log = log or (lambda message: None)
+    if target not in shard_aliases():
+        raise ValueError(f'Unknown shard {target!r}')
+    source = shard_for(user.pk)
+    if source == target:
+        return 0
+    reserve_id_ranges(target)
+
+    # Bulk copy while the member keeps reading and writing on the source
+    copy_started = timezone.now() - CLOCK_SKEW
+    with transaction.atomic(using=target):
+        if target != DEFAULT_DB_ALIAS:
+            mirror_member(user, target)
+        # Leftovers of an earlier, interrupted move
+        for model, lookup in reversed(SHARDED_MODELS):
+            _rows(model, lookup, user.pk, target)._raw_delete(target)
+        copied = sum(_copy(model, lookup, user.pk, source, target) for model, lookup in SHARDED_MODELS)
+    log(f'{user.email}: copied {copied} rows from {source} to {target}')
+
+    UserShard.objects.update_or_create(user=user, defaults={'alias': source, 'read_only': True})
+    try:
+        # Requests that passed the read-only check before it was set finish their writes
+        time.sleep(drain_seconds)
+        with transaction.atomic(using=target):
+            synced = sum(
+                _resync(model, lookup, user.pk, source, target, copy_started) for model, lookup in SHARDED_MODELS
+            )
+        UserShard.objects.filter(user=user).update(alias=target, read_only=False, updated_at=timezone.now())
+    except BaseException:
+        UserShard.objects.filter(user=user).update(read_only=False)
+        raise
+    log(f'{user.email}: resynced {synced} rows and switched to {target}')
+
+    purge_user(user.pk, source)
+    log(f'{user.email}: removed the rows left on {source}')
+    return copied
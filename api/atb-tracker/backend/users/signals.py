@@ -0,0 +1,102 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from atb_tracker.cache import invalidate_user_cache
+from atb_tracker.sharding import sharding_enabled
+from pomodoro.models import PomodoroSession
+from projects.models import Client, Project, Tag, Task, TimeEntry
+from user_settings.models import UserProfile
+from .context import CACHE_NAMESPACE as USER_CONTEXT_CACHE_NAMESPACE
+from .dashboard import CACHE_NAMESPACE as DASHBOARD_CACHE_NAMESPACE
+from .ical import DAY_CACHE_NAMESPACE as CALENDAR_DAY_CACHE_NAMESPACE
+from .ical import FEED_CACHE_NAMESPACE as CALENDAR_FEED_CACHE_NAMESPACE
+from .directory import sync_member_groups
+from .models import Member
+from .shards import mirror_member, place_user, purge_user, shard_for
+
+
+@receiver(post_save, sender=Member)
+def place_or_mirror_member(sender, instance, created, raw, using, **kwargs):
+    if raw or using != DEFAULT_DB_ALIAS or not sharding_enabled():
+        return
+    if created:
+        place_user(instance)
+        return
+    alias = shard_for(instance.pk)
+    if alias != DEFAULT_DB_ALIAS:
+        mirror_member(instance, alias)
+
+
+@receiver(post_save, sender=Member)
+def sync_groups(sender, instance, raw, using, update_fields=None, **kwargs):
+    if raw or using != DEFAULT_DB_ALIAS:
+        return
+    if update_fields is None or 'groups' in update_fields:
+        sync_member_groups(instance, using)
+
+
+@receiver(pre_delete, sender=Member)
+def remember_member_shard(sender, instance, using, **kwargs):
+    # The directory row is cascaded away before post_delete runs
+    if using == DEFAULT_DB_ALIAS and sharding_enabled():
+        instance._shard_alias = shard_for(instance.pk)
+
+
+@receiver(post_delete, sender=Member)
+def purge_member_shard(sender, instance, using, **kwargs):
+    alias = getattr(instance, '_shard_alias', DEFAULT_DB_ALIAS)
+    if alias != DEFAULT_DB_ALIAS:
+        purge_user(instance.pk, alias)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=TimeEntry)
+@receiver(post_delete, sender=TimeEntry)
+@receiver(post_save, sender=PomodoroSession)
+@receiver(post_delete, sender=PomodoroSession)
+def invalidate_dashboard(sender, instance, **kwargs):
+    invalidate_user_cache(DASHBOARD_CACHE_NAMESPACE, instance.user_id)
+
+
+@receiver(m2m_changed, sender=Project.tags.through)
+def invalidate_retagged_dashboard(sender, instance, action, **kwargs):
+    # The dashboard lists projects with their tags; both sides of the relation belong to one member
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_user_cache(DASHBOARD_CACHE_NAMESPACE, instance.user_id)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def invalidate_member_context(sender, instance, **kwargs):
+    invalidate_user_cache(USER_CONTEXT_CACHE_NAMESPACE, instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_context(sender, instance, **kwargs):
+    invalidate_user_cache(USER_CONTEXT_CACHE_NAMESPACE, instance.user_id)
+
+
+@receiver(post_save, sender=TimeEntry)
+@receiver(post_delete, sender=TimeEntry)
+@receiver(post_save, sender=PomodoroSession)
+@receiver(post_delete, sender=PomodoroSession)
+def invalidate_calendar_feed(sender, instance, **kwargs):
+    # Changed days are found by their fingerprints; only the feed version has to move
+    invalidate_user_cache(CALENDAR_FEED_CACHE_NAMESPACE, instance.user_id)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_calendar_days(sender, instance, **kwargs):
+    # Event titles carry the project name, which no entry fingerprint notices
+    invalidate_user_cache(CALENDAR_FEED_CACHE_NAMESPACE, instance.user_id)
+    invalidate_user_cache(CALENDAR_DAY_CACHE_NAMESPACE, instance.user_id)
@@ -0,0 +1,27 @@
+from jobs.chunking import delete_in_chunks
+from jobs.registry import job_handler
+
+from .models import Member
+from .shards import SHARDED_MODELS
+
+DELETE_BATCH = 1000
+
+
+@job_handler('users.delete_account', priority=10)
+def delete_account(job, user_id):
+    """Delete a member's data table by table in short transactions, then the member"""
+    querysets = [
+        (model._meta.verbose_name_plural, model._base_manager.filter(**{f'{lookup}_id': user_id}))
+        for model, lookup in reversed(SHARDED_MODELS)
+    ]
+    total = sum(queryset.count() for _, queryset in querysets)
+    done = 0
+    job.set_progress(done, total + 1, 'Deleting data')
+    for label, queryset in querysets:
+        deleted = delete_in_chunks(
+            queryset, DELETE_BATCH, progress=lambda count: job.set_progress(done + count, message=f'Deleting {label}')
+        )
+        done += deleted
+    Member.objects.filter(pk=user_id).delete()
+    job.set_progress(total + 1, message='Account deleted')
+    return {'deleted_rows': done}
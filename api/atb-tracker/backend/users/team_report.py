@@ -0,0 +1,202 @@
+"""
+Team utilization report.
+
+Each member's free-form ``work_hours`` is parsed into a daily capacity on working
+days (Monday to Friday) and compared with logged time entry minutes. Minutes are
+fetched with one grouped query, plus one over archived daily rollups, and the
+per-day, per-week, per-member and per-group figures are computed with NumPy
+array operations. With sharding, both queries run once per shard holding members.
+"""
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q, Sum
+
+from archive.reads import archived_time_rollups
+from atb_tracker.lazy import lazy_module
+from atb_tracker.sharding import use_shard
+from projects.models import TimeEntry
+from .directory import caller_groups, group_member_ids, parse_groups
+from .shards import users_by_shard
+
+np = lazy_module('numpy')
+
+WORKDAYS_PER_WEEK = 5
+
+_RANGE = re.compile(r'(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*(?:-|to)\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?')
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+def _clock_minutes(hour, minute, meridiem):
+    hour = int(hour) % 24
+    if meridiem == 'pm' and hour < 12:
+        hour += 12
+    elif meridiem == 'am' and hour == 12:
+        hour = 0
+    return hour * 60 + int(minute or 0)
+
+
+def daily_capacity_minutes(work_hours):
+    """
+    Parse ``Member.work_hours`` into capacity minutes per working day.
+
+    Understands clock ranges ("9:00-17:30", "9am to 5pm"), daily hours ("8", "7.5h/day")
+    and weekly hours ("40", "32 hours/week"). Values above 24 are treated as weekly.
+    Anything else gets ``TEAM_DEFAULT_DAILY_HOURS``.
+    """
+    default = int(settings.TEAM_DEFAULT_DAILY_HOURS * 60)
+    if not work_hours:
+        return default
+    text = work_hours.lower()
+
+    match = _RANGE.search(text)
+    if match:
+        start = _clock_minutes(match.group(1), match.group(2), match.group(3))
+        end = _clock_minutes(match.group(4), match.group(5), match.group(6))
+        if end <= start:
+            end += 24 * 60
+        return end - start
+
+    match = _NUMBER.search(text)
+    if match:
+        hours = float(match.group())
+        if 'week' in text or 'wk' in text or hours > 24:
+            hours /= WORKDAYS_PER_WEEK
+        return int(round(hours * 60))
+    return default
+
+
+def team_members(user, group=None):
+    """Active members sharing at least one of ``user``'s groups (optionally a single one), including ``user``"""
+    names = caller_groups(user, group)
+    if not names:
+        return [user]
+    return list(user.__class__.objects.filter(pk__in=group_member_ids(names), is_active=True).only(
+        'id', 'email', 'first_name', 'last_name', 'groups', 'work_hours'
+    ).order_by('id'))
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), 0.0)
+    return np.round(ratio, 4)
+
+
+def utilization_report(members, start, end):
+    """Build the utilization report for ``members`` over the inclusive date range"""
+    n_days = (end - start).days + 1
+    index = {member.id: i for i, member in enumerate(members)}
+
+    rows = []
+    for alias, user_ids in users_by_shard(index).items():
+        with use_shard(alias):
+            rows += (
+                TimeEntry.objects
+                .filter(user_id__in=user_ids, date__gte=start, date__lte=end)
+                .values_list('user_id', 'date')
+                .annotate(minutes=Sum('duration'), billable=Sum('duration', filter=Q(billable=True)))
+                .order_by()
+            )
+            rows += archived_time_rollups(user_ids, start, end)
+    user_ids, dates, minutes_col, billable_col = zip(*rows) if rows else ((), (), (), ())
+
+    minutes = np.zeros((len(members), n_days))
+    billable = np.zeros((len(members), n_days))
+    if user_ids:
+        member_idx = np.fromiter((index[user_id] for user_id in user_ids), dtype=np.int64, count=len(user_ids))
+        day_idx = np.fromiter(((day - start).days for day in dates), dtype=np.int64, count=len(dates))
+        np.add.at(minutes, (member_idx, day_idx), np.asarray(minutes_col, dtype=float))
+        np.add.at(billable, (member_idx, day_idx), np.asarray([b or 0 for b in billable_col], dtype=float))
+
+    offsets = np.arange(n_days)
+    workday = ((start.weekday() + offsets) % 7) < WORKDAYS_PER_WEEK
+    daily_capacity = np.fromiter(
+        (daily_capacity_minutes(member.work_hours) for member in members), dtype=float, count=len(members)
+    )
+    capacity = daily_capacity[:, None] * workday[None, :]
+
+    # Weeks start on Monday; the first and last weeks may be partial
+    week_idx = (offsets + start.weekday()) // 7
+    n_weeks = int(week_idx[-1]) + 1
+    week_matrix = np.zeros((n_days, n_weeks))
+    week_matrix[offsets, week_idx] = 1
+    weekly_minutes = minutes @ week_matrix
+    weekly_capacity = capacity @ week_matrix
+    weekly_overtime = np.maximum(weekly_minutes - weekly_capacity, 0)
+    week_starts = [start - timedelta(days=start.weekday()) + timedelta(weeks=w) for w in range(n_weeks)]
+
+    logged = minutes.sum(axis=1)
+    billable_total = billable.sum(axis=1)
+    capacity_total = capacity.sum(axis=1)
+    daily_overtime = np.maximum(minutes - capacity, 0).sum(axis=1)
+    utilization = _ratio(logged, capacity_total)
+    billable_ratio = _ratio(billable_total, logged)
+
+    member_rows = []
+    for i, member in enumerate(members):
+        member_rows.append({
+            'id': member.id,
+            'name': f"{member.first_name} {member.last_name}".strip() or member.email,
+            'groups': parse_groups(member.groups),
+            'daily_capacity_minutes': int(daily_capacity[i]),
+            'capacity_minutes': int(capacity_total[i]),
+            'logged_minutes': int(logged[i]),
+            'billable_minutes': int(billable_total[i]),
+            'utilization': float(utilization[i]),
+            'billable_ratio': float(billable_ratio[i]),
+            'daily_overtime_minutes': int(daily_overtime[i]),
+            'weekly_overtime_minutes': int(weekly_overtime[i].sum()),
+            'weeks': [
+                {
+                    'week_start': week_starts[w].isoformat(),
+                    'logged_minutes': int(weekly_minutes[i, w]),
+                    'capacity_minutes': int(weekly_capacity[i, w]),
+                    'overtime_minutes': int(weekly_overtime[i, w]),
+                }
+                for w in range(n_weeks)
+            ],
+        })
+
+    group_names = sorted({name for member in members for name in parse_groups(member.groups)})
+    group_rows = []
+    if group_names:
+        group_index = {name: k for k, name in enumerate(group_names)}
+        membership = np.zeros((len(members), len(group_names)))
+        for i, member in enumerate(members):
+            for name in parse_groups(member.groups):
+                membership[i, group_index[name]] = 1
+        group_logged = membership.T @ logged
+        group_billable = membership.T @ billable_total
+        group_capacity = membership.T @ capacity_total
+        group_overtime = membership.T @ daily_overtime
+        group_utilization = _ratio(group_logged, group_capacity)
+        group_billable_ratio = _ratio(group_billable, group_logged)
+        for k, name in enumerate(group_names):
+            group_rows.append({
+                'name': name,
+                'members': int(membership[:, k].sum()),
+                'capacity_minutes': int(group_capacity[k]),
+                'logged_minutes': int(group_logged[k]),
+                'billable_minutes': int(group_billable[k]),
+                'utilization': float(group_utilization[k]),
+                'billable_ratio': float(group_billable_ratio[k]),
+                'daily_overtime_minutes': int(group_overtime[k]),
+            })
+
+    team_minutes = minutes.sum(axis=0)
+    team_capacity = capacity.sum(axis=0)
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'members': member_rows,
+        'groups': group_rows,
+        'days': [
+            {
+                'date': (start + timedelta(days=d)).isoformat(),
+                'logged_minutes': int(team_minutes[d]),
+                'capacity_minutes': int(team_capacity[d]),
+            }
+            for d in range(n_days)
+        ],
+    }
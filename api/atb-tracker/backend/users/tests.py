@@ -1,3 +1,518 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
+from unittest import skipUnless
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from atb_tracker.sharding import SHARD_ID_STRIDE, ShardRouter, current_shard, use_shard
+from projects.models import Project, Tag, TimeEntry
+from user_settings.models import UserProfile
+
+from .context import get_user_context
+from .models import Member, UserShard
+from .shards import _copy, _resync, mirror_member, move_user, place_user, shard_for
+from .utils import get_tokens_for_user
+
+SHARD = settings.SHARD_DATABASES[0] if settings.SHARD_DATABASES else None
+
+
+@skipUnless(SHARD, 'Set SHARD_DATABASE_URLS, e.g. "shard1=sqlite:////tmp/shard1.db", to test sharding')
+@override_settings(SHARD_PLACEMENT=DEFAULT_DB_ALIAS)
+class ShardingTests(TestCase):
+    """Per-user rows live on the member's shard; move_user copies, resyncs, switches and purges them"""
+
+    databases = '__all__'
+    url = '/api/projects/time-entries/'
+
+    def setUp(self):
+        # Throttle buckets and per-user cached reads outlive each test's transaction
+        cache.clear()
+        self.user = Member.objects.create_user('sharded@example.com', 'sharded-password', first_name='Shard')
+
+    def api(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(user)['access'])
+        return client
+
+    def add_entries(self, alias, count=3):
+        project = Project.objects.using(alias).create(name='Sharded', user=self.user)
+        for day in range(1, count + 1):
+            TimeEntry.objects.using(alias).create(
+                project=project, description=f'Entry {day}', date=date(2026, 3, day),
+                start_time=time(9, 0), end_time=time(10, 0), duration=60, user=self.user,
+            )
+        return project
+
+    def entry_ids(self, alias):
+        return set(TimeEntry.objects.using(alias).filter(user=self.user).values_list('pk', flat=True))
+
+    def test_router_sends_sharded_apps_to_active_shard(self):
+        router = ShardRouter()
+        self.assertIsNone(router.db_for_read(TimeEntry))
+        with use_shard(SHARD):
+            self.assertEqual(router.db_for_read(TimeEntry), SHARD)
+            self.assertEqual(router.db_for_write(Project), SHARD)
+            self.assertEqual(router.db_for_write(Member), DEFAULT_DB_ALIAS)
+            self.assertEqual(router.db_for_read(UserShard), DEFAULT_DB_ALIAS)
+        self.assertIsNone(current_shard())
+
+    def test_router_keeps_directory_off_shards(self):
+        router = ShardRouter()
+        self.assertFalse(router.allow_migrate(SHARD, 'users', model_name='usershard'))
+        self.assertTrue(router.allow_migrate(SHARD, 'users', model_name='member'))
+        self.assertTrue(router.allow_migrate(SHARD, 'projects', model_name='timeentry'))
+        self.assertFalse(router.allow_migrate(SHARD, 'admin', model_name='logentry'))
+
+    def test_new_member_is_placed_and_mirrored(self):
+        with self.settings(SHARD_PLACEMENT=SHARD):
+            user = Member.objects.create_user('placed@example.com', 'placed-password', first_name='Placed')
+        self.assertEqual(shard_for(user.pk), SHARD)
+        self.assertEqual(Member.objects.using(SHARD).get(pk=user.pk).email, 'placed@example.com')
+        user.first_name = 'Renamed'
+        user.save()
+        self.assertEqual(Member.objects.using(SHARD).get(pk=user.pk).first_name, 'Renamed')
+
+    def test_least_loaded_placement(self):
+        # self.user sits on default, so the empty shard is the least loaded
+        with self.settings(SHARD_PLACEMENT='least-loaded'):
+            user = Member.objects.create_user('balanced@example.com', 'balanced-password', first_name='Even')
+        self.assertEqual(shard_for(user.pk), SHARD)
+        with self.settings(SHARD_PLACEMENT='least-loaded'):
+            self.assertEqual(place_user(Member.objects.create(email='third@example.com')), DEFAULT_DB_ALIAS)
+
+    def test_requests_write_to_members_shard(self):
+        with self.settings(SHARD_PLACEMENT=SHARD):
+            user = Member.objects.create_user('writer@example.com', 'writer-password', first_name='Writer')
+        project = Project.objects.using(SHARD).create(name='Remote', user=user)
+        response = self.api(user).post(self.url, {
+            'project': project.pk, 'description': 'On the shard', 'date': '2026-03-02',
+            'start_time': '09:00', 'end_time': '10:00', 'duration': 60,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(TimeEntry.objects.using(SHARD).filter(pk=response.json()['id']).exists())
+        self.assertFalse(TimeEntry.objects.using(DEFAULT_DB_ALIAS).filter(user=user).exists())
+
+    def test_move_copies_switches_and_purges(self):
+        project = self.add_entries(DEFAULT_DB_ALIAS)
+        ids = self.entry_ids(DEFAULT_DB_ALIAS)
+
+        copied = move_user(self.user, SHARD, drain_seconds=0)
+
+        self.assertEqual(copied, 1 + len(ids))
+        self.assertEqual(UserShard.objects.get(user=self.user).alias, SHARD)
+        self.assertFalse(UserShard.objects.get(user=self.user).read_only)
+        self.assertEqual(self.entry_ids(SHARD), ids)
+        self.assertTrue(Project.objects.using(SHARD).filter(pk=project.pk).exists())
+        self.assertFalse(self.entry_ids(DEFAULT_DB_ALIAS))
+        self.assertFalse(Project.objects.using(DEFAULT_DB_ALIAS).filter(user=self.user).exists())
+
+    def test_moved_rows_are_read_through_new_shard(self):
+        self.add_entries(DEFAULT_DB_ALIAS)
+        move_user(self.user, SHARD, drain_seconds=0)
+        TimeEntry.objects.using(SHARD).filter(user=self.user, description='Entry 1').update(description='Moved')
+
+        response = self.api(self.user).get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(row['description'] for row in response.json()), ['Entry 2', 'Entry 3', 'Moved']
+        )
+
+    def test_move_back_keeps_ids(self):
+        self.add_entries(DEFAULT_DB_ALIAS)
+        move_user(self.user, SHARD, drain_seconds=0)
+        with use_shard(SHARD):
+            project = Project.objects.get(user=self.user)
+            added = TimeEntry.objects.create(
+                project=project, description='Added on shard', date=date(2026, 3, 9),
+                start_time=time(9, 0), end_time=time(10, 0), duration=60, user=self.user,
+            )
+        self.assertGreaterEqual(added.pk, SHARD_ID_STRIDE)
+        ids = self.entry_ids(SHARD)
+
+        move_user(self.user, DEFAULT_DB_ALIAS, drain_seconds=0)
+
+        self.assertEqual(shard_for(self.user.pk), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.entry_ids(DEFAULT_DB_ALIAS), ids)
+        self.assertFalse(self.entry_ids(SHARD))
+        self.assertFalse(Member.objects.using(SHARD).filter(pk=self.user.pk).exists())
+
+    def test_resync_applies_changes_made_during_copy(self):
+        project = self.add_entries(DEFAULT_DB_ALIAS)
+        since = timezone.now() - timedelta(minutes=1)
+        mirror_member(self.user, SHARD)
+        _copy(Project, 'user', self.user.pk, DEFAULT_DB_ALIAS, SHARD)
+        _copy(TimeEntry, 'user', self.user.pk, DEFAULT_DB_ALIAS, SHARD)
+        first, second, _ = TimeEntry.objects.filter(user=self.user).order_by('pk')
+        first.description = 'Edited during copy'
+        first.save()
+        second.delete()
+        added = TimeEntry.objects.create(
+            project=project, description='Added during copy', date=date(2026, 3, 9),
+            start_time=time(9, 0), end_time=time(10, 0), duration=60, user=self.user,
+        )
+
+        _resync(TimeEntry, 'user', self.user.pk, DEFAULT_DB_ALIAS, SHARD, since)
+
+        self.assertEqual(self.entry_ids(SHARD), self.entry_ids(DEFAULT_DB_ALIAS))
+        self.assertIn(added.pk, self.entry_ids(SHARD))
+        self.assertEqual(TimeEntry.objects.using(SHARD).get(pk=first.pk).description, 'Edited during copy')
+
+    def test_writes_are_refused_while_moving(self):
+        UserShard.objects.filter(user=self.user).update(read_only=True)
+        client = self.api(self.user)
+        self.assertEqual(client.get(self.url).status_code, 200)
+        response = client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+
+    def test_deleting_member_purges_shard(self):
+        with self.settings(SHARD_PLACEMENT=SHARD):
+            user = Member.objects.create_user('leaving@example.com', 'leaving-password', first_name='Leaving')
+        Project.objects.using(SHARD).create(name='Remote', user=user)
+        user.delete()
+        self.assertFalse(Project.objects.using(SHARD).filter(user_id=user.pk).exists())
+        self.assertFalse(Member.objects.using(SHARD).filter(pk=user.pk).exists())
+
+
+class UserContextTests(TestCase):
+    """The cached user context is rebuilt after the member or their profile is saved"""
+
+    url = '/api/user-settings/profile/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('context@example.com', 'context-password', first_name='Context')
+        cls.profile = UserProfile.objects.create(user=cls.user, timezone='UTC', job_title='Engineer')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def test_context_is_cached(self):
+        self.assertEqual(get_user_context(self.user).profile['job_title'], 'Engineer')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_context(self.user).timezone_name, 'UTC')
+
+    def test_profile_save_invalidates(self):
+        get_user_context(self.user)
+        self.profile.timezone = 'Europe/Berlin'
+        self.profile.save()
+        context = get_user_context(self.user)
+        self.assertEqual(context.tz, ZoneInfo('Europe/Berlin'))
+
+    def test_member_save_invalidates(self):
+        version = get_user_context(self.user).version
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        context = get_user_context(self.user)
+        self.assertEqual(context.profile['first_name'], 'Renamed')
+        self.assertNotEqual(context.version, version)
+
+    def test_profile_endpoint_serves_the_update(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.patch(self.url, {'job_title': 'Lead', 'first_name': 'Promoted'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['job_title'], response.json()['first_name']), ('Lead', 'Promoted'))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+class LoginTests(TestCase):
+    """POST /api/users/login/ finds the member by email ignoring case, in one query"""
+
+    url = '/api/users/login/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('Mixed.Case@Example.com', 'login-password', first_name='Mixed')
+        cls.twin = Member.objects.create_user('mixed.case@example.com', 'twin-password', first_name='Twin')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, email, password):
+        return self.client.post(self.url, {'email': email, 'password': password}, format='json')
+
+    def test_email_case_is_ignored(self):
+        Member.objects.filter(pk=self.twin.pk).delete()
+        for email in ('mixed.case@example.com', 'MIXED.CASE@EXAMPLE.COM'):
+            response = self.login(email, 'login-password')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['user']['email'], 'Mixed.Case@example.com')
+
+    def test_exact_case_wins(self):
+        self.assertEqual(self.login('Mixed.Case@example.com', 'login-password').json()['user']['first_name'], 'Mixed')
+        self.assertEqual(self.login('mixed.case@example.com', 'twin-password').json()['user']['first_name'], 'Twin')
+
+    def test_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(Member.objects.get_by_email('MIXED.case@example.com').email.lower(),
+                             'mixed.case@example.com')
+        with self.assertRaises(Member.DoesNotExist):
+            Member.objects.get_by_email('nobody@example.com')
+
+    def test_failures(self):
+        self.assertEqual(self.login('mixed.case@example.com', 'wrong-password').status_code, 401)
+        self.assertEqual(self.login('nobody@example.com', 'login-password').status_code, 404)
+
+
+class DirectoryTests(TestCase):
+    """GET /api/users/directory/ pages through the caller's teammates; the full member list is for staff"""
+
+    url = '/api/users/directory/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user(
+            'dir-lead@example.com', 'directory-password', first_name='Lead', groups='Engineering',
+        )
+        for name in ('Ada', 'Brian', 'Cora', 'Dmitri'):
+            Member.objects.create_user(
+                f'dir-{name.lower()}@example.com', 'directory-password', first_name=name, groups='Engineering, Design',
+            )
+        Member.objects.create_user(
+            'dir-gone@example.com', 'directory-password', first_name='Gone', groups='Engineering', is_active=False,
+        )
+        Member.objects.create_user('dir-sales@example.com', 'directory-password', first_name='Sales', groups='Sales')
+        cls.staff = Member.objects.create_user('dir-staff@example.com', 'directory-password', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def test_cursor_pages_cover_teammates_once(self):
+        emails, url, pages = [], self.url + '?page_size=2', 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data['results']), 2)
+            emails += [member['email'] for member in data['results']]
+            url, pages = data['next'], pages + 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(emails, [
+            'dir-ada@example.com', 'dir-brian@example.com', 'dir-cora@example.com', 'dir-dmitri@example.com',
+            'dir-lead@example.com',
+        ])
+
+    def test_search_and_group(self):
+        results = self.client.get(self.url + '?search=cor').json()['results']
+        self.assertEqual([(member['email'], member['name']) for member in results], [('dir-cora@example.com', 'Cora')])
+        # Only the caller's own groups can be listed
+        results = self.client.get(self.url + '?group=Design').json()['results']
+        self.assertEqual([member['email'] for member in results], ['dir-lead@example.com'])
+
+    def test_member_list_is_for_staff(self):
+        self.assertEqual(self.client.get('/api/users/members/').status_code, 403)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.staff)['access'])
+        response = self.client.get('/api/users/members/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), Member.objects.count())
+
+
+class TeamReportTests(TestCase):
+    """GET /api/users/team-report/ compares logged minutes with the capacity of the caller's active teammates"""
+
+    url = '/api/users/team-report/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user(
+            'lead@example.com', 'team-password', first_name='Lead', groups='Engineering', work_hours='8',
+        )
+        cls.mate = Member.objects.create_user(
+            'mate@example.com', 'team-password', first_name='Mate', groups='Engineering, Design', work_hours='9am-1pm',
+        )
+        cls.former = Member.objects.create_user(
+            'former@example.com', 'team-password', first_name='Former', groups='Engineering', is_active=False,
+        )
+        Member.objects.create_user('outsider@example.com', 'team-password', first_name='Out', groups='Sales')
+        project = Project.objects.create(name='Team', user=cls.user)
+        # Monday 2026-03-02
+        for user, minutes, billable in ((cls.user, 240, True), (cls.mate, 300, False), (cls.former, 60, True)):
+            TimeEntry.objects.create(
+                project=project, description='Team', date=date(2026, 3, 2), start_time=time(9, 0),
+                end_time=time(9, 0), duration=minutes, billable=billable, user=user,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def test_report_covers_active_teammates(self):
+        response = self.client.get(self.url + '?start=2026-03-02&end=2026-03-08')
+        self.assertEqual(response.status_code, 200)
+        members = {row['name']: row for row in response.json()['members']}
+        self.assertEqual(set(members), {'Lead', 'Mate'})
+        self.assertEqual(members['Lead']['capacity_minutes'], 5 * 480)
+        self.assertEqual(members['Lead']['logged_minutes'], 240)
+        self.assertEqual(members['Lead']['billable_ratio'], 1.0)
+        self.assertEqual(members['Mate']['daily_overtime_minutes'], 60)
+        self.assertEqual(members['Mate']['utilization'], 0.25)
+        groups = {row['name']: row for row in response.json()['groups']}
+        self.assertEqual(groups['Engineering']['members'], 2)
+        self.assertEqual(groups['Engineering']['logged_minutes'], 540)
+        self.assertEqual(groups['Design']['members'], 1)
+
+    def test_group_filter(self):
+        response = self.client.get(self.url + '?start=2026-03-02&end=2026-03-02&group=Sales')
+        self.assertEqual([row['name'] for row in response.json()['members']], ['Lead'])
+
+    def test_default_range_ends_today_in_profile_timezone(self):
+        # A zone whose date differs from UTC's right now
+        zone = 'Pacific/Kiritimati' if timezone.now().hour >= 10 else 'Pacific/Pago_Pago'
+        UserProfile.objects.update_or_create(user=self.user, defaults={'timezone': zone})
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        today = timezone.localdate(timezone=ZoneInfo(zone))
+        self.assertEqual(response.json()['end'], today.isoformat())
+        self.assertEqual(response.json()['start'], (today - timedelta(days=27)).isoformat())
+
+    def test_bad_ranges_are_refused(self):
+        for query in ('?end=2026-13-01', '?start=2026-03-09&end=2026-03-02', '?start=2025-01-01&end=2026-03-02'):
+            self.assertEqual(self.client.get(self.url + query).status_code, 400)
+
+
+class CalendarFeedTests(TestCase):
+    """The ICS subscription URL revalidates with 304 until the feed changes and stops working once replaced"""
+
+    url = '/api/users/calendar-feed/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('calendar@example.com', 'calendar-password', first_name='Cal')
+        cls.project = Project.objects.create(name='Calendar', user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+        self.add_entry('Standup')
+
+    def add_entry(self, description):
+        return TimeEntry.objects.create(
+            project=self.project, description=description, date=timezone.localdate() - timedelta(days=1),
+            start_time=time(9, 0), end_time=time(9, 30), duration=30, user=self.user,
+        )
+
+    def issue(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 201)
+        return urlsplit(response.json()['url']).path
+
+    def test_feed_revalidates_until_written(self):
+        feed = self.issue()
+        # Subscribers are not logged in
+        subscriber = APIClient()
+        response = subscriber.get(feed)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/calendar'))
+        self.assertIn('Standup', response.content.decode())
+
+        etag = response['ETag']
+        repeat = subscriber.get(feed, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(subscriber.get(feed, HTTP_IF_NONE_MATCH='W/' + etag).status_code, 304)
+
+        self.add_entry('Retro')
+        response = subscriber.get(feed, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Retro', response.content.decode())
+
+    def test_rotated_token_is_refused(self):
+        old = self.issue()
+        new = self.issue()
+        self.assertEqual(APIClient().get(old).status_code, 404)
+        self.assertEqual(APIClient().get(new).status_code, 200)
+        self.assertTrue(self.client.get(self.url).json()['active'])
+
+        self.assertEqual(self.client.delete(self.url).status_code, 204)
+        self.assertEqual(APIClient().get(new).status_code, 404)
+        self.assertFalse(self.client.get(self.url).json()['active'])
+
+
+class DashboardTests(TestCase):
+    """GET /api/users/dashboard/ is cached per user until one of the tables it reads is written"""
+
+    url = '/api/users/dashboard/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Member.objects.create_user('dashboard@example.com', 'dashboard-password', first_name='Dash')
+        cls.project = Project.objects.create(name='Dashboard', user=cls.user)
+        Project.objects.create(name='Done', status='Completed', user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(self.user)['access'])
+
+    def dashboard(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def add_entry(self, minutes=30):
+        return TimeEntry.objects.create(
+            project=self.project, description='Today', date=timezone.localdate(), start_time=time(0, 0),
+            end_time=time(0, 0), duration=minutes, user=self.user,
+        )
+
+    def test_payload(self):
+        self.add_entry()
+        data = self.dashboard()
+        self.assertEqual([project['name'] for project in data['projects']], ['Dashboard', 'Done'])
+        self.assertEqual(data['completed'], {'tasks': 0, 'projects': 1})
+        self.assertEqual(data['totals']['today']['minutes'], 30)
+        self.assertEqual(len(data['time_entries']), 1)
+
+    def test_cached_until_written(self):
+        self.dashboard()
+        # Writes that bypass the model signals are not seen until the cache expires
+        Project.objects.filter(pk=self.project.pk).update(name='Renamed quietly')
+        self.assertEqual(self.dashboard()['projects'][0]['name'], 'Dashboard')
+
+    def test_entry_write_invalidates(self):
+        self.assertEqual(self.dashboard()['totals']['today']['minutes'], 0)
+        entry = self.add_entry(45)
+        self.assertEqual(self.dashboard()['totals']['today']['minutes'], 45)
+        entry.delete()
+        self.assertEqual(self.dashboard()['totals']['today']['entries'], 0)
+
+    def test_api_writes_invalidate(self):
+        self.dashboard()
+        response = self.client.post('/api/projects/time-entries/', [
+            {'project': self.project.pk, 'description': 'Bulk', 'date': timezone.localdate().isoformat(),
+             'start_time': '01:00', 'end_time': '02:00', 'duration': 60},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.dashboard()['totals']['today']['minutes'], 60)
+
+    def test_tag_change_invalidates(self):
+        tag = Tag.objects.create(name='before', user=self.user)
+        self.project.tags.add(tag)
+        self.assertEqual(self.dashboard()['projects'][0]['tags'][0]['name'], 'before')
+        tag.name = 'after'
+        tag.save()
+        self.assertEqual(self.dashboard()['projects'][0]['tags'][0]['name'], 'after')
+
+    def test_other_members_writes_keep_the_cache(self):
+        self.dashboard()
+        other = Member.objects.create_user('dashboard-other@example.com', 'dashboard-password', first_name='Other')
+        Project.objects.create(name='Not mine', user=other)
+        Project.objects.filter(pk=self.project.pk).update(name='Renamed quietly')
+        self.assertEqual(self.dashboard()['projects'][0]['name'], 'Dashboard')
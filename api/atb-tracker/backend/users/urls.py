@@ -1,10 +1,16 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
-from .views import MemberListCreateView, LoginView, UserProfileView
+from .views import (MemberListCreateView, LoginView, UserProfileView, DashboardView, MemberDirectoryView, TeamReportView,
+                    CalendarFeedView, CalendarFeedICSView)
 
 urlpatterns = [
     path('members/', MemberListCreateView.as_view(), name='member-list-create'),
     path('login/', LoginView.as_view(), name='login'),
     path('profile/', UserProfileView.as_view(), name='user-profile'),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('directory/', MemberDirectoryView.as_view(), name='member-directory'),
+    path('team-report/', TeamReportView.as_view(), name='team-report'),
+    path('calendar-feed/', CalendarFeedView.as_view(), name='calendar-feed'),
+    path('calendar/<str:token>.ics', CalendarFeedICSView.as_view(), name='calendar-feed-ics'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
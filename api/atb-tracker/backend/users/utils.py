@@ -16,12 +16,16 @@ def get_user_from_token(token):
     """Extract user from JWT token"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        user_id = payload.get('user_id')
-        if user_id:
-            return Member.objects.get(id=user_id)
-    except (jwt.InvalidTokenError, Member.DoesNotExist):
+    except jwt.InvalidTokenError:
+        return None
+    return get_user_from_payload(payload)
+
+def get_user_from_payload(payload):
+    """Return the member a decoded JWT payload belongs to, or None"""
+    user_id = payload.get('user_id')
+    if not user_id:
         return None
-    return None
+    return Member.objects.filter(id=user_id).first()
 
 def validate_token(token):
     """Validate JWT token"""
@@ -1,20 +1,44 @@
 from django.shortcuts import render
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from rest_framework import generics, status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
-from .models import Member
-from .serializers import MemberSerializer
+from .models import CalendarFeed, Member
+from .serializers import MemberDirectorySerializer, MemberSerializer
 from .utils import get_tokens_for_user
 from .authentication import UserDataIsolationMixin
 from rest_framework import serializers
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from atb_tracker.conditional import ConditionalRequestMixin
+from .context import get_user_context
+from .dashboard import cached_dashboard
+from .directory import DirectoryPagination, directory_members
+from .hashing import check_member_password
+from .ical import (ICS_CONTENT_TYPE, FeedContentNegotiation, cached_feed, feed_cache_key, feed_etag, new_feed_token,
+                   token_digest)
+from .shards import route_request
+from .team_report import team_members, utilization_report
 
 class MemberListCreateView(generics.ListCreateAPIView):
     queryset = Member.objects.all()
     serializer_class = MemberSerializer
     permission_classes = [AllowAny]
 
+    def get_permissions(self):
+        # Registration is open; the full member table is for staff (members use the directory)
+        if self.request.method == 'GET':
+            return [IsAdminUser()]
+        return super().get_permissions()
+
     def create(self, request, *args, **kwargs):
         response = super().create(request, *args, **kwargs)
         # Generate JWT tokens for the new user
@@ -34,6 +58,7 @@ class LoginSerializer(serializers.Serializer):
 class LoginView(generics.GenericAPIView):
     serializer_class = LoginSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'login'
     
     def get(self, request, *args, **kwargs):
         return Response({'detail': 'Method "GET" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -48,8 +73,8 @@ class LoginView(generics.GenericAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            user = Member.objects.get(email=email)
-            if user.check_password(password):
+            user = Member.objects.get_by_email(email)
+            if check_member_password(user, password):
                 tokens = get_tokens_for_user(user)
                 return Response({
                     'message': 'Login successful',
@@ -65,9 +90,109 @@ class LoginView(generics.GenericAPIView):
                 'error': 'User not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class UserProfileView(ConditionalRequestMixin, generics.RetrieveUpdateAPIView):
     serializer_class = MemberSerializer
     permission_classes = [IsAuthenticated]
     
     def get_object(self):
         return self.request.user
+
+    def object_version(self):
+        # The authenticated member is already loaded; no query needed
+        user = self.request.user
+        return user.updated_at, user.updated_at.isoformat()
+
+
+class DashboardView(generics.GenericAPIView):
+    """Everything the dashboard needs on load and on refresh: projects, this week's entries and sessions, totals and counts"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(cached_dashboard(request.user, request.user_context.tz))
+
+
+class MemberDirectoryView(generics.ListAPIView):
+    """Members sharing the caller's groups: ?group=, ?search= (name or email) and cursor pages"""
+    serializer_class = MemberDirectorySerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = DirectoryPagination
+
+    def get_queryset(self):
+        return directory_members(self.request.user, self.request.GET.get('group'), self.request.GET.get('search'))
+
+
+class TeamReportView(generics.GenericAPIView):
+    """Utilization, billable ratio and overtime for the members sharing the caller's groups"""
+    permission_classes = [IsAuthenticated]
+    max_days = 366
+    throttle_scope = 'exports'
+
+    def get(self, request):
+        try:
+            end = parse_date(request.GET['end']) if request.GET.get('end') else timezone.localdate(timezone=request.user_context.tz)
+            start = parse_date(request.GET['start']) if request.GET.get('start') else end - timedelta(days=27)
+        except ValueError:
+            start = end = None
+        if start is None or end is None or start > end:
+            return Response({'error': 'start and end must be YYYY-MM-DD dates with start <= end'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= self.max_days:
+            return Response({'error': f'Reports are limited to {self.max_days} days'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        members = team_members(request.user, request.GET.get('group'))
+        return Response(utilization_report(members, start, end))
+
+
+class CalendarFeedView(generics.GenericAPIView):
+    """The caller's calendar subscription: GET its state, POST to issue a new URL, DELETE to revoke it"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        feed = CalendarFeed.objects.filter(user=request.user).first()
+        return Response({'active': feed is not None, 'created_at': feed.created_at if feed else None})
+
+    def post(self, request):
+        # Only the digest is stored, so the URL cannot be shown again; issuing one revokes the last
+        token, digest = new_feed_token()
+        feed, _ = CalendarFeed.objects.update_or_create(
+            user=request.user, defaults={'token_digest': digest, 'created_at': timezone.now()},
+        )
+        return Response({
+            'url': request.build_absolute_uri(reverse('calendar-feed-ics', args=[token])),
+            'created_at': feed.created_at,
+        }, status=status.HTTP_201_CREATED)
+
+    def delete(self, request):
+        CalendarFeed.objects.filter(user=request.user).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CalendarFeedICSView(APIView):
+    """The iCalendar feed behind a subscription URL; the token in the URL is the credential"""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    renderer_classes = [JSONRenderer]
+    content_negotiation_class = FeedContentNegotiation
+
+    def get(self, request, token):
+        feed = CalendarFeed.objects.select_related('user').filter(
+            token_digest=token_digest(token), user__is_active=True,
+        ).first()
+        if feed is None:
+            return Response({'error': 'Calendar feed not found'}, status=status.HTTP_404_NOT_FOUND)
+        user = feed.user
+        route_request(user, request.method)
+        tz_name = str(get_user_context(user, request).tz)
+
+        key = feed_cache_key(user, tz_name)
+        etag = feed_etag(key)
+        # CompressionMiddleware weakens the tag it sent; the representation is the same
+        tags = {tag.removeprefix('W/') for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))}
+        if etag in tags or '*' in tags:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(cached_feed(user, tz_name, key), content_type=ICS_CONTENT_TYPE)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
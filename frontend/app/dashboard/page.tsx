@@ -37,7 +37,9 @@ import { PomodoroTimer } from "@components/pomodoro-timer"
 import { TagsPage } from "@components/tags-page"
 import { useAuth } from "@components/auth/auth-context"
 import { useRouter } from "next/navigation"
+import { isRateLimited } from "@/lib/auth"
 import { fetchPomodoroSessions, PomodoroSession } from "@/utils/pomodoro-api"
+import type { Dashboard as DashboardData } from "@/utils/dashboard-api"
 
 // Notification type definitions
 export type NotificationType = "deadline" | "task" | "reminder";
@@ -146,6 +148,9 @@ const [projects, setProjects] = useState<Project[]>([])
   const [showProjectDropdown, setShowProjectDropdown] = useState(false)
   const [taskNameSuggestions, setTaskNameSuggestions] = useState<string[]>([])
   const [pomodoroSessions, setPomodoroSessions] = useState<PomodoroSession[]>([])
+  // Today's and this week's totals and the completed counts, as the server computed them
+  const [totals, setTotals] = useState<DashboardData["totals"] | null>(null)
+  const [completed, setCompleted] = useState<DashboardData["completed"] | null>(null)
 
   const { user, logout } = useAuth()
   const router = useRouter()
@@ -376,74 +381,9 @@ useEffect(() => {
 
 // ...existing code...
 
-  // Fetch projects, time entries, and pomodoro sessions from backend on mount
+  // Fetch projects, time entries, pomodoro sessions and totals from backend on mount
   useEffect(() => {
-    async function fetchInitialData() {
-      try {
-        console.log('fetchInitialData - starting...');
-        const [projectsData, timeEntriesData, pomodorosData] = await Promise.all([
-          (await import("@/utils/projects-api")).fetchProjects(),
-          (await import("@/utils/time-entries-api")).fetchTimeEntries(),
-          fetchPomodoroSessions()
-        ])
-        
-        console.log('fetchInitialData - projectsData:', projectsData);
-        console.log('fetchInitialData - timeEntriesData:', timeEntriesData);
-        console.log('fetchInitialData - pomodorosData:', pomodorosData);
-        
-        // Validate projects data before setting
-        const validatedProjects = Array.isArray(projectsData) ? projectsData.filter(project => {
-          if (!project || typeof project !== 'object') {
-            console.warn('Invalid project data:', project);
-            return false;
-          }
-          if (!project.name || typeof project.name !== 'string') {
-            console.warn('Project missing name or invalid name:', project);
-            return false;
-          }
-          return true;
-        }) : [];
-        
-        console.log('fetchInitialData - validatedProjects:', validatedProjects);
-        setProjectsSafe(validatedProjects)
-        
-        // Map backend time entries to frontend format with proper project name resolution
-        const mappedTimeEntries = timeEntriesData.map((entry: any) => {
-          console.log('fetchInitialData - processing entry:', entry);
-          // Find the project name from the projects array
-          let projectName = String(entry.project);
-          const projectObj = projectsData.find((p: Project) => p.id == entry.project);
-          if (projectObj && projectObj.name) {
-            projectName = projectObj.name;
-          }
-          
-          const mappedEntry = {
-            id: entry.id?.toString() ?? '',
-            task: entry.description ?? '',
-            project: projectName, // Use project name for consistency
-            duration: (entry.duration || 0) * 60, // Convert minutes to seconds
-            date: entry.date,
-            type: entry.type || 'regular',
-            billable: entry.billable || false,
-            tags: [] as string[],
-          };
-          console.log('fetchInitialData - mapped entry:', mappedEntry);
-          return mappedEntry;
-        });
-        
-        console.log('fetchInitialData - mappedTimeEntries:', mappedTimeEntries);
-        setTimeEntries(mappedTimeEntries)
-        setPomodoroSessions(pomodorosData)
-        
-        // Store projects in localStorage for consistency
-        if (typeof window !== "undefined") {
-          localStorage.setItem("userProjects", JSON.stringify(projectsData))
-        }
-      } catch (err) {
-        console.error("Failed to fetch dashboard data:", err)
-      }
-    }
-    fetchInitialData()
+    refreshDashboard()
   }, [])
 
   // Add this useEffect after the existing ones to refresh projects when returning to TIME TRACKER
@@ -454,7 +394,7 @@ useEffect(() => {
         setProjects(JSON.parse(savedProjects))
       }
       // Refresh time entries when navigating to TIME TRACKER
-      refreshTimeEntries()
+      refreshDashboard()
     }
   }, [activePage])
 
@@ -471,54 +411,91 @@ useEffect(() => {
     }
   }, [activePage])
 
-  // Add a function to refresh time entries from backend
-  const refreshTimeEntries = async () => {
+  // Load the dashboard bootstrap: every project, this week's time entries and
+  // pomodoro sessions, and the server's totals. The first load and every refresh
+  // read the same endpoint, so they always cover the same week.
+  const refreshDashboard = async () => {
     try {
-      console.log('refreshTimeEntries - starting...');
-      const { fetchTimeEntries } = await import("@/utils/time-entries-api")
-      const timeEntriesData = await fetchTimeEntries()
-      console.log('refreshTimeEntries - timeEntriesData:', timeEntriesData);
-      
+      console.log('refreshDashboard - starting...');
+      const {
+        projects: projectsData,
+        time_entries: timeEntriesData,
+        pomodoro_sessions: pomodorosData,
+        totals: totalsData,
+        completed: completedData,
+      } = await (await import("@/utils/dashboard-api")).fetchDashboard()
+
+      console.log('refreshDashboard - projectsData:', projectsData);
+      console.log('refreshDashboard - timeEntriesData:', timeEntriesData);
+      console.log('refreshDashboard - pomodorosData:', pomodorosData);
+
+      // Validate projects data before setting
+      const validatedProjects = Array.isArray(projectsData) ? projectsData.filter(project => {
+        if (!project || typeof project !== 'object') {
+          console.warn('Invalid project data:', project);
+          return false;
+        }
+        if (!project.name || typeof project.name !== 'string') {
+          console.warn('Project missing name or invalid name:', project);
+          return false;
+        }
+        return true;
+      }) : [];
+
+      console.log('refreshDashboard - validatedProjects:', validatedProjects);
+      setProjectsSafe(validatedProjects)
+
+      // Map backend time entries to frontend format with proper project name resolution
       const mappedTimeEntries = timeEntriesData.map((entry: any) => {
-        console.log('refreshTimeEntries - processing entry:', entry);
+        console.log('refreshDashboard - processing entry:', entry);
+        // Find the project name from the projects array
         let projectName = String(entry.project);
-        const projectObj = projects.find((p: Project) => p.id == entry.project);
+        const projectObj = validatedProjects.find((p) => p.id == entry.project);
         if (projectObj && projectObj.name) {
           projectName = projectObj.name;
         }
-        
+
         const mappedEntry = {
           id: entry.id?.toString() ?? '',
           task: entry.description ?? '',
-          project: projectName,
+          project: projectName, // Use project name for consistency
           duration: (entry.duration || 0) * 60, // Convert minutes to seconds
           date: entry.date,
           type: entry.type || 'regular',
           billable: entry.billable || false,
           tags: [] as string[],
         };
-        console.log('refreshTimeEntries - mapped entry:', mappedEntry);
+        console.log('refreshDashboard - mapped entry:', mappedEntry);
         return mappedEntry;
       });
-      
-      console.log('refreshTimeEntries - mappedTimeEntries:', mappedTimeEntries);
+
+      console.log('refreshDashboard - mappedTimeEntries:', mappedTimeEntries);
       setTimeEntries(mappedTimeEntries)
+      setPomodoroSessions(pomodorosData)
+      setTotals(totalsData)
+      setCompleted(completedData)
+
+      // Store projects in localStorage for consistency; this is the full list, completed projects included
+      if (typeof window !== "undefined") {
+        localStorage.setItem("userProjects", JSON.stringify(projectsData))
+      }
     } catch (err) {
-      console.error("Failed to refresh time entries:", err)
+      console.error("Failed to fetch dashboard data:", err)
     }
   }
 
   // Add periodic refresh of time entries to ensure data consistency
   useEffect(() => {
     const interval = setInterval(() => {
-      // Only refresh if not currently tracking to avoid interrupting the timer
-      if (!isTracking) {
-        refreshTimeEntries()
+      // Only refresh if not currently tracking to avoid interrupting the timer,
+      // and not while the API has asked us to back off
+      if (!isTracking && !isRateLimited()) {
+        refreshDashboard()
       }
     }, 30000) // Refresh every 30 seconds
 
     return () => clearInterval(interval)
-  }, [isTracking, projects]) // Dependencies to ensure proper refresh
+  }, [isTracking]) // Dependencies to ensure proper refresh
 
   const formatTime = (seconds: number) => {
     const hours = Math.floor(seconds / 3600)
@@ -562,7 +539,7 @@ useEffect(() => {
           await createTimeEntry(entryData)
           
           // Refresh time entries from backend to ensure data consistency
-          await refreshTimeEntries()
+          await refreshDashboard()
           
         } catch (err) {
           console.error("Failed to save time entry:", err)
@@ -612,7 +589,7 @@ useEffect(() => {
         await createTimeEntry(entryData)
         
         // Refresh time entries from backend to ensure data consistency
-        await refreshTimeEntries()
+        await refreshDashboard()
         
       } catch (err) {
         console.error("Failed to save pomodoro entry:", err)
@@ -620,29 +597,20 @@ useEffect(() => {
     }
   }
 
-  // Calculate today's total time (regular + pomodoro)
+  // Today's total time (regular + pomodoro) and this week's, in seconds, from the server's totals
   const getTodayTotal = () => {
-    const today = new Date().toISOString().split("T")[0];
-    const regularTotal = timeEntries.filter((entry) => entry.date === today).reduce((total, entry) => total + entry.duration, 0);
-    const pomodoroTotal = pomodoroSessions.filter((session) => {
-      const sessionDate = new Date(session.start_time).toISOString().split("T")[0];
-      return sessionDate === today;
-    }).reduce((total, session) => total + (session.duration || 0) * 60, 0); // duration is in minutes, convert to seconds
-    return regularTotal + pomodoroTotal;
+    if (!totals) return 0;
+    return (totals.today.minutes + totals.today.focus_minutes) * 60;
   }
 
-  // Calculate this week's total time
   const getWeekTotal = () => {
-    const today = new Date()
-    const startOfWeek = new Date(today)
-    startOfWeek.setDate(today.getDate() - today.getDay() + 1) // Monday
-    const startOfWeekStr = startOfWeek.toISOString().split("T")[0]
-
-    return timeEntries
-      .filter((entry) => entry.date >= startOfWeekStr)
-      .reduce((total, entry) => total + entry.duration, 0)
+    if (!totals) return 0;
+    return totals.week.minutes * 60;
   }
 
+  // Projects that can still take time; completed ones stay in `projects` for lookups
+  const activeProjects = projects.filter((p: Project) => (p.status ?? "").toLowerCase() !== "completed")
+
   const handleProjectClick = (projectName: string) => {
     setActivePage("PROJECTS")
     // You can add additional logic here to filter or highlight the specific project
@@ -886,7 +854,7 @@ useEffect(() => {
                       {weekTotal > 0 ? formatDuration(weekTotal + timeElapsed) : "0h 0m"}
                     </div>
                     <p className="text-xs text-muted-foreground">
-                      {weekTotal > 0 ? `${timeEntries.length} sessions logged` : "No time logged yet"}
+                      {weekTotal > 0 ? `${totals?.week.entries ?? 0} sessions logged` : "No time logged yet"}
                     </p>
                   </CardContent>
                 </Card>
@@ -911,6 +879,11 @@ useEffect(() => {
                         ? "Projects with logged time"
                         : "No projects yet"}
                     </p>
+                    {completed && (
+                      <p className="text-xs text-muted-foreground">
+                        {completed.projects} projects and {completed.tasks} tasks completed
+                      </p>
+                    )}
                   </CardContent>
                 </Card>
 
@@ -922,9 +895,9 @@ useEffect(() => {
                     </button>
                   </CardHeader>
                   <CardContent>
-                    <div className="text-2xl font-bold">{timeEntries.length + pomodoroSessions.length}</div>
+                    <div className="text-2xl font-bold">{(totals?.week.entries ?? 0) + (totals?.week.sessions ?? 0)}</div>
                     <p className="text-xs text-muted-foreground">
-                      {pomodoroSessions.length} Pomodoro sessions
+                      {totals?.week.sessions ?? 0} Pomodoro sessions this week
                     </p>
                   </CardContent>
                 </Card>
@@ -1004,8 +977,8 @@ useEffect(() => {
                                 >
                                   No Project
                                 </button>
-                                {projects.length > 0 ? (
-                                  projects.map((project) => {
+                                {activeProjects.length > 0 ? (
+                                  activeProjects.map((project) => {
                                     // Ensure project name and client are strings
                                     const projectName = typeof project.name === 'string' ? project.name : 'Unnamed Project';
                                     const projectClient = typeof project.client === 'object' && project.client !== null ? project.client.name : 'No client';
@@ -1411,7 +1384,7 @@ useEffect(() => {
                     </div>
                     <div className="flex justify-between text-sm">
                       <span className="text-gray-600">Total Sessions:</span>
-                      <span className="font-medium">{timeEntries.length}</span>
+                      <span className="font-medium">{totals?.week.entries ?? 0}</span>
                     </div>
                   </div>
                   <button
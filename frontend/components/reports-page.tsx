@@ -21,8 +21,8 @@ import {
   ResponsiveContainer,
   Legend,
 } from "recharts"
-import { fetchPomodoroSessions, PomodoroSession } from "@/utils/pomodoro-api"
-import { apiRequest } from "@/lib/auth"
+import { PomodoroSession } from "@/utils/pomodoro-api"
+import { apiBatch } from "@/lib/auth"
 import { API_BASE } from '@/lib/auth'
 
 export function ReportsPage() {
@@ -39,16 +39,20 @@ export function ReportsPage() {
     async function fetchData() {
       setLoadingData(true)
       try {
-        // Fetch projects from backend
-        const projectsRes = await apiRequest(`${API_BASE}/projects/`)
-        const projectsData = await projectsRes.json()
+        // Projects, time entries and pomodoro sessions in one round trip
+        const [projectsRes, timeRes, pomodorosRes] = await apiBatch([
+          { url: `${API_BASE}/projects/` },
+          { url: `${API_BASE}/projects/time-entries/` },
+          { url: `${API_BASE}/pomodoros/` },
+        ])
+        if ([projectsRes, timeRes, pomodorosRes].some((res) => res.status !== 200)) {
+          throw new Error("Failed to fetch report data")
+        }
+        const projectsData = projectsRes.body
         setProjects(projectsData)
-        // Fetch time entries from backend
-        const timeRes = await apiRequest(`${API_BASE}/projects/time-entries/`)
-        const timeData = await timeRes.json()
+        const timeData = timeRes.body
         setTimeEntries(timeData)
-        // Fetch pomodoro sessions from backend
-        const pomodorosData = await fetchPomodoroSessions()
+        const pomodorosData: PomodoroSession[] = pomodorosRes.body
         setPomodoroSessions(pomodorosData)
         // Optionally cache to localStorage for offline fallback
         if (typeof window !== "undefined") {
@@ -180,6 +180,13 @@ export const auth = {
 };
 
 // API request wrapper with automatic token handling
+// Set from Retry-After when the API answers 429; pollers skip their ticks until then
+let rateLimitedUntil = 0;
+
+export function isRateLimited(): boolean {
+  return Date.now() < rateLimitedUntil;
+}
+
 export async function apiRequest(url: string, options: RequestInit = {}): Promise<Response> {
   // Get the auth token.
   const authHeader = auth.getAuthHeader();
@@ -209,6 +216,11 @@ export async function apiRequest(url: string, options: RequestInit = {}): Promis
 
   console.log(`Response from ${url}: ${response.status}`);
 
+  if (response.status === 429) {
+    const retryAfter = Number(response.headers.get('Retry-After')) || 60;
+    rateLimitedUntil = Date.now() + retryAfter * 1000;
+  }
+
   // If unauthorized, try to refresh token and retry once
   if (response.status === 401) {
     console.log('Unauthorized, attempting token refresh...');
@@ -240,4 +252,38 @@ export async function apiRequest(url: string, options: RequestInit = {}): Promis
   }
 
   return response;
-} 
\ No newline at end of file
+} 
+export interface BatchRequest {
+  method?: string;
+  url: string; // full URL, as passed to apiRequest
+  body?: unknown;
+  headers?: Record<string, string>;
+}
+
+export interface BatchResponse<T = any> {
+  status: number;
+  headers: Record<string, string>;
+  body: T;
+}
+
+// Several API calls in one round trip; batches of GETs run concurrently on the server
+export async function apiBatch(requests: BatchRequest[]): Promise<BatchResponse[]> {
+  const response = await apiRequest(`${API_BASE}/batch/`, {
+    method: 'POST',
+    body: JSON.stringify({
+      parallel: requests.every(({ method = 'GET' }) => method.toUpperCase() === 'GET'),
+      requests: requests.map(({ method = 'GET', url, body, headers }) => {
+        const { pathname, search } = new URL(url, window.location.origin);
+        return { method, path: pathname + search, body, headers };
+      }),
+    }),
+  });
+  if (!response.ok) throw new Error(`Batch request failed: ${response.status}`);
+  const { responses } = await response.json();
+  const throttled = (responses as BatchResponse[]).find((item) => item.status === 429);
+  if (throttled) {
+    const retryAfter = Number(throttled.headers['Retry-After']) || 60;
+    rateLimitedUntil = Math.max(rateLimitedUntil, Date.now() + retryAfter * 1000);
+  }
+  return responses;
+}
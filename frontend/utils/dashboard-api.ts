@@ -0,0 +1,44 @@
+import { apiRequest, API_BASE } from '../lib/auth';
+import type { TimeEntry } from './time-entries-api';
+import type { PomodoroSession } from './pomodoro-api';
+
+const DASHBOARD_ENDPOINT = `${API_BASE}/users/dashboard/`;
+
+// A project as GET /api/projects/ lists it
+export interface DashboardProject {
+  id: number;
+  name: string;
+  status: string;
+  progress: number;
+  client: { id: number; name: string; [key: string]: any } | null;
+  tags: { id: number; name: string; [key: string]: any }[];
+  total_minutes: number;
+  billable_minutes: number;
+  [key: string]: any;
+}
+
+export interface DashboardTotals {
+  minutes: number;
+  billable_minutes: number;
+  entries: number;
+  focus_minutes: number;
+  sessions: number;
+}
+
+export interface Dashboard {
+  timezone: string;
+  date: string;       // "YYYY-MM-DD", in the user's timezone
+  week_start: string; // Monday of the current week
+  projects: DashboardProject[];                  // every project, completed ones included
+  time_entries: (TimeEntry & { type?: string })[]; // this week's entries
+  pomodoro_sessions: PomodoroSession[];          // this week's sessions
+  totals: { today: DashboardTotals; week: DashboardTotals };
+  completed: { tasks: number; projects: number };
+}
+
+// Everything the dashboard shows, in one request; the periodic refresh reloads it too
+export async function fetchDashboard(): Promise<Dashboard> {
+  const res = await apiRequest(DASHBOARD_ENDPOINT);
+  if (!res.ok) throw new Error("Failed to fetch dashboard");
+  return res.json();
+}